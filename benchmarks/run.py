@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmarks for the scanner hot paths: swing/BOS detection, ATR, level
+computation, Telegram formatting and the SQLite helpers.
+
+Each case is timed on synthetic OHLCV of several sizes (best of --repeat
+runs, each run looping until it takes at least --min-time seconds) and its
+peak allocation is measured once with tracemalloc.
+
+Usage:
+  python benchmarks/run.py                           # print results
+  python benchmarks/run.py --save                    # write benchmarks/baseline.json
+  python benchmarks/run.py --compare                 # exit 1 if ops/sec dropped > --tolerance
+  python benchmarks/run.py --sizes 500,5000 --only detect_bos,atr
+"""
+import argparse
+import atexit
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from benchmarks.synthetic import synthetic_ohlcv
+from src import config
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+SIZES = [500, 5_000, 20_000, 100_000]
+
+
+def _signal(i: int) -> dict:
+    return {
+        "symbol": f"SYM{i % 200}", "bos_ts": f"2024-01-01T{i % 24:02d}:{i % 60:02d}:00",
+        "direction": "long", "entry": 1.1, "stop": 1.09, "tp1": 1.11, "tp2": 1.12, "tp3": 1.13,
+        "atr": 0.002, "pulled_back": i % 2,
+    }
+
+
+def bar_cases(df):
+    """
+    (name, fn) pairs for one synthetic frame.
+    """
+    from src.scanner.bos_detector import find_swings, detect_bos, atr, atr_latest, IncrementalBosDetector
+    from src.scanner.entry_finder import compute_levels
+
+    left, right = config.SWING_LEFT, config.SWING_RIGHT
+    bos = detect_bos(df, left, right) or {
+        "direction": "long", "bos_price": float(df["High"].iloc[-20]), "bos_ts": str(df.index[-1]),
+        "last_close": float(df["Close"].iloc[-1]), "last_open": float(df["Open"].iloc[-1]),
+    }
+    atr_value = atr_latest(df, config.ATR_PERIOD)
+
+    def incremental():
+        IncrementalBosDetector(left, right).update_frame(df)
+
+    return [
+        ("find_swings", lambda: find_swings(df, left, right)),
+        ("detect_bos", lambda: detect_bos(df, left, right)),
+        ("atr", lambda: atr(df, config.ATR_PERIOD)),
+        ("atr_wilder", lambda: atr(df, config.ATR_PERIOD, wilder=True)),
+        ("atr_latest", lambda: atr_latest(df, config.ATR_PERIOD)),
+        ("compute_levels", lambda: compute_levels(bos, df, atr_value)),
+        ("incremental_bos", incremental),
+    ]
+
+
+def fixed_cases():
+    """
+    Cases that don't depend on history length.
+    """
+    from src.notifier import telegram
+    from src import db
+
+    sig = {
+        "symbol": "EURUSD", "direction": "long", "entry_low": 1.0812, "entry_high": 1.0834,
+        "stop": 1.0790, "tp1": 1.0870, "tp2": 1.0905, "rr_est_num": 2.0,
+        "reason_lines": ["LONG BOS confirmed", "Price entered Golden Zone / FVG"], "status": "ENTRY TRIGGERED",
+    }
+    stats = {"total_signals": 1234, "market_sent": 321, "candidates": 999}
+
+    tmp = tempfile.mkdtemp(prefix="bench-db-")
+    atexit.register(shutil.rmtree, tmp, True)
+    db.close_db()
+    db.DB = os.path.join(tmp, "bench.db")
+    db.init_db()
+    for i in range(2_000):
+        db.upsert_signal(_signal(i))
+    counter = iter(range(10**9))
+
+    def upsert_new():
+        db.upsert_signal(_signal(10_000 + next(counter)))
+
+    def batch_flush_100():
+        batch = db.SignalBatch()
+        for i in range(100):
+            s = _signal(i)
+            batch.mark_bos_sent(s["symbol"], s["bos_ts"])
+        batch.flush()
+
+    return [
+        ("format_market_scan_message", lambda: telegram.format_market_scan_message(sig)),
+        ("format_bos_message", lambda: telegram.format_bos_message(sig)),
+        ("format_status_message", lambda: telegram.format_status_message(stats, 300)),
+        ("db.upsert_signal(existing)", lambda: db.upsert_signal(_signal(7))),
+        ("db.upsert_signal(new)", upsert_new),
+        ("db.get_signal", lambda: db.get_signal("SYM7", _signal(7)["bos_ts"])),
+        ("db.SignalBatch.flush(100)", batch_flush_100),
+        ("db.list_armed_symbols", lambda: db.list_armed_symbols(48)),
+        ("db.get_stats", db.get_stats),
+    ]
+
+
+def time_case(fn, repeat: int, min_time: float) -> float:
+    """
+    Best seconds per call over `repeat` runs.
+    """
+    fn()  # warm up
+    loops, elapsed = 1, 0.0
+    while True:
+        t0 = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        elapsed = time.perf_counter() - t0
+        if elapsed >= min_time:
+            break
+        loops *= 2 if elapsed <= 0 else max(2, min(10, int(min_time / elapsed) + 1))
+    best = elapsed / loops
+    for _ in range(repeat - 1):
+        t0 = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        best = min(best, (time.perf_counter() - t0) / loops)
+    return best
+
+
+def peak_memory(fn) -> int:
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def run(sizes, only, repeat: int, min_time: float, volatility: float, gap_prob: float) -> dict:
+    results = {}
+
+    def record(key, fn):
+        seconds = time_case(fn, repeat, min_time)
+        results[key] = {"ops_per_sec": 1.0 / seconds, "seconds": seconds, "peak_bytes": peak_memory(fn)}
+        r = results[key]
+        print(f"{key:<40} {r['ops_per_sec']:>14,.1f} ops/s {r['seconds'] * 1e3:>12.4f} ms {r['peak_bytes'] / 1024:>12,.1f} KiB")
+
+    for n in sizes:
+        df = synthetic_ohlcv(n, volatility=volatility, gap_prob=gap_prob, seed=n)
+        for name, fn in bar_cases(df):
+            if not only or name in only:
+                record(f"{name}[{n}]", fn)
+    for name, fn in fixed_cases():
+        if not only or name in only:
+            record(name, fn)
+    return results
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list:
+    """
+    Cases whose ops/sec fell more than `tolerance` (fraction) below the baseline.
+    """
+    regressions = []
+    print()
+    print(f"{'case':<40} {'baseline':>14} {'now':>14} {'change':>9}")
+    for key, now in results.items():
+        base = baseline.get(key)
+        if not base:
+            continue
+        change = now["ops_per_sec"] / base["ops_per_sec"] - 1.0
+        flag = "  REGRESSION" if change < -tolerance else ""
+        print(f"{key:<40} {base['ops_per_sec']:>14,.1f} {now['ops_per_sec']:>14,.1f} {change:>+8.1%}{flag}")
+        if flag:
+            regressions.append(key)
+    return regressions
+
+
+def main():
+    p = argparse.ArgumentParser()
+    p.add_argument("--sizes", default=",".join(str(s) for s in SIZES), help="bar counts, comma separated")
+    p.add_argument("--only", default="", help="case names to run, comma separated")
+    p.add_argument("--repeat", type=int, default=5)
+    p.add_argument("--min-time", type=float, default=0.2, help="seconds per timed run")
+    p.add_argument("--volatility", type=float, default=0.002)
+    p.add_argument("--gap-prob", type=float, default=0.01)
+    p.add_argument("--baseline", default=BASELINE)
+    p.add_argument("--save", action="store_true", help="save results as the baseline")
+    p.add_argument("--compare", action="store_true", help="compare with the baseline; exit 1 on regressions")
+    p.add_argument("--tolerance", type=float, default=0.2, help="allowed ops/sec drop (0.2 = 20%%)")
+    args = p.parse_args()
+
+    sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+    only = {s.strip() for s in args.only.split(",") if s.strip()}
+    results = run(sizes, only, args.repeat, args.min_time, args.volatility, args.gap_prob)
+
+    if args.save:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+        print("Baseline written to", args.baseline)
+
+    if args.compare:
+        if not os.path.exists(args.baseline):
+            print("No baseline at", args.baseline)
+            sys.exit(2)
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print(f"{len(regressions)} regression(s) beyond {args.tolerance:.0%}")
+            sys.exit(1)
+        print("No regressions.")
+
+
+if __name__ == "__main__":
+    main()
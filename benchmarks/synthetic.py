@@ -0,0 +1,39 @@
+# Deterministic synthetic OHLCV for benchmarks (and quick experiments)
+from typing import Optional
+import numpy as np
+import pandas as pd
+
+
+def synthetic_ohlcv(
+    bars: int,
+    volatility: float = 0.002,
+    gap_prob: float = 0.0,
+    gap_size: float = 0.01,
+    freq: str = "15min",
+    start: str = "2024-01-01",
+    start_price: float = 100.0,
+    seed: Optional[int] = 0,
+) -> pd.DataFrame:
+    """
+    Geometric random walk with `volatility` (stdev of per-bar log returns).
+    With probability `gap_prob` a bar opens away from the previous close by a
+    normally distributed gap of scale `gap_size`. Same seed, same frame.
+    """
+    rng = np.random.default_rng(seed)
+    returns = rng.normal(0.0, volatility, bars)
+    gaps = np.where(rng.random(bars) < gap_prob, rng.normal(0.0, gap_size, bars), 0.0)
+    gaps[0] = 0.0
+
+    # open_i = close_{i-1} * exp(gap_i); close_i = open_i * exp(return_i)
+    log_close = np.log(start_price) + np.cumsum(gaps + returns)
+    close = np.exp(log_close)
+    open_ = np.exp(log_close - returns)
+    body_high = np.maximum(open_, close)
+    body_low = np.minimum(open_, close)
+    wick = np.abs(rng.normal(0.0, volatility * 0.5, (2, bars)))
+    high = body_high * np.exp(wick[0])
+    low = body_low * np.exp(-wick[1])
+    volume = rng.integers(100, 10_000, bars).astype(float)
+
+    index = pd.date_range(start, periods=bars, freq=freq)
+    return pd.DataFrame({"Open": open_, "High": high, "Low": low, "Close": close, "Volume": volume}, index=index)
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Backtest the BOS -> pullback rules over stored history.
+
+History comes from the bar store (BAR_STORE_DIR, filled by the live scanner)
+or from CSV files named <SYMBOL>_<tf>.csv. The HTF is resampled from the LTF
+when only the LTF is available.
+
+Usage:
+  python scripts/backtest.py                          # all symbols from SYMBOLS_FILE
+  python scripts/backtest.py EURUSD=X GC=F --target 3
+  python scripts/backtest.py --csv-dir data/csv --workers 8 --trades-out trades.csv
+"""
+import argparse
+import os
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import pandas as pd
+from src import config
+from src.backtest import engine
+
+def main():
+    defaults = engine.default_params()
+    p = argparse.ArgumentParser()
+    p.add_argument("symbols", nargs="*", help="symbols to test (default: SYMBOLS_FILE)")
+    p.add_argument("--csv-dir", default=None, help="read <SYMBOL>_<tf>.csv files instead of the bar store")
+    p.add_argument("--htf", default=defaults["htf"])
+    p.add_argument("--ltf", default=defaults["ltf"])
+    p.add_argument("--left", type=int, default=defaults["left"])
+    p.add_argument("--right", type=int, default=defaults["right"])
+    p.add_argument("--lookback", type=int, default=defaults["lookback"])
+    p.add_argument("--r-low", type=float, default=defaults["r_low"])
+    p.add_argument("--r-high", type=float, default=defaults["r_high"])
+    p.add_argument("--stop-buffer", type=float, default=defaults["stop_buffer"])
+    p.add_argument("--target", type=int, choices=(1, 2, 3), default=defaults["target"])
+    p.add_argument("--workers", type=int, default=0, help="processes (default: one per CPU)")
+    p.add_argument("--out", default=None, help="write the per-symbol summary CSV here")
+    p.add_argument("--trades-out", default=None, help="write every trade to this CSV")
+    args = p.parse_args()
+
+    symbols = [s.strip().upper() for s in args.symbols] or list(config.SYMBOLS)
+    if not symbols:
+        print("No symbols to backtest.")
+        return
+
+    params = {
+        **defaults,
+        "htf": args.htf, "ltf": args.ltf,
+        "left": args.left, "right": args.right, "lookback": args.lookback,
+        "r_low": args.r_low, "r_high": args.r_high, "stop_buffer": args.stop_buffer,
+        "target": args.target,
+    }
+    res = engine.run(symbols, params, csv_dir=args.csv_dir, workers=args.workers)
+    summary, trades = res["summary"], res["trades"]
+
+    with pd.option_context("display.max_rows", None, "display.max_columns", None, "display.width", 160, "display.float_format", "{:.3f}".format):
+        print(summary[summary["trades"] > 0] if len(summary) else "No data.")
+
+    closed = trades[trades["outcome"] != "open"] if len(trades) else trades
+    print()
+    print(f"Symbols: {len(summary)}  Trades: {len(trades)} ({len(trades) - len(closed)} open)")
+    if len(closed):
+        print(
+            f"TP1 {closed['tp1_hit'].mean():.1%}  TP2 {closed['tp2_hit'].mean():.1%}  "
+            f"TP3 {closed['tp3_hit'].mean():.1%}  Stop {closed['stopped'].mean():.1%}"
+        )
+        print(f"Exit at TP{args.target}: avg {closed['r'].mean():.2f}R, total {closed['r'].sum():.1f}R")
+    print(f"Replayed {res['bars']:,} bars in {res['seconds']:.2f}s ({res['bars_per_sec']:,.0f} bars/s)")
+
+    if args.out:
+        summary.to_csv(args.out)
+        print("Summary written to", args.out)
+    if args.trades_out:
+        trades.to_csv(args.trades_out, index=False)
+        print("Trades written to", args.trades_out)
+
+if __name__ == "__main__":
+    main()
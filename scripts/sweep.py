@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Search strategy settings (swing left/right, retracement zone, ATR, stop buffer)
+over stored history and write a ranked results table.
+
+Each --set replaces one dimension of the default search space. --random N
+evaluates N random combinations of the space instead of the full grid.
+
+Usage:
+  python scripts/sweep.py
+  python scripts/sweep.py EURUSD=X GC=F --set left=2,3,4,5 --set right=2,3 --set stop_buffer=0.25,0.5
+  python scripts/sweep.py --csv-dir data/csv --random 200 --seed 1 --rank-by avg_r --min-trades 50
+"""
+import argparse
+import os
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import pandas as pd
+from src import config
+from src.backtest import sweep
+
+INT_KEYS = {"left", "right", "lookback", "atr_period", "target"}
+BOOL_KEYS = {"atr_wilder"}
+
+def parse_set(text: str):
+    key, _, values = text.partition("=")
+    key = key.strip().replace("-", "_")
+    if not values:
+        raise argparse.ArgumentTypeError(f"expected name=v1,v2,...: {text}")
+    if key in INT_KEYS:
+        cast = int
+    elif key in BOOL_KEYS:
+        cast = lambda v: v.strip().lower() in ("1", "true", "yes", "wilder")
+    else:
+        cast = float
+    return key, [cast(v) for v in values.split(",") if v.strip()]
+
+def main():
+    p = argparse.ArgumentParser()
+    p.add_argument("symbols", nargs="*", help="symbols to test (default: SYMBOLS_FILE)")
+    p.add_argument("--csv-dir", default=None, help="read <SYMBOL>_<tf>.csv files instead of the bar store")
+    p.add_argument("--set", dest="sets", action="append", type=parse_set, default=[], help="name=v1,v2,...")
+    p.add_argument("--random", type=int, default=0, help="evaluate this many random combinations")
+    p.add_argument("--seed", type=int, default=None)
+    p.add_argument("--workers", type=int, default=0, help="processes (default: one per CPU)")
+    p.add_argument("--rank-by", default="total_r", choices=("total_r", "avg_r", "win_rate", "tp2_rate"))
+    p.add_argument("--min-trades", type=int, default=20)
+    p.add_argument("--top", type=int, default=20)
+    p.add_argument("--out", default="sweep_results.csv")
+    args = p.parse_args()
+
+    symbols = [s.strip().upper() for s in args.symbols] or list(config.SYMBOLS)
+    if not symbols:
+        print("No symbols to test.")
+        return
+
+    space = dict(sweep.DEFAULT_SPACE)
+    space.update(dict(args.sets))
+    combos = sweep.random_combos(space, args.random, args.seed) if args.random else sweep.grid(space)
+
+    res = sweep.run_sweep(
+        symbols, combos, csv_dir=args.csv_dir, workers=args.workers,
+        rank_by=args.rank_by, min_trades=args.min_trades,
+    )
+    table = res["table"]
+    print(f"Evaluated {len(combos)} combinations in {res['seconds']:.1f}s ({res['tasks']} tasks)")
+    if table.empty:
+        print(f"No combination produced at least {args.min_trades} trades.")
+        return
+
+    with pd.option_context("display.max_columns", None, "display.width", 200, "display.float_format", "{:.3f}".format):
+        print(table.head(args.top))
+    table.to_csv(args.out, index=False)
+    print("Ranked results written to", args.out)
+
+if __name__ == "__main__":
+    main()
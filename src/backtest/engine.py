@@ -0,0 +1,263 @@
+# Historical backtest: replay stored OHLCV through BOS -> zone -> pullback -> SL/TP, one pass per symbol
+#
+# HTF bars are streamed through IncrementalBosDetector (O(1) per bar, same
+# result as detect_bos on each prefix) and ATR comes from one atr_array pass.
+# While a BOS is live, its levels are recomputed at every HTF close exactly
+# like the scanner does, and the LTF bars up to the next HTF close are checked
+# for a fill with one vectorized comparison. Filled trades are resolved on the LTF arrays in
+# growing chunks. When a bar reaches both the stop and a target, the stop is
+# assumed to have been hit first.
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional
+import numpy as np
+import pandas as pd
+from .. import config, markets
+from ..scanner.bos_detector import IncrementalBosDetector, atr_array
+from ..scanner.entry_finder import compute_levels
+from ..data_providers.history import load_htf_ltf
+
+TARGETS = (1, 2, 3)
+RESOLVE_CHUNK = 256
+
+
+def default_params() -> Dict:
+    return {
+        "htf": config.HTF,
+        "ltf": config.LTF,
+        "left": config.SWING_LEFT,
+        "right": config.SWING_RIGHT,
+        "lookback": 15,
+        "atr_period": config.ATR_PERIOD,
+        "atr_wilder": config.ATR_SMOOTHING == "wilder",
+        "r_low": config.RETRACEMENT_LOW,
+        "r_high": config.RETRACEMENT_HIGH,
+        "stop_buffer": config.ATR_STOP_BUFFER,
+        "target": 2,  # exit at TP1/TP2/TP3 for the R multiple
+    }
+
+
+def _first(mask: np.ndarray) -> int:
+    """
+    Index of the first True, or len(mask) when there is none.
+    """
+    i = int(np.argmax(mask)) if len(mask) else 0
+    return i if len(mask) and mask[i] else len(mask)
+
+
+def resolve_trade(levels: Dict, low: np.ndarray, high: np.ndarray, close: np.ndarray, start: int, target: int) -> Dict:
+    """
+    Walk LTF bars from the fill bar `start` until the stop or TP3 is hit (or
+    data runs out). Returns which targets were reached before the stop and
+    the R multiple of exiting at `target`.
+    """
+    long = levels["direction"] == "long"
+    entry, stop = levels["entry"], levels["stop"]
+    tps = [levels[f"tp{k}"] for k in TARGETS]
+    risk = max(abs(entry - stop), 1e-9)
+    n = len(low)
+
+    stop_at = None
+    tp_at: List[Optional[int]] = [None] * len(TARGETS)
+    pos, chunk = start, RESOLVE_CHUNK
+    while pos < n:
+        end = min(n, pos + chunk)
+        lo, hi = low[pos:end], high[pos:end]
+        i = _first(lo <= stop if long else hi >= stop)
+        if i < len(lo):
+            stop_at = pos + i
+        for k, tp in enumerate(tps):
+            if tp_at[k] is None:
+                j = _first(hi >= tp if long else lo <= tp)
+                if j < len(lo):
+                    tp_at[k] = pos + j
+        if stop_at is not None or tp_at[-1] is not None:
+            break
+        pos, chunk = end, chunk * 2
+
+    # Same bar as the stop counts as stopped out
+    reached = [t is not None and (stop_at is None or t < stop_at) for t in tp_at]
+    k = target - 1
+    if reached[k]:
+        r_multiple = abs(tps[k] - entry) / risk
+        exit_at, outcome = tp_at[k], f"tp{target}"
+    elif stop_at is not None:
+        r_multiple, exit_at, outcome = -1.0, stop_at, "stop"
+    else:
+        last = float(close[-1])
+        r_multiple = (last - entry) / risk if long else (entry - last) / risk
+        exit_at, outcome = n - 1, "open"
+
+    return {
+        "outcome": outcome,
+        "r": float(r_multiple),
+        "exit_index": int(exit_at),
+        **{f"tp{t}_hit": bool(reached[i]) for i, t in enumerate(TARGETS)},
+        "stopped": stop_at is not None and outcome == "stop",
+    }
+
+
+def bos_timeline(htf_df: pd.DataFrame, left: int, right: int, lookback: int) -> List[Optional[Dict]]:
+    """
+    BOS state after each HTF bar, i.e. detect_bos on every prefix. Depends only
+    on (left, right, lookback), so a sweep computes it once per such triple.
+    """
+    det = IncrementalBosDetector(left, right, lookback)
+    return [
+        det.update(ts, o, h, l, c)
+        for ts, o, h, l, c in zip(
+            htf_df.index,
+            htf_df["Open"].to_numpy(dtype=float).tolist(),
+            htf_df["High"].to_numpy(dtype=float).tolist(),
+            htf_df["Low"].to_numpy(dtype=float).tolist(),
+            htf_df["Close"].to_numpy(dtype=float).tolist(),
+        )
+    ]
+
+
+def atr_values(htf_df: pd.DataFrame, n: int, wilder: bool) -> np.ndarray:
+    """
+    ATR after each HTF bar (what atr_latest returns on every prefix).
+    """
+    return atr_array(htf_df["High"].values, htf_df["Low"].values, htf_df["Close"].values, n, wilder)
+
+
+def simulate(
+    symbol: str,
+    htf_df: pd.DataFrame,
+    ltf_df: pd.DataFrame,
+    timeline: List[Optional[Dict]],
+    atr_by_bar: np.ndarray,
+    params: Dict,
+) -> List[Dict]:
+    """
+    Trades for precomputed BOS / ATR series. One trade per BOS: the first LTF
+    bar after an HTF close that trades through the entry price fills it.
+    """
+    p = params
+    # HTF bars are labelled by their open; they are usable once closed
+    h_closes_at = htf_df.index + pd.Timedelta(seconds=markets.timeframe_seconds(p["htf"]))
+    l_low = ltf_df["Low"].to_numpy(dtype=float)
+    l_high = ltf_df["High"].to_numpy(dtype=float)
+    l_close = ltf_df["Close"].to_numpy(dtype=float)
+    bounds = ltf_df.index.searchsorted(h_closes_at)
+
+    trades: List[Dict] = []
+    traded = set()
+    for i, bos in enumerate(timeline):
+        atr_value = float(atr_by_bar[i])
+        if bos is None or bos["bos_ts"] in traded or atr_value != atr_value:
+            continue
+
+        # compute_levels only reads the frame for a zero-length impulse
+        degenerate = bos["last_close"] == bos["bos_price"]
+        levels = compute_levels(
+            bos, htf_df.iloc[max(0, i - 1): i + 1] if degenerate else None, atr_value,
+            r_low=p["r_low"], r_high=p["r_high"], stop_buffer=p["stop_buffer"],
+        )
+        lo, hi = bounds[i], (bounds[i + 1] if i + 1 < len(bounds) else len(l_low))
+        if lo >= hi:
+            continue
+        entry = levels["entry"]
+        window = l_low[lo:hi] <= entry if levels["direction"] == "long" else l_high[lo:hi] >= entry
+        j = _first(window)
+        if j == len(window):
+            continue
+
+        fill = lo + j
+        traded.add(bos["bos_ts"])
+        result = resolve_trade(levels, l_low, l_high, l_close, fill, p["target"])
+        trades.append({
+            "symbol": symbol,
+            "bos_ts": bos["bos_ts"],
+            "direction": levels["direction"],
+            "entry_ts": ltf_df.index[fill],
+            "exit_ts": ltf_df.index[result.pop("exit_index")],
+            "entry": levels["entry"],
+            "stop": levels["stop"],
+            "tp1": levels["tp1"],
+            "tp2": levels["tp2"],
+            "tp3": levels["tp3"],
+            **result,
+        })
+    return trades
+
+
+def backtest_frames(symbol: str, htf_df: pd.DataFrame, ltf_df: pd.DataFrame, params: Optional[Dict] = None) -> List[Dict]:
+    """
+    Trades produced by one symbol's history.
+    """
+    p = {**default_params(), **(params or {})}
+    if htf_df is None or ltf_df is None or htf_df.empty or ltf_df.empty:
+        return []
+    timeline = bos_timeline(htf_df, p["left"], p["right"], p["lookback"])
+    return simulate(symbol, htf_df, ltf_df, timeline, atr_values(htf_df, p["atr_period"], p["atr_wilder"]), p)
+
+
+def summarize(symbol: str, trades: List[Dict], bars: int, seconds: float) -> Dict:
+    n = len(trades)
+    closed = [t for t in trades if t["outcome"] != "open"]
+    r = np.array([t["r"] for t in closed], dtype=float)
+
+    def rate(key):
+        return sum(1 for t in closed if t[key]) / len(closed) if closed else 0.0
+
+    return {
+        "symbol": symbol,
+        "trades": n,
+        "open": n - len(closed),
+        "tp1_rate": rate("tp1_hit"),
+        "tp2_rate": rate("tp2_hit"),
+        "tp3_rate": rate("tp3_hit"),
+        "stop_rate": rate("stopped"),
+        "avg_r": float(r.mean()) if len(r) else 0.0,
+        "total_r": float(r.sum()) if len(r) else 0.0,
+        "bars": bars,
+        "seconds": seconds,
+        "bars_per_sec": bars / seconds if seconds > 0 else 0.0,
+    }
+
+
+def backtest_symbol(symbol: str, params: Optional[Dict] = None, csv_dir: Optional[str] = None) -> Dict:
+    """
+    Load one symbol's history and backtest it. Returns {"summary": ..., "trades": [...]}.
+    """
+    p = {**default_params(), **(params or {})}
+    htf_df, ltf_df = load_htf_ltf(symbol, p["htf"], p["ltf"], csv_dir)
+    if htf_df is None or ltf_df is None:
+        return {"summary": summarize(symbol, [], 0, 0.0), "trades": [], "error": "no data"}
+
+    t0 = time.perf_counter()
+    trades = backtest_frames(symbol, htf_df, ltf_df, p)
+    elapsed = time.perf_counter() - t0
+    return {"summary": summarize(symbol, trades, len(htf_df) + len(ltf_df), elapsed), "trades": trades}
+
+
+def run(symbols: List[str], params: Optional[Dict] = None, csv_dir: Optional[str] = None, workers: int = 0) -> Dict:
+    """
+    Backtest `symbols` across a process pool (one task per symbol).
+    Returns {"summary": DataFrame per symbol, "trades": DataFrame, "bars", "seconds", "bars_per_sec"}.
+    """
+    workers = workers or min(len(symbols), os.cpu_count() or 1) or 1
+    t0 = time.perf_counter()
+    if workers == 1:
+        results = [backtest_symbol(s, params, csv_dir) for s in symbols]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(backtest_symbol, symbols, [params] * len(symbols), [csv_dir] * len(symbols)))
+    elapsed = time.perf_counter() - t0
+
+    for s, res in zip(symbols, results):
+        if res.get("error"):
+            print(f"[Backtest] {s}: {res['error']}")
+    summary = pd.DataFrame([r["summary"] for r in results]).set_index("symbol") if results else pd.DataFrame()
+    trades = pd.DataFrame([t for r in results for t in r["trades"]])
+    bars = int(summary["bars"].sum()) if len(summary) else 0
+    return {
+        "summary": summary,
+        "trades": trades,
+        "bars": bars,
+        "seconds": elapsed,
+        "bars_per_sec": bars / elapsed if elapsed > 0 else 0.0,
+    }
@@ -0,0 +1,236 @@
+# Parameter sweep: evaluate many strategy settings across the universe in parallel
+#
+# Each symbol's history is loaded once by the parent and placed in shared
+# memory; worker processes attach to it instead of receiving pickled frames.
+# Work is split into (symbol, left/right/lookback) tasks: the BOS timeline is
+# computed once per task and reused by every combination that shares those
+# swing settings, ATR once per (period, smoothing).
+import itertools
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+from . import engine
+from ..data_providers.history import load_htf_ltf, OHLCV
+
+# Parameters that change the BOS timeline; everything else only changes levels/exits
+STRUCTURE_KEYS = ("left", "right", "lookback")
+
+DEFAULT_SPACE = {
+    "left": [2, 3, 4],
+    "right": [2, 3, 4],
+    "r_low": [0.382, 0.5],
+    "r_high": [0.618, 0.786],
+    "atr_period": [14],
+    "stop_buffer": [0.25, 0.5, 1.0],
+}
+
+
+def grid(space: Dict[str, List]) -> List[Dict]:
+    keys = list(space)
+    return [dict(zip(keys, values)) for values in itertools.product(*(space[k] for k in keys))]
+
+
+def valid_combo(combo: Dict, base: Optional[Dict] = None) -> bool:
+    """
+    False for combinations that can't be run (retracement zone with r_low >= r_high).
+    """
+    base = engine.default_params() if base is None else base
+    return combo.get("r_low", base["r_low"]) < combo.get("r_high", base["r_high"])
+
+
+def random_combos(space: Dict[str, List], n: int, seed: Optional[int] = None) -> List[Dict]:
+    """
+    `n` distinct valid combinations drawn uniformly from the grid, without
+    building it (fewer only when the grid has fewer valid ones).
+    """
+    keys = list(space)
+    sizes = [len(space[k]) for k in keys]
+    total = int(np.prod(sizes)) if sizes else 0
+    base = engine.default_params()
+    rng = random.Random(seed)
+    seen = set()
+    combos = []
+    while len(combos) < n and len(seen) < total:
+        idx = rng.randrange(total)
+        if idx in seen:
+            continue
+        seen.add(idx)
+        combo = {}
+        for k, size in zip(reversed(keys), reversed(sizes)):
+            idx, j = divmod(idx, size)
+            combo[k] = space[k][j]
+        combo = {k: combo[k] for k in keys}
+        if valid_combo(combo, base):
+            combos.append(combo)
+    return combos
+
+
+# ----------------------------
+# Shared-memory frames
+# ----------------------------
+def share_frame(df: pd.DataFrame) -> Tuple[shared_memory.SharedMemory, Dict]:
+    """
+    Copy an OHLCV frame into one shared block: int64 UTC ns timestamps followed
+    by float64 (bars x 5) values. Returns the block and a picklable spec.
+    """
+    n = len(df)
+    shm = shared_memory.SharedMemory(create=True, size=max(1, n * 8 * (1 + len(OHLCV))))
+    idx = df.index
+    tz = str(idx.tz) if idx.tz is not None else None
+    utc = idx.tz_convert("UTC").tz_localize(None) if tz else idx
+    ts = np.ndarray((n,), dtype=np.int64, buffer=shm.buf)
+    ts[:] = utc.as_unit("ns").asi8
+    values = np.ndarray((n, len(OHLCV)), dtype=np.float64, buffer=shm.buf, offset=n * 8)
+    values[:] = df[OHLCV].to_numpy(dtype=float)
+    return shm, {"name": shm.name, "n": n, "tz": tz}
+
+
+def attach_frame(spec: Dict) -> Tuple[shared_memory.SharedMemory, pd.DataFrame]:
+    """
+    DataFrame whose values are a view of the shared block (the index is rebuilt).
+    """
+    shm = shared_memory.SharedMemory(name=spec["name"])
+    n = spec["n"]
+    ts = np.ndarray((n,), dtype=np.int64, buffer=shm.buf)
+    values = np.ndarray((n, len(OHLCV)), dtype=np.float64, buffer=shm.buf, offset=n * 8)
+    index = pd.DatetimeIndex(ts.view("datetime64[ns]"))
+    if spec["tz"]:
+        index = index.tz_localize("UTC").tz_convert(spec["tz"])
+    return shm, pd.DataFrame(values, index=index, columns=OHLCV, copy=False)
+
+
+_specs: Dict[str, Dict] = {}
+_attached: Dict[str, Tuple] = {}
+
+
+def _init_worker(specs: Dict[str, Dict]):
+    global _specs
+    _specs = specs
+
+
+def _frames(symbol: str):
+    if symbol not in _attached:
+        spec = _specs[symbol]
+        htf_shm, htf_df = attach_frame(spec["htf"])
+        ltf_shm, ltf_df = attach_frame(spec["ltf"])
+        # keep the blocks referenced for as long as the frames are used
+        _attached[symbol] = (htf_shm, ltf_shm, htf_df, ltf_df)
+    return _attached[symbol][2], _attached[symbol][3]
+
+
+# ----------------------------
+# Evaluation
+# ----------------------------
+def _stats(trades: List[Dict]) -> Dict:
+    closed = [t for t in trades if t["outcome"] != "open"]
+    return {
+        "trades": len(trades),
+        "closed": len(closed),
+        "wins": sum(1 for t in closed if t["r"] > 0),
+        "tp1": sum(1 for t in closed if t["tp1_hit"]),
+        "tp2": sum(1 for t in closed if t["tp2_hit"]),
+        "tp3": sum(1 for t in closed if t["tp3_hit"]),
+        "stops": sum(1 for t in closed if t["stopped"]),
+        "sum_r": float(sum(t["r"] for t in closed)),
+    }
+
+
+def evaluate_group(symbol: str, structure: Tuple[int, int, int], combos: List[Tuple[int, Dict]]) -> List[Tuple[int, Dict]]:
+    """
+    Run every (index, params) in `combos` - all sharing `structure` - on one symbol.
+    """
+    htf_df, ltf_df = _frames(symbol)
+    if htf_df.empty or ltf_df.empty:
+        return [(i, _stats([])) for i, _ in combos]
+    timeline = engine.bos_timeline(htf_df, *structure)
+    atr_cache: Dict[Tuple, np.ndarray] = {}
+    out = []
+    for i, params in combos:
+        key = (params["atr_period"], params["atr_wilder"])
+        if key not in atr_cache:
+            atr_cache[key] = engine.atr_values(htf_df, *key)
+        trades = engine.simulate(symbol, htf_df, ltf_df, timeline, atr_cache[key], params)
+        out.append((i, _stats(trades)))
+    return out
+
+
+def _rank_table(combos: List[Dict], totals: List[Dict], rank_by: str, min_trades: int) -> pd.DataFrame:
+    rows = []
+    for params, t in zip(combos, totals):
+        closed = t["closed"]
+        rows.append({
+            **params,
+            "trades": t["trades"],
+            "win_rate": t["wins"] / closed if closed else 0.0,
+            "tp1_rate": t["tp1"] / closed if closed else 0.0,
+            "tp2_rate": t["tp2"] / closed if closed else 0.0,
+            "tp3_rate": t["tp3"] / closed if closed else 0.0,
+            "stop_rate": t["stops"] / closed if closed else 0.0,
+            "avg_r": t["sum_r"] / closed if closed else 0.0,
+            "total_r": t["sum_r"],
+        })
+    table = pd.DataFrame(rows)
+    if table.empty:
+        return table
+    table = table[table["trades"] >= min_trades]
+    return table.sort_values(rank_by, ascending=False).reset_index(drop=True)
+
+
+def run_sweep(
+    symbols: List[str],
+    combos: List[Dict],
+    csv_dir: Optional[str] = None,
+    workers: int = 0,
+    rank_by: str = "total_r",
+    min_trades: int = 0,
+) -> Dict:
+    """
+    Evaluate `combos` (partial parameter dicts over engine.default_params())
+    on every symbol. Returns {"table": ranked DataFrame, "seconds", "tasks"}.
+    """
+    base = engine.default_params()
+    combos = [{**base, **c} for c in combos if valid_combo(c, base)]
+    groups: Dict[Tuple, List[Tuple[int, Dict]]] = {}
+    for i, params in enumerate(combos):
+        groups.setdefault(tuple(params[k] for k in STRUCTURE_KEYS), []).append((i, params))
+
+    # Timeframes are the same for every combination; load each symbol once
+    htf, ltf = base["htf"], base["ltf"]
+    blocks: List[shared_memory.SharedMemory] = []
+    specs: Dict[str, Dict] = {}
+    t0 = time.perf_counter()
+    try:
+        for sym in symbols:
+            htf_df, ltf_df = load_htf_ltf(sym, htf, ltf, csv_dir)
+            if htf_df is None or ltf_df is None:
+                print(f"[Sweep] {sym}: no data")
+                continue
+            htf_shm, htf_spec = share_frame(htf_df)
+            blocks.append(htf_shm)
+            ltf_shm, ltf_spec = share_frame(ltf_df)
+            blocks.append(ltf_shm)
+            specs[sym] = {"htf": htf_spec, "ltf": ltf_spec}
+
+        tasks = [(sym, structure, members) for sym in specs for structure, members in groups.items()]
+        totals = [_stats([]) for _ in combos]
+        workers = workers or min(len(tasks), os.cpu_count() or 1) or 1
+        print(f"[Sweep] {len(combos)} combinations x {len(specs)} symbols in {len(tasks)} tasks on {workers} processes")
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(specs,)) as pool:
+            futures = [pool.submit(evaluate_group, *task) for task in tasks]
+            for fut in futures:
+                for i, stats in fut.result():
+                    for k, v in stats.items():
+                        totals[i][k] += v
+    finally:
+        for shm in blocks:
+            shm.close()
+            shm.unlink()
+
+    shown = ["left", "right", "lookback", "r_low", "r_high", "atr_period", "atr_wilder", "stop_buffer", "target"]
+    table = _rank_table([{k: c[k] for k in shown} for c in combos], totals, rank_by, min_trades)
+    return {"table": table, "seconds": time.perf_counter() - t0, "tasks": len(tasks)}
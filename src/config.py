@@ -5,13 +5,25 @@ import os
 # Provider & Timeframes
 # ----------------------------
 
-# Provider: "mt5" (recommended for broker symbols) or "yf" (Yahoo Finance)
+# Provider: "mt5" (recommended for broker symbols), "yf" (Yahoo Finance) or
+# "replay" (stored history served against a simulated clock, no network)
 PROVIDER = os.getenv("PROVIDER", "yf").lower()
 
+# Replay: bars come from REPLAY_DIR/<SYMBOL>_<tf>.csv, or the bar store when empty.
+# The simulated clock starts at REPLAY_START (default: 500 HTF bars into the first
+# symbol's history) and runs REPLAY_SPEED times faster than real time
+REPLAY_DIR = os.getenv("REPLAY_DIR", "").strip()
+REPLAY_START = os.getenv("REPLAY_START", "").strip()
+REPLAY_END = os.getenv("REPLAY_END", "").strip()
+REPLAY_SPEED = float(os.getenv("REPLAY_SPEED", "60"))
+
 # Timeframes
 HTF = os.getenv("HTF", "4h")
 LTF = os.getenv("LTF", "15m")
 
+# Fetch only the LTF and build HTF bars locally by resampling (halves network fetches)
+DERIVE_HTF = os.getenv("DERIVE_HTF", "0").lower() in ("1", "true", "yes")
+
 # ----------------------------
 # Swing detection / ATR
 # ----------------------------
@@ -24,6 +36,8 @@ RETRACEMENT_HIGH = float(os.getenv("RETRACEMENT_HIGH", "0.786"))
 
 ATR_PERIOD = int(os.getenv("ATR_PERIOD", "14"))
 ATR_STOP_BUFFER = float(os.getenv("ATR_STOP_BUFFER", "0.5"))
+# ATR smoothing: "sma" (rolling mean of true range) or "wilder"
+ATR_SMOOTHING = os.getenv("ATR_SMOOTHING", "sma").lower()
 
 # ----------------------------
 # Risk:Reward thresholds
@@ -36,9 +50,54 @@ RR_MIN_STORE = float(os.getenv("RR_MIN_STORE", "3.0"))
 # Scanner / concurrency
 # ----------------------------
 
+# "bar_close": wake at each HTF/LTF bar close (+ settle delay), scanning only symbols
+# whose market is trading; "interval": scan everything every SCAN_INTERVAL_SECONDS
+SCAN_SCHEDULE = os.getenv("SCAN_SCHEDULE", "bar_close").lower()
+SCAN_SETTLE_SECONDS = float(os.getenv("SCAN_SETTLE_SECONDS", "20"))
 SCAN_INTERVAL_SECONDS = int(os.getenv("SCAN_INTERVAL_SECONDS", "300"))
 SCAN_CONCURRENCY = int(os.getenv("SCAN_CONCURRENCY", "8"))
 
+# Provider fetches run on a bounded thread pool so they don't block the event loop
+# (each scan fetches HTF + LTF, hence 2x the scan concurrency by default)
+FETCH_WORKERS = int(os.getenv("FETCH_WORKERS", str(SCAN_CONCURRENCY * 2)))
+FETCH_TIMEOUT_SECONDS = float(os.getenv("FETCH_TIMEOUT_SECONDS", "30"))
+
+# Batched fetching: one grouped download per timeframe per cycle (yf provider)
+BATCH_FETCH = os.getenv("BATCH_FETCH", "1").lower() in ("1", "true", "yes")
+YF_BATCH_SIZE = int(os.getenv("YF_BATCH_SIZE", "200"))
+FETCH_BATCH_TIMEOUT_SECONDS = float(os.getenv("FETCH_BATCH_TIMEOUT_SECONDS", "180"))
+
+# "symbol": evaluate each symbol separately; "panel": evaluate the whole batch in one
+# vectorized (symbols x bars) pass and only process symbols that fired (needs BATCH_FETCH)
+SCAN_MODE = os.getenv("SCAN_MODE", "symbol").lower()
+
+# Yahoo ticker resolution cache (persisted in SQLite): which candidate works / is dead
+YF_RESOLVE_TTL_SECONDS = int(os.getenv("YF_RESOLVE_TTL_SECONDS", str(7 * 86400)))
+YF_NEGATIVE_TTL_SECONDS = int(os.getenv("YF_NEGATIVE_TTL_SECONDS", str(6 * 3600)))
+# Consecutive empty full-period probes before a candidate is cached as dead
+YF_NEGATIVE_AFTER = int(os.getenv("YF_NEGATIVE_AFTER", "3"))
+
+# Incremental bar cache: keep history in memory, fetch only bars since the last cached one
+BAR_CACHE_ENABLED = os.getenv("BAR_CACHE_ENABLED", "1").lower() in ("1", "true", "yes")
+BAR_CACHE_MAX_BARS = int(os.getenv("BAR_CACHE_MAX_BARS", "5000"))
+# Cached history older than this is refetched in full rather than incrementally
+BAR_CACHE_MAX_GAP_DAYS = int(os.getenv("BAR_CACHE_MAX_GAP_DAYS", "30"))
+
+# Persistent bar store (write-through from the cache, read on cold start). Empty disables
+BAR_STORE_DIR = os.getenv("BAR_STORE_DIR", "data/bars").strip()
+
+# Priority lanes: symbols with an armed setup (BOS sent, waiting for pullback) are
+# scanned at LTF cadence with their own concurrency budget; idle symbols at HTF cadence
+PRIORITY_LANES = os.getenv("PRIORITY_LANES", "1").lower() in ("1", "true", "yes")
+FAST_LANE_CONCURRENCY = int(os.getenv("FAST_LANE_CONCURRENCY", "4"))
+FAST_LANE_INTERVAL_SECONDS = int(os.getenv("FAST_LANE_INTERVAL_SECONDS", "60"))  # interval schedule only
+ARMED_MAX_AGE_HOURS = float(os.getenv("ARMED_MAX_AGE_HOURS", "48"))
+
+# On-demand scans requested through the webhook: queue bound (429 when full) and
+# workers serving it (scans still count against SCAN_CONCURRENCY)
+SCAN_QUEUE_SIZE = int(os.getenv("SCAN_QUEUE_SIZE", "100"))
+SCAN_QUEUE_WORKERS = int(os.getenv("SCAN_QUEUE_WORKERS", "4"))
+
 # Heartbeat interval (seconds). 0 disables
 HEARTBEAT_INTERVAL_SECONDS = int(os.getenv("HEARTBEAT_INTERVAL_SECONDS", "3600"))
 
@@ -66,10 +125,35 @@ else:
 TELEGRAM_BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN")  # Must be set in .env or Docker environment
 TELEGRAM_CHAT_ID = os.getenv("TELEGRAM_CHAT_ID")      # Must be set in .env or Docker environment
 
+# Async Telegram dispatcher. Telegram allows ~30 msg/s per bot, 1 msg/s per chat
+# and 20 msg/min per group; 429 responses are retried after their retry_after
+TELEGRAM_GLOBAL_RATE = float(os.getenv("TELEGRAM_GLOBAL_RATE", "30"))
+TELEGRAM_CHAT_RATE = float(os.getenv("TELEGRAM_CHAT_RATE", "1"))
+TELEGRAM_GROUP_RATE = float(os.getenv("TELEGRAM_GROUP_RATE", str(20 / 60)))
+TELEGRAM_SENDERS = int(os.getenv("TELEGRAM_SENDERS", "4"))
+TELEGRAM_MAX_RETRIES = int(os.getenv("TELEGRAM_MAX_RETRIES", "5"))
+TELEGRAM_QUEUE_SIZE = int(os.getenv("TELEGRAM_QUEUE_SIZE", "1000"))
+# Notification outbox: alerts are stored with their signal and delivered by a
+# background sender, retried with exponential backoff (RETRY_SECONDS doubling up to
+# MAX_BACKOFF) until MAX_ATTEMPTS. Claims older than LEASE_SECONDS are retried
+OUTBOX_BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", "50"))
+OUTBOX_POLL_SECONDS = float(os.getenv("OUTBOX_POLL_SECONDS", "5"))
+OUTBOX_LEASE_SECONDS = float(os.getenv("OUTBOX_LEASE_SECONDS", "300"))
+OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "10"))
+OUTBOX_RETRY_SECONDS = float(os.getenv("OUTBOX_RETRY_SECONDS", "30"))
+OUTBOX_MAX_BACKOFF_SECONDS = float(os.getenv("OUTBOX_MAX_BACKOFF_SECONDS", "3600"))
+# Alerts raised within this many seconds are packed into digest messages
+# (entry alerts ahead of BOS notices). 0 sends every alert on its own
+ALERT_DIGEST_WINDOW_SECONDS = float(os.getenv("ALERT_DIGEST_WINDOW_SECONDS", "5"))
+
 TWILIO_ACCOUNT_SID = os.getenv("TWILIO_ACCOUNT_SID", "")
 TWILIO_AUTH_TOKEN = os.getenv("TWILIO_AUTH_TOKEN", "")
 TWILIO_WHATSAPP_FROM = os.getenv("TWILIO_WHATSAPP_FROM", "")
 TWILIO_WHATSAPP_TO = os.getenv("TWILIO_WHATSAPP_TO", "")
+# WhatsApp alerts are sent in the background when the Twilio settings above are present
+WHATSAPP_ENABLED = os.getenv("WHATSAPP_ENABLED", "1").lower() in ("1", "true", "yes")
+WHATSAPP_WORKERS = int(os.getenv("WHATSAPP_WORKERS", "2"))
+WHATSAPP_MAX_RETRIES = int(os.getenv("WHATSAPP_MAX_RETRIES", "3"))
 
 # ----------------------------
 # Persistence & server
@@ -79,6 +163,11 @@ DB_PATH = os.getenv("DB_PATH", "signals.db")
 WEBHOOK_HOST = os.getenv("WEBHOOK_HOST", "0.0.0.0")
 WEBHOOK_PORT = int(os.getenv("WEBHOOK_PORT", "8000"))
 WEBHOOK_SECRET = os.getenv("WEBHOOK_SECRET", "changeme")
+# Per-stage latency histograms and counters served at GET /metrics (Prometheus text format);
+# when off, nothing is recorded and /metrics returns 404
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1").lower() in ("1", "true", "yes")
+# On shutdown, how long the outbox sender may take to finish the batch in flight
+SHUTDOWN_GRACE_SECONDS = float(os.getenv("SHUTDOWN_GRACE_SECONDS", "10"))
 
 # ----------------------------
 # Startup checks (optional but recommended)
@@ -86,3 +175,6 @@ WEBHOOK_SECRET = os.getenv("WEBHOOK_SECRET", "changeme")
 
 if TELEGRAM_BOT_TOKEN is None or TELEGRAM_CHAT_ID is None:
     print("WARNING: Telegram bot token or chat ID not set! Telegram alerts will be skipped.")
+
+if SCAN_MODE == "panel" and not BATCH_FETCH:
+    print("WARNING: SCAN_MODE=panel needs BATCH_FETCH=1; scanning symbol by symbol instead.")
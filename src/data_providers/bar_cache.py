@@ -0,0 +1,73 @@
+# In-memory per-(symbol, timeframe) OHLCV cache so each scan only fetches new bars
+import threading
+from typing import Dict, Optional, Tuple
+import pandas as pd
+from .. import config
+
+
+class BarCache:
+    """
+    Keeps the most recent `max_bars` bars per (symbol, timeframe).
+
+    Providers are asked for bars from last_ts() onwards (inclusive), so the
+    last cached bar - usually still forming - is always re-fetched and
+    replaced by merge(). Each entry also remembers the provider ticker its
+    bars came from (None when the provider has no such notion).
+    """
+
+    def __init__(self, max_bars: int = 5000):
+        self.max_bars = max_bars
+        self._frames: Dict[Tuple[str, str], pd.DataFrame] = {}
+        self._tickers: Dict[Tuple[str, str], Optional[str]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, symbol: str, timeframe: str) -> Optional[pd.DataFrame]:
+        with self._lock:
+            return self._frames.get((symbol, timeframe))
+
+    def last_ts(self, symbol: str, timeframe: str) -> Optional[pd.Timestamp]:
+        df = self.get(symbol, timeframe)
+        if df is None or df.empty:
+            return None
+        return df.index[-1]
+
+    def ticker(self, symbol: str, timeframe: str) -> Optional[str]:
+        with self._lock:
+            return self._tickers.get((symbol, timeframe))
+
+    def put(self, symbol: str, timeframe: str, df: pd.DataFrame, ticker: Optional[str] = None) -> pd.DataFrame:
+        """
+        Replace the cached history (and its source ticker) with `df`.
+        """
+        if self.max_bars > 0 and len(df) > self.max_bars:
+            df = df.iloc[-self.max_bars:]
+        with self._lock:
+            self._frames[(symbol, timeframe)] = df
+            self._tickers[(symbol, timeframe)] = ticker
+        return df
+
+    def merge(self, symbol: str, timeframe: str, new_df: Optional[pd.DataFrame]) -> Optional[pd.DataFrame]:
+        """
+        Merge freshly fetched bars into the cached history and return the result.
+        Cached bars at or after the first new bar are dropped (replaced). The
+        new bars must come from the same ticker as the cached ones.
+        """
+        old = self.get(symbol, timeframe)
+        if new_df is None or new_df.empty:
+            return old
+        if old is None or old.empty:
+            merged = new_df
+        else:
+            if old.index.tz is not None and new_df.index.tz is not None and old.index.tz != new_df.index.tz:
+                new_df = new_df.tz_convert(old.index.tz)
+            merged = pd.concat([old[old.index < new_df.index[0]], new_df])
+        merged = merged[~merged.index.duplicated(keep="last")].sort_index()
+        return self.put(symbol, timeframe, merged, self.ticker(symbol, timeframe))
+
+    def clear(self):
+        with self._lock:
+            self._frames.clear()
+            self._tickers.clear()
+
+
+cache = BarCache(max_bars=config.BAR_CACHE_MAX_BARS)
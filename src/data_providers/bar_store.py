@@ -0,0 +1,196 @@
+# Persistent on-disk OHLCV store: one append-only binary file per (symbol, timeframe)
+#
+# File layout: a 64-byte header (magic, then the index timezone name and the
+# provider ticker the bars came from, NUL-separated) followed by fixed-width
+# little-endian records (ts ns UTC, open, high, low, close, volume).
+# Files are read through np.memmap, so each column is a zero-copy view and
+# loading the tail of a long history doesn't parse the whole file.
+#
+# Other processes (backtests, sweeps) may map a file while the scanner writes
+# it, so append() never shrinks a file in place: records are overwritten or
+# added past the end, and a write that would drop records replaces the file
+# (temp file + rename) instead. A reader's mapping stays valid either way; it
+# may just see the latest forming bar mid-update.
+import os
+import re
+import threading
+from typing import Dict, Optional, Tuple
+import numpy as np
+import pandas as pd
+from .. import config
+
+MAGIC = b"OHLCV01\0"
+HEADER_SIZE = 64
+RECORD_DTYPE = np.dtype([
+    ("ts", "<i8"),
+    ("open", "<f8"),
+    ("high", "<f8"),
+    ("low", "<f8"),
+    ("close", "<f8"),
+    ("volume", "<f8"),
+])
+COLUMNS = {"open": "Open", "high": "High", "low": "Low", "close": "Close", "volume": "Volume"}
+
+_locks: Dict[str, threading.Lock] = {}
+_locks_guard = threading.Lock()
+
+
+def _lock_for(path: str) -> threading.Lock:
+    with _locks_guard:
+        lock = _locks.get(path)
+        if lock is None:
+            lock = _locks[path] = threading.Lock()
+        return lock
+
+
+def enabled() -> bool:
+    return bool(config.BAR_STORE_DIR)
+
+
+def path_for(symbol: str, timeframe: str) -> str:
+    safe = re.sub(r"[^A-Za-z0-9._-]", "_", symbol.strip().upper())
+    return os.path.join(config.BAR_STORE_DIR, timeframe, f"{safe}.bars")
+
+
+def _header(tz_name: str, ticker: Optional[str] = None) -> bytes:
+    fields = tz_name.encode("ascii", "ignore")
+    if ticker:
+        fields += b"\0" + ticker.encode("ascii", "ignore")
+    fields = fields[: HEADER_SIZE - len(MAGIC)]
+    return MAGIC + fields.ljust(HEADER_SIZE - len(MAGIC), b"\0")
+
+
+# (timezone name, ticker); files written before tickers were recorded have none
+def _read_header(path: str) -> Tuple[Optional[str], Optional[str]]:
+    with open(path, "rb") as f:
+        head = f.read(HEADER_SIZE)
+    if len(head) < HEADER_SIZE or not head.startswith(MAGIC):
+        raise ValueError(f"Not a bar store file: {path}")
+    fields = head[len(MAGIC):].rstrip(b"\0").decode("ascii").split("\0")
+    tz_name = fields[0] or None
+    ticker = fields[1] if len(fields) > 1 and fields[1] else None
+    return tz_name, ticker
+
+
+def _records(path: str) -> np.ndarray:
+    """
+    Memory-map all records of a store file (read-only). Empty array if none.
+    """
+    size = os.path.getsize(path) - HEADER_SIZE
+    count = max(0, size // RECORD_DTYPE.itemsize)
+    if count == 0:
+        return np.empty(0, dtype=RECORD_DTYPE)
+    return np.memmap(path, dtype=RECORD_DTYPE, mode="r", offset=HEADER_SIZE, shape=(count,))
+
+
+def _to_frame(recs: np.ndarray, tz_name: Optional[str]) -> pd.DataFrame:
+    index = pd.to_datetime(np.asarray(recs["ts"]), unit="ns", utc=True)
+    index = index.tz_convert(tz_name) if tz_name else index.tz_localize(None)
+    data = {col: np.array(recs[field]) for field, col in COLUMNS.items()}
+    return pd.DataFrame(data, index=index)
+
+
+def _to_records(df: pd.DataFrame) -> np.ndarray:
+    index = pd.DatetimeIndex(df.index)
+    if index.tz is not None:
+        index = index.tz_convert("UTC").tz_localize(None)
+    recs = np.empty(len(df), dtype=RECORD_DTYPE)
+    recs["ts"] = index.as_unit("ns").asi8
+    for field, col in COLUMNS.items():
+        recs[field] = np.asarray(df[col], dtype="f8").reshape(-1)
+    return recs
+
+
+def read(symbol: str, timeframe: str, max_bars: int = 0) -> Optional[pd.DataFrame]:
+    """
+    Load the stored history (only the last `max_bars` bars if > 0).
+    Returns None when nothing is stored.
+    """
+    if not enabled():
+        return None
+    path = path_for(symbol, timeframe)
+    if not os.path.exists(path):
+        return None
+    with _lock_for(path):
+        try:
+            tz_name, _ = _read_header(path)
+            recs = _records(path)
+        except (OSError, ValueError) as e:
+            print(f"[BarStore] Cannot read {path}: {e}")
+            return None
+        if len(recs) == 0:
+            return None
+        if max_bars and max_bars > 0:
+            recs = recs[-max_bars:]
+        return _to_frame(recs, tz_name)
+
+
+def ticker(symbol: str, timeframe: str) -> Optional[str]:
+    """
+    The provider ticker the stored bars came from, or None if unknown.
+    """
+    if not enabled():
+        return None
+    path = path_for(symbol, timeframe)
+    if not os.path.exists(path):
+        return None
+    with _lock_for(path):
+        try:
+            return _read_header(path)[1]
+        except (OSError, ValueError) as e:
+            print(f"[BarStore] Cannot read {path}: {e}")
+            return None
+
+
+def append(symbol: str, timeframe: str, df: Optional[pd.DataFrame], ticker: Optional[str] = None):
+    """
+    Write bars through to disk. Stored bars at or after the first new bar
+    (e.g. the previously forming bar) are replaced by the new ones, so the
+    file stays sorted and free of duplicates. Bars from a different ticker
+    than the stored ones replace the whole file instead.
+    """
+    if not enabled() or df is None or df.empty:
+        return
+    new = _to_records(df)
+    path = path_for(symbol, timeframe)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tz = getattr(df.index, "tz", None)
+    header = _header(str(tz) if tz is not None else "", ticker)
+    with _lock_for(path):
+        try:
+            if not os.path.exists(path) or os.path.getsize(path) < HEADER_SIZE:
+                with open(path, "wb") as f:
+                    f.write(header)
+                    f.write(new.tobytes())
+                return
+
+            if _read_header(path)[1] != ticker:
+                tmp = f"{path}.tmp"
+                with open(tmp, "wb") as f:
+                    f.write(header)
+                    f.write(new.tobytes())
+                os.replace(tmp, path)
+                return
+
+            recs = _records(path)
+            count = len(recs)
+            cut = int(np.searchsorted(recs["ts"], new["ts"][0], side="left")) if count else 0
+            if cut + len(new) >= count:
+                del recs  # release the mapping before writing
+                with open(path, "r+b") as f:
+                    f.seek(HEADER_SIZE + cut * RECORD_DTYPE.itemsize)
+                    f.write(new.tobytes())
+                return
+
+            # Fewer records than before: write a new file and swap it in
+            with open(path, "rb") as f:
+                header = f.read(HEADER_SIZE)
+            tmp = f"{path}.tmp"
+            with open(tmp, "wb") as f:
+                f.write(header)
+                f.write(np.asarray(recs[:cut]).tobytes())
+                f.write(new.tobytes())
+            del recs
+            os.replace(tmp, path)
+        except (OSError, ValueError) as e:
+            print(f"[BarStore] Cannot write {path}: {e}")
@@ -0,0 +1,322 @@
+# Concurrent fetch stage: runs the blocking provider calls on a bounded thread pool
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, List, Dict, Tuple
+import pandas as pd
+from .. import config, markets, metrics, scheduler
+from . import bar_cache, bar_store, resample
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+# The MetaTrader5 package talks to a single terminal over IPC and is not safe
+# to call from several threads at once, so MT5 fetches are serialized.
+_mt5_lock = threading.Lock()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=max(1, config.FETCH_WORKERS),
+                thread_name_prefix="fetch",
+            )
+        return _executor
+
+
+# Bar count for count-based providers (MT5, replay): 500 HTF bars' worth of LTF
+# history when the HTF is derived from it
+def _bar_count(timeframe: str) -> int:
+    if config.DERIVE_HTF and timeframe == config.LTF:
+        ratio = markets.timeframe_seconds(config.HTF) // markets.timeframe_seconds(config.LTF)
+        return 500 * max(1, ratio)
+    return 500
+
+
+# (frame, ticker it came from); only yf maps a symbol to one of several tickers
+def _provider_fetch(
+    symbol: str, timeframe: str, since: Optional[pd.Timestamp] = None, probe: bool = True, ticker: Optional[str] = None
+) -> Tuple[Optional[pd.DataFrame], Optional[str]]:
+    if config.PROVIDER == "mt5":
+        from . import mt5_provider
+        with _mt5_lock:
+            return mt5_provider.fetch_ohlcv(symbol, timeframe, count=_bar_count(timeframe), since=since), None
+
+    if config.PROVIDER == "replay":
+        from . import replay_provider
+        return replay_provider.fetch_ohlcv(symbol, timeframe, count=_bar_count(timeframe), since=since), None
+
+    from . import yf_provider
+    start = since.to_pydatetime() if since is not None else None
+    return yf_provider.fetch_ohlcv_from(symbol, timeframe, start=start, probe=probe, ticker=ticker)
+
+
+# A replay reads its history from the bar store, so it must not seed from or write to it
+def _store_enabled() -> bool:
+    return bar_store.enabled() and config.PROVIDER != "replay"
+
+
+# yf serves a symbol from the first of several candidate tickers, each a
+# different price series: cached bars may only be extended from the ticker they
+# came from, and once the symbol resolves to another one it is fetched in full
+def _same_ticker(symbol: str, timeframe: str) -> bool:
+    if config.PROVIDER in ("mt5", "replay"):
+        return True
+    from . import yf_provider
+    cands = yf_provider.resolved_candidates(symbol)
+    return bool(cands) and bar_cache.cache.ticker(symbol, timeframe) == cands[0]
+
+
+# Timestamp to fetch incrementally from, or None when a full fetch is needed
+def _since(symbol: str, timeframe: str) -> Optional[pd.Timestamp]:
+    if not config.BAR_CACHE_ENABLED:
+        return None
+    last = bar_cache.cache.last_ts(symbol, timeframe)
+    if last is None and _store_enabled():
+        # Warm start: seed the memory cache from the on-disk store
+        stored = bar_store.read(symbol, timeframe, max_bars=config.BAR_CACHE_MAX_BARS)
+        if stored is not None:
+            bar_cache.cache.put(symbol, timeframe, stored, bar_store.ticker(symbol, timeframe))
+            last = stored.index[-1]
+    if last is None or not _same_ticker(symbol, timeframe):
+        return None
+    now = pd.Timestamp(scheduler.now_utc())
+    now = now.tz_convert(last.tz) if last.tz is not None else now.tz_localize(None)
+    if now - last > pd.Timedelta(days=config.BAR_CACHE_MAX_GAP_DAYS):
+        return None
+    return last
+
+
+def _cache_result(
+    symbol: str, timeframe: str, since: Optional[pd.Timestamp], df: Optional[pd.DataFrame], ticker: Optional[str] = None
+) -> Optional[pd.DataFrame]:
+    if df is not None and not df.empty and _store_enabled():
+        bar_store.append(symbol, timeframe, df, ticker)
+    if not config.BAR_CACHE_ENABLED:
+        return df
+    if since is None:
+        if df is None or df.empty:
+            return None
+        return bar_cache.cache.put(symbol, timeframe, df, ticker)
+    # Incremental: an empty response means no new bars, keep serving the cached history
+    return bar_cache.cache.merge(symbol, timeframe, df)
+
+
+def fetch_ohlcv(symbol: str, timeframe: str, probe: bool = True) -> Optional[pd.DataFrame]:
+    """
+    Blocking fetch through the configured provider. With BAR_CACHE_ENABLED only
+    bars since the last cached one are requested and merged into the cache.
+    probe=False keeps an empty yf result from counting towards marking the
+    ticker dead (used for retries after a grouped download).
+    """
+    since = _since(symbol, timeframe)
+    if config.BAR_CACHE_ENABLED:
+        metrics.bar_cache_total.inc("hit" if since is not None else "miss")
+    ticker = bar_cache.cache.ticker(symbol, timeframe) if since is not None else None
+    t0 = time.perf_counter()
+    try:
+        df, ticker = _provider_fetch(symbol, timeframe, since=since, probe=probe, ticker=ticker)
+    except Exception:
+        metrics.fetches_total.inc(config.PROVIDER, "single", "error")
+        raise
+    finally:
+        metrics.fetch_seconds.observe(time.perf_counter() - t0, config.PROVIDER, "single", timeframe)
+    metrics.fetches_total.inc(config.PROVIDER, "single", "ok" if df is not None and not df.empty else "empty")
+    return _cache_result(symbol, timeframe, since, df, ticker)
+
+
+# A replay reads local history against the simulated clock: a wall-clock timeout
+# would only drop scans depending on host load and make runs differ
+def _wall_timeout(timeout: Optional[float], default: float) -> Optional[float]:
+    if config.PROVIDER == "replay":
+        return None
+    return default if timeout is None else timeout
+
+
+async def fetch_ohlcv_async(symbol: str, timeframe: str, timeout: Optional[float] = None, probe: bool = True) -> Optional[pd.DataFrame]:
+    """
+    Run fetch_ohlcv on the fetch pool without blocking the event loop.
+    Raises asyncio.TimeoutError if the fetch takes longer than `timeout`
+    (FETCH_TIMEOUT_SECONDS by default). The worker thread is not interrupted;
+    its result is simply discarded.
+    """
+    timeout = _wall_timeout(timeout, config.FETCH_TIMEOUT_SECONDS)
+    loop = asyncio.get_running_loop()
+    fut = loop.run_in_executor(_get_executor(), fetch_ohlcv, symbol, timeframe, probe)
+    if timeout and timeout > 0:
+        return await asyncio.wait_for(fut, timeout)
+    return await fut
+
+
+def _fetch_one(symbol: str, timeframe: str, probe: bool = True) -> Optional[pd.DataFrame]:
+    try:
+        return fetch_ohlcv(symbol, timeframe, probe)
+    except Exception as e:
+        print(f"[Fetcher] Error fetching {symbol} {timeframe}: {e}")
+        return None
+
+
+def _since_bucket(since: pd.Timestamp) -> pd.Timestamp:
+    ts = since.tz_convert("UTC").tz_localize(None) if since.tz is not None else since
+    return ts.floor("D")
+
+
+def _fetch_grouped(symbols: List[str], timeframe: str) -> Tuple[Dict[str, Optional[pd.DataFrame]], List[str]]:
+    """
+    Grouped yf downloads only. Returns ({symbol: frame}, symbols the grouped
+    calls returned nothing for), the latter still needing a per-symbol fetch.
+    Cached symbols are grouped by the UTC day of their last bar and each group
+    is fetched from the oldest last bar in it, each symbol from the ticker its
+    cached bars came from.
+    """
+    from . import yf_provider
+    since_map = {sym: _since(sym, timeframe) for sym in symbols}
+    cold = [sym for sym in symbols if since_map[sym] is None]
+    warm = [sym for sym in symbols if since_map[sym] is not None]
+    tickers = {sym: bar_cache.cache.ticker(sym, timeframe) for sym in warm}
+    for sym in cold:
+        cands = yf_provider.resolved_candidates(sym)
+        if cands:
+            tickers[sym] = cands[0]
+
+    if config.BAR_CACHE_ENABLED:
+        metrics.bar_cache_total.inc("hit", amount=len(warm))
+        metrics.bar_cache_total.inc("miss", amount=len(cold))
+
+    groups = []
+    if cold:
+        groups.append((cold, None))
+    # One download per day of last cached bar, so one stale symbol doesn't
+    # drag every other warm symbol's request back with it
+    buckets: Dict[pd.Timestamp, List[str]] = {}
+    for sym in warm:
+        buckets.setdefault(_since_bucket(since_map[sym]), []).append(sym)
+    for _, group in sorted(buckets.items()):
+        groups.append((group, min(since_map[sym] for sym in group).to_pydatetime()))
+
+    out: Dict[str, Optional[pd.DataFrame]] = {}
+    missing: List[str] = []
+    for group, start in groups:
+        frames = _timed_batch(group, timeframe, start=start, tickers=tickers)
+        for sym in group:
+            df = frames.get(sym)
+            if df is None:
+                missing.append(sym)
+            else:
+                out[sym] = _cache_result(sym, timeframe, since_map[sym], df, tickers.get(sym))
+    return out, missing
+
+
+def fetch_batch(symbols: List[str], timeframe: str) -> Dict[str, Optional[pd.DataFrame]]:
+    """
+    Blocking fetch of many symbols for one timeframe. Uses grouped downloads
+    where the provider supports them, otherwise one fetch per symbol.
+    """
+    if config.PROVIDER in ("mt5", "replay"):
+        return {sym: _fetch_one(sym, timeframe) for sym in symbols}
+
+    out, missing = _fetch_grouped(symbols, timeframe)
+    for sym in missing:
+        out[sym] = _fetch_one(sym, timeframe, probe=False)
+    return out
+
+
+def _timed_batch(
+    symbols: List[str], timeframe: str, start=None, tickers: Optional[Dict[str, str]] = None
+) -> Dict[str, Optional[pd.DataFrame]]:
+    from . import yf_provider
+    with metrics.fetch_seconds.time("yf", "batch", timeframe):
+        try:
+            frames = yf_provider.fetch_ohlcv_batch(symbols, timeframe, start=start, fallback=False, tickers=tickers)
+        except Exception:
+            metrics.fetches_total.inc("yf", "batch", "error", amount=len(symbols))
+            raise
+    ok = sum(1 for sym in symbols if frames.get(sym) is not None and not frames[sym].empty)
+    metrics.fetches_total.inc("yf", "batch", "ok", amount=ok)
+    metrics.fetches_total.inc("yf", "batch", "empty", amount=len(symbols) - ok)
+    return frames
+
+
+async def _fetch_one_async(symbol: str, timeframe: str, probe: bool = True) -> Optional[pd.DataFrame]:
+    try:
+        return await fetch_ohlcv_async(symbol, timeframe, probe=probe)
+    except asyncio.TimeoutError:
+        print(f"[Fetcher] Timed out fetching {symbol} {timeframe} after {config.FETCH_TIMEOUT_SECONDS}s")
+    except Exception as e:
+        print(f"[Fetcher] Error fetching {symbol} {timeframe}: {e}")
+    return None
+
+
+async def fetch_batch_async(symbols: List[str], timeframe: str, timeout: Optional[float] = None) -> Dict[str, Optional[pd.DataFrame]]:
+    """
+    Non-blocking fetch_batch. The grouped downloads run as one pool task bounded
+    by FETCH_BATCH_TIMEOUT_SECONDS; symbols they miss are then fetched as
+    separate pool tasks, each under FETCH_TIMEOUT_SECONDS, so a few bad
+    symbols can't cost the results that already arrived. A replay fetches
+    each symbol as its own pool task, without any timeout.
+    """
+    timeout = _wall_timeout(timeout, config.FETCH_BATCH_TIMEOUT_SECONDS)
+    loop = asyncio.get_running_loop()
+    symbols = list(symbols)
+    if config.PROVIDER == "replay":
+        frames = await asyncio.gather(*[_fetch_one_async(sym, timeframe) for sym in symbols])
+        return dict(zip(symbols, frames))
+    if config.PROVIDER == "mt5":
+        fut = loop.run_in_executor(_get_executor(), fetch_batch, symbols, timeframe)
+        if timeout and timeout > 0:
+            return await asyncio.wait_for(fut, timeout)
+        return await fut
+
+    fut = loop.run_in_executor(_get_executor(), _fetch_grouped, symbols, timeframe)
+    if timeout and timeout > 0:
+        out, missing = await asyncio.wait_for(fut, timeout)
+    else:
+        out, missing = await fut
+    if missing:
+        frames = await asyncio.gather(*[_fetch_one_async(sym, timeframe, probe=False) for sym in missing])
+        out.update(zip(missing, frames))
+    return out
+
+
+def _derive_htf(symbol: str, ltf_df: Optional[pd.DataFrame]) -> Optional[pd.DataFrame]:
+    return resample.resample_ohlcv(ltf_df, config.HTF, symbol)
+
+
+async def fetch_htf_ltf_async(symbol: str) -> Tuple[Optional[pd.DataFrame], Optional[pd.DataFrame]]:
+    """
+    (HTF, LTF) frames for one symbol. With DERIVE_HTF only the LTF is fetched
+    and the HTF frame is resampled from it.
+    """
+    if config.DERIVE_HTF:
+        ltf_df = await fetch_ohlcv_async(symbol, config.LTF)
+        return _derive_htf(symbol, ltf_df), ltf_df
+    htf_df, ltf_df = await asyncio.gather(
+        fetch_ohlcv_async(symbol, config.HTF),
+        fetch_ohlcv_async(symbol, config.LTF),
+    )
+    return htf_df, ltf_df
+
+
+async def fetch_htf_ltf_batch_async(symbols: List[str]) -> Tuple[Dict[str, Optional[pd.DataFrame]], Dict[str, Optional[pd.DataFrame]]]:
+    """
+    Batched counterpart of fetch_htf_ltf_async: ({symbol: HTF}, {symbol: LTF}).
+    """
+    if config.DERIVE_HTF:
+        ltf_map = await fetch_batch_async(symbols, config.LTF)
+        return {s: _derive_htf(s, df) for s, df in ltf_map.items()}, ltf_map
+    htf_map, ltf_map = await asyncio.gather(
+        fetch_batch_async(symbols, config.HTF),
+        fetch_batch_async(symbols, config.LTF),
+    )
+    return htf_map, ltf_map
+
+
+def shutdown():
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
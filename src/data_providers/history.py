@@ -0,0 +1,53 @@
+# Offline OHLCV history for backtests and replays: bar store files or CSV exports
+import os
+import re
+from typing import Optional
+import pandas as pd
+from . import bar_store, resample
+
+OHLCV = ["Open", "High", "Low", "Close", "Volume"]
+
+
+def csv_path(csv_dir: str, symbol: str, timeframe: str) -> str:
+    safe = re.sub(r"[^A-Za-z0-9._-]", "_", symbol.strip().upper())
+    return os.path.join(csv_dir, f"{safe}_{timeframe}.csv")
+
+
+def read_csv(path: str) -> Optional[pd.DataFrame]:
+    """
+    CSV with a timestamp first column and Open/High/Low/Close[/Volume] columns
+    (any capitalisation). Returns a sorted, de-duplicated frame or None.
+    """
+    if not os.path.exists(path):
+        return None
+    df = pd.read_csv(path, index_col=0, parse_dates=[0])
+    df.columns = [str(c).strip().capitalize() for c in df.columns]
+    if "Volume" not in df.columns:
+        df["Volume"] = 0.0
+    missing = [c for c in OHLCV if c not in df.columns]
+    if missing:
+        raise ValueError(f"{path}: missing columns {missing}")
+    df = df[OHLCV].astype(float)
+    df = df[~df.index.duplicated(keep="last")].sort_index()
+    return df if not df.empty else None
+
+
+def load_bars(symbol: str, timeframe: str, csv_dir: Optional[str] = None) -> Optional[pd.DataFrame]:
+    """
+    Full stored history of `symbol` on `timeframe`: <csv_dir>/<SYMBOL>_<tf>.csv
+    when csv_dir is given, else the bar store.
+    """
+    if csv_dir:
+        return read_csv(csv_path(csv_dir, symbol, timeframe))
+    return bar_store.read(symbol, timeframe)
+
+
+def load_htf_ltf(symbol: str, htf: str, ltf: str, csv_dir: Optional[str] = None):
+    """
+    (htf_df, ltf_df). The HTF is resampled from the LTF when it isn't stored.
+    """
+    ltf_df = load_bars(symbol, ltf, csv_dir)
+    htf_df = load_bars(symbol, htf, csv_dir)
+    if htf_df is None and ltf_df is not None:
+        htf_df = resample.resample_ohlcv(ltf_df, htf, symbol)
+    return htf_df, ltf_df
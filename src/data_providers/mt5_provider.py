@@ -1,6 +1,7 @@
 # MetaTrader5 provider (live). Requires MetaTrader5 terminal installed on host.
 import MetaTrader5 as mt5
 import pandas as pd
+from datetime import datetime, timezone
 from typing import Optional, List
 
 TIMEFRAME_MAP = {
@@ -15,11 +16,22 @@ def initialize(mt5_path: str = None) -> bool:
         return mt5.initialize(path=mt5_path)
     return mt5.initialize()
 
-def fetch_ohlcv(symbol: str, timeframe: str, count: int = 500) -> Optional[pd.DataFrame]:
+def fetch_ohlcv(symbol: str, timeframe: str, count: int = 500, since: Optional[datetime] = None) -> Optional[pd.DataFrame]:
+    """
+    since: optional datetime; when given, only bars from `since` (inclusive)
+    up to now are copied instead of the last `count` bars.
+    """
     tf = TIMEFRAME_MAP.get(timeframe)
     if tf is None:
         raise ValueError("Unsupported timeframe for MT5")
-    rates = mt5.copy_rates_from_pos(symbol, tf, 0, count)
+    if since is not None:
+        # Bar times come back as naive UTC; MT5 expects tz-aware datetimes
+        since = pd.Timestamp(since).to_pydatetime()
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        rates = mt5.copy_rates_range(symbol, tf, since, datetime.now(timezone.utc))
+    else:
+        rates = mt5.copy_rates_from_pos(symbol, tf, 0, count)
     if rates is None or len(rates) == 0:
         return None
     df = pd.DataFrame(rates)
@@ -0,0 +1,85 @@
+# Replay provider (offline). Serves stored history (REPLAY_DIR CSVs or the bar store)
+# as it would have looked at the simulated clock's current time.
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional, Tuple
+import pandas as pd
+from .. import config, markets, scheduler
+from . import history, resample
+
+# Bars returned by a full fetch (the MT5 window), and HTF bars of history before the default start
+WARMUP_BARS = 500
+
+_frames: Dict[Tuple[str, str], Optional[pd.DataFrame]] = {}
+_frames_lock = threading.Lock()
+
+
+def _history(symbol: str, timeframe: str) -> Optional[pd.DataFrame]:
+    key = (symbol.strip().upper(), timeframe)
+    with _frames_lock:
+        if key in _frames:
+            return _frames[key]
+    df = history.load_bars(symbol, timeframe, config.REPLAY_DIR or None)
+    if df is None and timeframe == config.HTF:
+        # Only the LTF is stored: build the HTF the same way DERIVE_HTF does
+        ltf_df = history.load_bars(symbol, config.LTF, config.REPLAY_DIR or None)
+        df = resample.resample_ohlcv(ltf_df, timeframe, symbol)
+    with _frames_lock:
+        _frames[key] = df
+    return df
+
+
+def _utc(text: str) -> datetime:
+    ts = pd.Timestamp(text)
+    ts = ts.tz_localize("UTC") if ts.tz is None else ts.tz_convert("UTC")
+    return ts.to_pydatetime()
+
+
+def _default_start() -> Optional[datetime]:
+    for symbol in config.SYMBOLS:
+        df = _history(symbol, config.HTF)
+        if df is not None and len(df):
+            first = df.index[min(len(df) - 1, WARMUP_BARS)]
+            return _utc(str(first))
+    return None
+
+
+def initialize() -> bool:
+    """
+    Install the simulated clock. Must run inside the event loop that scans.
+    """
+    start = _utc(config.REPLAY_START) if config.REPLAY_START else _default_start()
+    if start is None:
+        print("[Replay] No stored history for the configured symbols")
+        return False
+    end = _utc(config.REPLAY_END) if config.REPLAY_END else None
+    scheduler.clock = scheduler.SimClock(start, speed=config.REPLAY_SPEED, end=end)
+    print(f"[Replay] Clock starts at {start.strftime('%Y-%m-%d %H:%M')} UTC, {config.REPLAY_SPEED:g}x speed")
+    return True
+
+
+def fetch_ohlcv(symbol: str, timeframe: str, count: int = WARMUP_BARS, since: Optional[pd.Timestamp] = None) -> Optional[pd.DataFrame]:
+    """
+    Bars closed by the simulated now: from `since` (inclusive) when given,
+    else the last `count` of them.
+    """
+    df = _history(symbol, timeframe)
+    if df is None:
+        return None
+    now = pd.Timestamp(scheduler.now_utc())
+    # Bars are labelled by their open time; the last one served has closed
+    cutoff = now - timedelta(seconds=markets.timeframe_seconds(timeframe))
+    idx = df.index
+    cutoff = cutoff.tz_convert(idx.tz) if idx.tz is not None else cutoff.tz_convert(timezone.utc).tz_localize(None)
+    end = int(idx.searchsorted(cutoff, side="right"))
+    if since is not None:
+        since = pd.Timestamp(since)
+        if idx.tz is not None:
+            since = since.tz_localize("UTC") if since.tz is None else since
+            since = since.tz_convert(idx.tz)
+        elif since.tz is not None:
+            since = since.tz_convert("UTC").tz_localize(None)
+        return df.iloc[int(idx.searchsorted(since, side="left")):end]
+    if end == 0:
+        return None
+    return df.iloc[max(0, end - count):end]
@@ -0,0 +1,45 @@
+# Build higher-timeframe OHLCV bars locally from lower-timeframe bars
+from datetime import time
+from typing import Optional
+import pandas as pd
+from .. import markets
+
+AGG = {"Open": "first", "High": "max", "Low": "min", "Close": "last", "Volume": "sum"}
+
+
+def bar_starts(index: pd.DatetimeIndex, step: int, tz_name: str, anchor: time) -> pd.DatetimeIndex:
+    """
+    UTC start of the `step`-second bar each timestamp falls in, on the grid of
+    markets.bar_grid: bars start at `anchor` local time every day in `tz_name`,
+    so the grid follows DST instead of drifting an hour from where the data
+    began. Naive timestamps are taken as UTC.
+    """
+    utc = index.tz_localize("UTC") if index.tz is None else index.tz_convert("UTC")
+    wall = utc.tz_convert(tz_name).tz_localize(None)
+    offset = pd.Timedelta(hours=anchor.hour, minutes=anchor.minute)
+    day_start = ((wall - offset).normalize() + offset).tz_localize(tz_name).tz_convert("UTC")
+    elapsed = (utc - day_start).total_seconds().to_numpy()
+    return day_start + pd.to_timedelta(elapsed // step * step, unit="s")
+
+
+def resample_ohlcv(df: Optional[pd.DataFrame], timeframe: str, symbol: str) -> Optional[pd.DataFrame]:
+    """
+    Aggregate `df` into `timeframe` bars aligned the way the market's own bars are
+    (markets.bar_grid, the grid the scheduler wakes on): session markets (US/EU
+    cash) are anchored at the session open in the exchange timezone (e.g. 4h
+    stock bars start 09:30 and 13:30 ET), around-the-clock markets at midnight
+    in the timezone Yahoo indexes them in (e.g. Europe/London for FX).
+    Bins without any source bar are dropped; the last bin may still be forming.
+    The result keeps the index timezone of `df`.
+    """
+    if df is None or df.empty:
+        return None
+    tz_name, anchor = markets.bar_grid(markets.market_for_symbol(symbol))
+    starts = bar_starts(pd.DatetimeIndex(df.index), markets.timeframe_seconds(timeframe), tz_name, anchor)
+    orig_tz = df.index.tz
+    starts = starts.tz_localize(None) if orig_tz is None else starts.tz_convert(orig_tz)
+
+    out = df[list(AGG)].groupby(starts).agg(AGG)
+    out.index.name = df.index.name
+    out = out.dropna(subset=["Open"])
+    return out if not out.empty else None
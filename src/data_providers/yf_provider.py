@@ -1,9 +1,10 @@
 # Yahoo Finance provider with robust symbol mapping and fallback attempts
 import yfinance as yf
 import pandas as pd
-from typing import Optional, List
-from .. import config
+from typing import Optional, List, Dict, Tuple
+from .. import config, db
 import os
+import threading
 import time
 
 
@@ -65,6 +66,82 @@ def candidates_for_symbol(sym: str) -> List[str]:
     return [key]
 
 
+# ----------------------------
+# TICKER RESOLUTION CACHE
+# ----------------------------
+# symbol -> {ticker: (ok, checked_at)}; mirrored in the ticker_resolution table
+_resolution: Dict[str, Dict[str, Tuple[bool, float]]] = {}
+_resolution_loaded = False
+_resolution_lock = threading.Lock()
+# (symbol, ticker) -> consecutive empty full-period probes (in memory only)
+_failures: Dict[Tuple[str, str], int] = {}
+
+
+def _load_resolutions():
+    global _resolution_loaded
+    if _resolution_loaded:
+        return
+    try:
+        rows = db.load_ticker_resolutions()
+    except Exception as e:
+        print(f"yfinance: could not load ticker resolution cache: {e}")
+        rows = []
+    for r in rows:
+        _resolution.setdefault(r["symbol"], {})[r["ticker"]] = (bool(r["ok"]), float(r["checked_at"]))
+    _resolution_loaded = True
+
+
+def _is_fresh(ok: bool, checked_at: float, now: float) -> bool:
+    ttl = config.YF_RESOLVE_TTL_SECONDS if ok else config.YF_NEGATIVE_TTL_SECONDS
+    return now - checked_at < ttl
+
+
+def resolved_candidates(sym: str) -> List[str]:
+    """
+    candidates_for_symbol() reordered by the resolution cache: the ticker
+    known to work comes first, tickers known to be dead are left out.
+    Empty when every candidate is (freshly) known to be dead.
+    """
+    cands = candidates_for_symbol(sym)
+    if not cands:
+        return []
+    now = time.time()
+    with _resolution_lock:
+        _load_resolutions()
+        known = {t: v for t, v in _resolution.get(sym, {}).items() if _is_fresh(v[0], v[1], now)}
+    good = [c for c in cands if c in known and known[c][0]]
+    rest = [c for c in cands if c not in known]
+    return good + rest
+
+
+def _record_resolution(sym: str, ticker: str, ok: bool):
+    now = time.time()
+    with _resolution_lock:
+        _load_resolutions()
+        _failures.pop((sym, ticker), None)
+        prev = _resolution.get(sym, {}).get(ticker)
+        if prev is not None and prev[0] == ok and _is_fresh(prev[0], prev[1], now):
+            return
+        _resolution.setdefault(sym, {})[ticker] = (ok, now)
+    try:
+        db.save_ticker_resolution(sym, ticker, ok, now)
+    except Exception as e:
+        print(f"yfinance: could not persist resolution {sym} -> {ticker}: {e}")
+
+
+def _record_failure(sym: str, ticker: str):
+    """
+    Count an empty full-period probe; only YF_NEGATIVE_AFTER of them in a row
+    (no success in between) mark the ticker dead, so a throttled request or
+    two doesn't blacklist a valid ticker.
+    """
+    with _resolution_lock:
+        n = _failures.get((sym, ticker), 0) + 1
+        _failures[(sym, ticker)] = n
+    if n >= max(1, config.YF_NEGATIVE_AFTER):
+        _record_resolution(sym, ticker, False)
+
+
 INTERVAL_MAP = {
     "4h": "4h",
     "2h": "2h",
@@ -73,13 +150,39 @@ INTERVAL_MAP = {
 }
 
 
+# Either a rolling period or, for incremental updates, an explicit start
+def _range_kwargs(period: str, start) -> dict:
+    if start is not None:
+        return {"start": start}
+    return {"period": period}
+
+
 # Try to download a dataframe for the first viable candidate ticker
-def fetch_ohlcv(symbol: str, timeframe: str, period: str = "45d") -> Optional[pd.DataFrame]:
+def fetch_ohlcv(symbol: str, timeframe: str, period: str = "45d", start=None, probe: bool = True) -> Optional[pd.DataFrame]:
+    """
+    start: optional datetime; when given, only bars from `start` (inclusive)
+    onwards are requested instead of the whole `period`.
+    probe: count an empty result towards caching the candidate as dead. Only
+    full-period requests count; an incremental one is often empty legitimately.
+    """
+    return fetch_ohlcv_from(symbol, timeframe, period=period, start=start, probe=probe)[0]
+
+
+def fetch_ohlcv_from(
+    symbol: str, timeframe: str, period: str = "45d", start=None, probe: bool = True, ticker: Optional[str] = None
+) -> Tuple[Optional[pd.DataFrame], Optional[str]]:
+    """
+    fetch_ohlcv that also returns the ticker the bars came from.
+    ticker: query only this ticker instead of walking the candidates. An
+    incremental update must extend cached bars from the ticker they came
+    from: another candidate's prices are a different series.
+    """
     interval = INTERVAL_MAP.get(timeframe, timeframe)
-    cand_list = candidates_for_symbol(symbol)
+    cand_list = [ticker] if ticker else resolved_candidates(symbol)
 
+    # No candidates, or all of them recently found dead: don't probe again
     if not cand_list:
-        return None
+        return None, None
 
     last_err = None
 
@@ -88,16 +191,19 @@ def fetch_ohlcv(symbol: str, timeframe: str, period: str = "45d") -> Optional[pd
             for _ in range(2):
                 df = yf.download(
                     cand,
-                    period=period,
                     interval=interval,
-                    progress=False
+                    progress=False,
+                    **_range_kwargs(period, start)
                 )
                 if df is not None and not df.empty:
                     if isinstance(df.index, pd.DatetimeIndex):
                         df = df[["Open", "High", "Low", "Close", "Volume"]].copy()
                         df.index = pd.to_datetime(df.index)
-                        return df
+                        _record_resolution(symbol, cand, True)
+                        return df, cand
                 time.sleep(0.5)
+            if probe and start is None:
+                _record_failure(symbol, cand)
             last_err = f"No data for candidate {cand}"
         except Exception as e:
             last_err = repr(e)
@@ -107,7 +213,94 @@ def fetch_ohlcv(symbol: str, timeframe: str, period: str = "45d") -> Optional[pd
         f"yfinance: no price data for symbol '{symbol}' "
         f"using candidates {cand_list}. Last error: {last_err}"
     )
-    return None
+    return None, None
+
+
+OHLCV_COLUMNS = ["Open", "High", "Low", "Close", "Volume"]
+
+
+# Pull a single ticker's frame out of a grouped (group_by="ticker") download
+def _extract_ticker_frame(raw: Optional[pd.DataFrame], ticker: str) -> Optional[pd.DataFrame]:
+    if raw is None or raw.empty or not isinstance(raw.index, pd.DatetimeIndex):
+        return None
+    if isinstance(raw.columns, pd.MultiIndex):
+        if ticker not in raw.columns.get_level_values(0):
+            return None
+        df = raw[ticker]
+    else:
+        df = raw
+    if any(c not in df.columns for c in OHLCV_COLUMNS):
+        return None
+    # Grouped downloads share one index across tickers; drop rows this ticker has no bars for
+    df = df[OHLCV_COLUMNS].dropna(how="all")
+    if df.empty:
+        return None
+    df = df.copy()
+    df.index = pd.to_datetime(df.index)
+    return df
+
+
+def fetch_ohlcv_batch(
+    symbols: List[str], timeframe: str, period: str = "45d", start=None, fallback: bool = True,
+    tickers: Optional[Dict[str, str]] = None,
+) -> Dict[str, Optional[pd.DataFrame]]:
+    """
+    Download all symbols for one timeframe with grouped yf.download calls
+    (YF_BATCH_SIZE tickers per request), using each symbol's first candidate
+    or, if given, its ticker from `tickers`.
+    With `fallback`, symbols that come back empty are retried one by one with
+    fetch_ohlcv, which walks the full candidate list (without marking anything
+    dead) unless the symbol's ticker was given; without it they are left as
+    None for the caller to retry.
+    """
+    interval = INTERVAL_MAP.get(timeframe, timeframe)
+    results: Dict[str, Optional[pd.DataFrame]] = {}
+    tickers = tickers or {}
+
+    # ticker -> symbols mapped to it (e.g. US500 and SPY may share a ticker)
+    primary: Dict[str, List[str]] = {}
+    for sym in symbols:
+        cands = [tickers[sym]] if tickers.get(sym) else resolved_candidates(sym)
+        if cands:
+            primary.setdefault(cands[0], []).append(sym)
+        else:
+            results[sym] = None
+
+    tickers = list(primary)
+    size = max(1, config.YF_BATCH_SIZE)
+    for i in range(0, len(tickers), size):
+        chunk = tickers[i:i + size]
+        try:
+            raw = yf.download(
+                chunk,
+                interval=interval,
+                group_by="ticker",
+                threads=True,
+                progress=False,
+                **_range_kwargs(period, start)
+            )
+        except Exception as e:
+            print(f"yfinance: batch download failed for {len(chunk)} tickers: {e!r}")
+            raw = None
+        for ticker in chunk:
+            df = _extract_ticker_frame(raw, ticker)
+            for sym in primary[ticker]:
+                results[sym] = df
+                if df is not None:
+                    _record_resolution(sym, ticker, True)
+
+    if not fallback:
+        return results
+
+    # Per-symbol fallback only for what the grouped calls didn't return
+    for syms in primary.values():
+        for sym in syms:
+            if results.get(sym) is None:
+                results[sym] = fetch_ohlcv_from(
+                    sym, timeframe, period=period, start=start, probe=False, ticker=tickers.get(sym)
+                )[0]
+
+    return results
 
 
 def list_symbols() -> List[str]:
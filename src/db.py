@@ -1,5 +1,8 @@
-# SQLite persistence layer: signals and symbol table (no admin endpoints in system)
+# SQLite persistence layer: signals, notification outbox and symbol table (no admin endpoints in system)
 import sqlite3
+import threading
+import time
+from contextlib import contextmanager
 from typing import Optional, Dict, List
 from . import config
 
@@ -35,103 +38,349 @@ CREATE TABLE IF NOT EXISTS symbols (
     enabled INTEGER DEFAULT 1,
     created_at TEXT DEFAULT CURRENT_TIMESTAMP
 );
+""",
+"""
+CREATE TABLE IF NOT EXISTS ticker_resolution (
+    symbol TEXT NOT NULL,
+    ticker TEXT NOT NULL,
+    ok INTEGER NOT NULL,
+    checked_at REAL NOT NULL,
+    PRIMARY KEY(symbol, ticker)
+);
+""",
+"""
+CREATE TABLE IF NOT EXISTS outbox (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    symbol TEXT NOT NULL,
+    bos_ts TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    channel TEXT NOT NULL,
+    priority INTEGER DEFAULT 1,
+    body TEXT NOT NULL,
+    status TEXT DEFAULT 'pending',
+    attempts INTEGER DEFAULT 0,
+    last_error TEXT,
+    next_attempt_at REAL DEFAULT 0,
+    claimed_at REAL,
+    sent_at REAL,
+    created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE(symbol, bos_ts, kind, channel)
+);
+""",
+"""
+CREATE INDEX IF NOT EXISTS outbox_ready ON outbox (status, next_attempt_at);
 """
 ]
 
-def get_conn():
-    conn = sqlite3.connect(DB, check_same_thread=False)
+_conn: Optional[sqlite3.Connection] = None
+# One long-lived connection shared by the scanner loop, fetch threads and the
+# webhook; sqlite3 connections are not safe for concurrent use, so every
+# statement runs under this lock.
+_lock = threading.RLock()
+
+PRAGMAS = [
+    "PRAGMA journal_mode=WAL",      # readers don't block the writer; commits append to the WAL
+    "PRAGMA synchronous=NORMAL",    # fsync at checkpoints only (safe with WAL)
+    "PRAGMA cache_size=-16000",     # ~16 MB page cache
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA busy_timeout=5000",     # other processes (scripts) wait instead of failing
+]
+
+def _connect() -> sqlite3.Connection:
+    # cached_statements: compiled statements are reused across calls (prepared statement cache)
+    conn = sqlite3.connect(DB, check_same_thread=False, cached_statements=256)
     conn.row_factory = sqlite3.Row
+    for pragma in PRAGMAS:
+        conn.execute(pragma)
     return conn
 
+def get_conn() -> sqlite3.Connection:
+    global _conn
+    with _lock:
+        if _conn is None:
+            _conn = _connect()
+        return _conn
+
+@contextmanager
+def _cursor(commit: bool = False):
+    """
+    Cursor on the shared connection, holding the lock for the whole block.
+    commit=True commits on success and rolls back on error.
+    """
+    with _lock:
+        conn = get_conn()
+        cur = conn.cursor()
+        try:
+            yield cur
+            if commit:
+                conn.commit()
+        except Exception:
+            if commit:
+                conn.rollback()
+            raise
+        finally:
+            cur.close()
+
+def close_db():
+    global _conn
+    with _lock:
+        if _conn is not None:
+            _conn.close()
+            _conn = None
+
 def init_db():
-    conn = get_conn()
-    cur = conn.cursor()
-    for stmt in CREATE_STATEMENTS:
-        cur.execute(stmt)
-    conn.commit()
-    conn.close()
+    with _cursor(commit=True) as cur:
+        for stmt in CREATE_STATEMENTS:
+            cur.execute(stmt)
 
 # Signals helpers
 def insert_signal(signal: dict) -> bool:
-    conn = get_conn(); cur = conn.cursor()
     try:
-        cur.execute(
-            """INSERT INTO signals (symbol,bos_ts,direction,entry,stop,tp1,tp2,tp3,atr,pulled_back)
-               VALUES (?,?,?,?,?,?,?,?,?,?)""",
-            (
-                signal["symbol"], signal["bos_ts"], signal["direction"],
-                signal.get("entry"), signal.get("stop"), signal.get("tp1"), signal.get("tp2"), signal.get("tp3"),
-                signal.get("atr", 0.0), int(signal.get("pulled_back", 0))
+        with _cursor(commit=True) as cur:
+            cur.execute(
+                """INSERT INTO signals (symbol,bos_ts,direction,entry,stop,tp1,tp2,tp3,atr,pulled_back)
+                   VALUES (?,?,?,?,?,?,?,?,?,?)""",
+                (
+                    signal["symbol"], signal["bos_ts"], signal["direction"],
+                    signal.get("entry"), signal.get("stop"), signal.get("tp1"), signal.get("tp2"), signal.get("tp3"),
+                    signal.get("atr", 0.0), int(signal.get("pulled_back", 0))
+                )
             )
-        )
-        conn.commit()
         return True
     except sqlite3.IntegrityError:
         return False
-    finally:
-        conn.close()
+
+def upsert_signal(signal: dict, alerts: Optional[List[Dict]] = None) -> Dict:
+    """
+    Insert the signal, or for an existing (symbol, bos_ts) raise pulled_back if
+    this observation pulled back, and return the row's current state
+    (id, pulled_back, notified_*). Needs SQLite >= 3.35 for RETURNING.
+
+    alerts: outbox rows to queue in the same transaction, dicts with kind
+    ("bos" / "market"), channel, body and optional priority. Each channel is
+    deduplicated on its own: an alert is queued at most once per
+    (symbol, bos_ts, kind, channel), whatever happened on other channels.
+    Once the alert has been delivered on any channel (notified_<kind>), no
+    further rows are queued for it.
+    """
+    with _cursor(commit=True) as cur:
+        return _upsert(cur, signal, alerts)
+
+def _upsert(cur: sqlite3.Cursor, signal: dict, alerts: Optional[List[Dict]]) -> Dict:
+    cur.execute(
+        """INSERT INTO signals (symbol,bos_ts,direction,entry,stop,tp1,tp2,tp3,atr,pulled_back)
+           VALUES (?,?,?,?,?,?,?,?,?,?)
+           ON CONFLICT(symbol, bos_ts) DO UPDATE SET pulled_back=MAX(pulled_back, excluded.pulled_back)
+           RETURNING id, symbol, bos_ts, pulled_back, notified_bos, notified_market,
+                     notified_telegram, notified_whatsapp""",
+        (
+            signal["symbol"], signal["bos_ts"], signal["direction"],
+            signal.get("entry"), signal.get("stop"), signal.get("tp1"), signal.get("tp2"), signal.get("tp3"),
+            signal.get("atr", 0.0), int(signal.get("pulled_back", 0))
+        )
+    )
+    record = dict(cur.fetchone())
+    rows = [
+        (signal["symbol"], signal["bos_ts"], a["kind"], a["channel"], int(a.get("priority", 1)), a["body"])
+        for a in alerts or []
+        if not record.get(f"notified_{a['kind']}", 0)
+    ]
+    if rows:
+        cur.executemany(
+            """INSERT INTO outbox (symbol, bos_ts, kind, channel, priority, body)
+               VALUES (?,?,?,?,?,?)
+               ON CONFLICT(symbol, bos_ts, kind, channel) DO NOTHING""",
+            rows
+        )
+    return record
 
 def get_signal(symbol: str, bos_ts: str) -> Optional[Dict]:
-    conn = get_conn(); cur = conn.cursor()
-    cur.execute("SELECT * FROM signals WHERE symbol=? AND bos_ts=?", (symbol, bos_ts))
-    row = cur.fetchone(); conn.close()
+    with _cursor() as cur:
+        cur.execute("SELECT * FROM signals WHERE symbol=? AND bos_ts=?", (symbol, bos_ts))
+        row = cur.fetchone()
     return dict(row) if row else None
 
 def mark_bos_sent(symbol: str, bos_ts: str):
-    conn = get_conn(); cur = conn.cursor()
-    cur.execute("UPDATE signals SET notified_bos=1 WHERE symbol=? AND bos_ts=?", (symbol, bos_ts))
-    conn.commit(); conn.close()
+    with _cursor(commit=True) as cur:
+        cur.execute("UPDATE signals SET notified_bos=1 WHERE symbol=? AND bos_ts=?", (symbol, bos_ts))
 
 def mark_market_sent(symbol: str, bos_ts: str):
-    conn = get_conn(); cur = conn.cursor()
-    cur.execute("UPDATE signals SET notified_market=1 WHERE symbol=? AND bos_ts=?", (symbol, bos_ts))
-    conn.commit(); conn.close()
+    with _cursor(commit=True) as cur:
+        cur.execute("UPDATE signals SET notified_market=1 WHERE symbol=? AND bos_ts=?", (symbol, bos_ts))
 
 def mark_notified_channel(symbol: str, bos_ts: str, channel: str):
-    conn = get_conn(); cur = conn.cursor()
     col = "notified_telegram" if channel == "telegram" else "notified_whatsapp"
-    cur.execute(f"UPDATE signals SET {col}=1 WHERE symbol=? AND bos_ts=?", (symbol, bos_ts))
-    conn.commit(); conn.close()
+    with _cursor(commit=True) as cur:
+        cur.execute(f"UPDATE signals SET {col}=1 WHERE symbol=? AND bos_ts=?", (symbol, bos_ts))
 
 def update_pulled_back(symbol: str, bos_ts: str, pulled: int):
-    conn = get_conn(); cur = conn.cursor()
-    cur.execute("UPDATE signals SET pulled_back=? WHERE symbol=? AND bos_ts=?", (int(pulled), symbol, bos_ts))
-    conn.commit(); conn.close()
+    with _cursor(commit=True) as cur:
+        cur.execute("UPDATE signals SET pulled_back=? WHERE symbol=? AND bos_ts=?", (int(pulled), symbol, bos_ts))
+
+class SignalBatch:
+    """
+    Collects signal upserts (with their outbox alerts), flag updates
+    (mark_*_sent, pulled_back) and outbox status changes and writes them in
+    a single transaction on flush(): upserts first, in the order queued.
+    """
+
+    def __init__(self):
+        self._upserts: List[tuple] = []
+        self._ops: Dict[str, List[tuple]] = {}
+        self._guard = threading.Lock()
+
+    def _add(self, sql: str, params: tuple):
+        with self._guard:
+            self._ops.setdefault(sql, []).append(params)
+
+    def upsert_signal(self, signal: dict, alerts: Optional[List[Dict]] = None):
+        """
+        Queue upsert_signal(signal, alerts) for the next flush().
+        """
+        with self._guard:
+            self._upserts.append((signal, alerts))
+
+    def mark_bos_sent(self, symbol: str, bos_ts: str):
+        self._add("UPDATE signals SET notified_bos=1 WHERE symbol=? AND bos_ts=?", (symbol, bos_ts))
+
+    def mark_market_sent(self, symbol: str, bos_ts: str):
+        self._add("UPDATE signals SET notified_market=1 WHERE symbol=? AND bos_ts=?", (symbol, bos_ts))
+
+    def mark_notified_channel(self, symbol: str, bos_ts: str, channel: str):
+        col = "notified_telegram" if channel == "telegram" else "notified_whatsapp"
+        self._add(f"UPDATE signals SET {col}=1 WHERE symbol=? AND bos_ts=?", (symbol, bos_ts))
+
+    def update_pulled_back(self, symbol: str, bos_ts: str, pulled: int):
+        self._add("UPDATE signals SET pulled_back=? WHERE symbol=? AND bos_ts=?", (int(pulled), symbol, bos_ts))
+
+    def outbox_sent(self, outbox_id: int, sent_at: float):
+        self._add("UPDATE outbox SET status='sent', sent_at=?, last_error=NULL WHERE id=?", (sent_at, outbox_id))
+
+    def outbox_retry(self, outbox_id: int, next_attempt_at: float, error: str):
+        self._add(
+            "UPDATE outbox SET status='pending', claimed_at=NULL, next_attempt_at=?, last_error=? WHERE id=?",
+            (next_attempt_at, error, outbox_id)
+        )
+
+    def outbox_failed(self, outbox_id: int, error: str):
+        self._add("UPDATE outbox SET status='failed', last_error=? WHERE id=?", (error, outbox_id))
+
+    def __len__(self) -> int:
+        with self._guard:
+            return len(self._upserts) + sum(len(v) for v in self._ops.values())
+
+    def flush(self) -> int:
+        """
+        Commit everything queued so far in one transaction; returns the number
+        of upserts and updates.
+        """
+        with self._guard:
+            upserts, self._upserts = self._upserts, []
+            ops, self._ops = self._ops, {}
+        if not upserts and not ops:
+            return 0
+        with _cursor(commit=True) as cur:
+            for signal, alerts in upserts:
+                _upsert(cur, signal, alerts)
+            for sql, rows in ops.items():
+                cur.executemany(sql, rows)
+        return len(upserts) + sum(len(v) for v in ops.values())
+
+def list_armed_symbols(max_age_hours: float = 48.0) -> List[str]:
+    """
+    Symbols with a recent BOS that has not pulled back / sent its market alert yet.
+    """
+    with _cursor() as cur:
+        cur.execute(
+            """SELECT DISTINCT symbol FROM signals
+               WHERE pulled_back=0 AND notified_market=0 AND created_at >= datetime('now', ?)""",
+            (f"-{float(max_age_hours)} hours",)
+        )
+        rows = cur.fetchall()
+    return [r["symbol"] for r in rows]
+
+# Notification outbox
+def claim_outbox(limit: int, lease_seconds: float, now: Optional[float] = None) -> List[Dict]:
+    """
+    Atomically claim up to `limit` due outbox rows (status -> 'sending',
+    attempts + 1), highest priority first. Rows claimed longer than
+    `lease_seconds` ago whose sender never reported back are claimed again.
+    """
+    now = time.time() if now is None else now
+    with _cursor(commit=True) as cur:
+        cur.execute(
+            """UPDATE outbox SET status='sending', claimed_at=?, attempts=attempts+1
+               WHERE id IN (
+                   SELECT id FROM outbox
+                   WHERE (status='pending' AND next_attempt_at<=?)
+                      OR (status='sending' AND claimed_at<?)
+                   ORDER BY priority, id LIMIT ?
+               )
+               RETURNING id, symbol, bos_ts, kind, channel, priority, body, attempts""",
+            (now, now, now - lease_seconds, int(limit))
+        )
+        rows = cur.fetchall()
+    return sorted((dict(r) for r in rows), key=lambda r: (r["priority"], r["id"]))
+
+def release_outbox_claims() -> int:
+    """
+    Put rows left in 'sending' (e.g. by a crash) back to pending. Only safe
+    while no sender is running.
+    """
+    with _cursor(commit=True) as cur:
+        cur.execute("UPDATE outbox SET status='pending', claimed_at=NULL WHERE status='sending'")
+        return cur.rowcount
+
+def outbox_counts() -> Dict[str, int]:
+    with _cursor() as cur:
+        cur.execute("SELECT status, COUNT(*) AS c FROM outbox GROUP BY status")
+        rows = cur.fetchall()
+    return {r["status"]: r["c"] for r in rows}
 
 # Symbol table helpers
 def list_symbols(enabled_only: bool = True) -> List[str]:
-    conn = get_conn(); cur = conn.cursor()
-    if enabled_only:
-        cur.execute("SELECT symbol FROM symbols WHERE enabled=1 ORDER BY symbol")
-    else:
-        cur.execute("SELECT symbol FROM symbols ORDER BY symbol")
-    rows = cur.fetchall(); conn.close()
+    with _cursor() as cur:
+        if enabled_only:
+            cur.execute("SELECT symbol FROM symbols WHERE enabled=1 ORDER BY symbol")
+        else:
+            cur.execute("SELECT symbol FROM symbols ORDER BY symbol")
+        rows = cur.fetchall()
     return [r["symbol"] for r in rows]
 
 def add_symbol(symbol: str, source: str = "auto") -> bool:
-    conn = get_conn(); cur = conn.cursor()
     try:
-        cur.execute("INSERT OR IGNORE INTO symbols (symbol, source, enabled) VALUES (?,?,1)", (symbol, source))
-        conn.commit()
+        with _cursor(commit=True) as cur:
+            cur.execute("INSERT OR IGNORE INTO symbols (symbol, source, enabled) VALUES (?,?,1)", (symbol, source))
         return True
     except Exception:
         return False
-    finally:
-        conn.close()
+
+# Provider ticker resolution cache (yf candidate -> works / dead)
+def load_ticker_resolutions() -> List[Dict]:
+    with _cursor() as cur:
+        cur.execute("SELECT symbol, ticker, ok, checked_at FROM ticker_resolution")
+        rows = cur.fetchall()
+    return [dict(r) for r in rows]
+
+def save_ticker_resolution(symbol: str, ticker: str, ok: bool, checked_at: float):
+    with _cursor(commit=True) as cur:
+        cur.execute(
+            "INSERT OR REPLACE INTO ticker_resolution (symbol, ticker, ok, checked_at) VALUES (?,?,?,?)",
+            (symbol, ticker, int(ok), checked_at)
+        )
 
 # New: simple stats helper for heartbeat
 def get_stats(min_rr_alert: float = 0.0) -> dict:
-    conn = get_conn(); cur = conn.cursor()
-    # total signals
-    cur.execute("SELECT COUNT(*) as c FROM signals")
-    total = cur.fetchone()["c"]
-    # signals which are notified_market
-    cur.execute("SELECT COUNT(*) as c FROM signals WHERE notified_market=1")
-    market_sent = cur.fetchone()["c"]
-    # count signals with tp2/rr >= min_rr_alert - we store rr in tp2 relative positions not explicitly,
-    # but rr is stored in 'tp2' relative to entry? (legacy) -> We'll check using tp2 and stop if both set.
-    # For safety, we will treat any signal with tp2 and stop as candidate for alert; more precise rr calc can be added later.
-    cur.execute("SELECT COUNT(*) as c FROM signals WHERE tp2 IS NOT NULL AND stop IS NOT NULL")
-    candidates = cur.fetchone()["c"]
-    conn.close()
+    with _cursor() as cur:
+        # total signals
+        cur.execute("SELECT COUNT(*) as c FROM signals")
+        total = cur.fetchone()["c"]
+        # signals which are notified_market
+        cur.execute("SELECT COUNT(*) as c FROM signals WHERE notified_market=1")
+        market_sent = cur.fetchone()["c"]
+        # count signals with tp2/rr >= min_rr_alert - we store rr in tp2 relative positions not explicitly,
+        # but rr is stored in 'tp2' relative to entry? (legacy) -> We'll check using tp2 and stop if both set.
+        # For safety, we will treat any signal with tp2 and stop as candidate for alert; more precise rr calc can be added later.
+        cur.execute("SELECT COUNT(*) as c FROM signals WHERE tp2 IS NOT NULL AND stop IS NOT NULL")
+        candidates = cur.fetchone()["c"]
     return {"total_signals": total, "market_sent": market_sent, "candidates": candidates}
\ No newline at end of file
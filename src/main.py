@@ -1,10 +1,17 @@
-# Entrypoint: initializes DB, optionally MT5 initialization, and launches webhook + scanner
+# Entrypoint: initializes DB, optionally MT5 or the replay clock, and runs webhook + scanner on one event loop
 import asyncio
-from . import config
-from .db import init_db
+import contextlib
+import signal
+from . import config, scheduler
+from .db import init_db, close_db
 import uvicorn
 from .webhook import webhook
-from .scanner_worker import periodic_scanner_loop
+from .scanner_worker import periodic_scanner_loop, scan_queue
+from .notifier.outbox import sender as outbox_sender
+from .notifier.telegram_dispatcher import dispatcher
+from .notifier.digest import digest
+from .notifier import twilio_whatsapp
+from .data_providers import fetcher
 
 def maybe_init_mt5():
     if config.PROVIDER == "mt5":
@@ -18,22 +25,110 @@ def maybe_init_mt5():
         except Exception as e:
             print("[main] MT5 initialize/import failed:", e)
 
-def start_webhook():
-    uvicorn.run("src.webhook.webhook:app", host=config.WEBHOOK_HOST, port=config.WEBHOOK_PORT, log_level="info")
+def maybe_init_replay() -> bool:
+    if config.PROVIDER != "replay":
+        return True
+    from .data_providers import replay_provider
+    return replay_provider.initialize()
+
+class _Server(uvicorn.Server):
+    """
+    uvicorn.Server that leaves SIGINT/SIGTERM to serve(): uvicorn re-raises
+    the signal it caught once it stops serving, which would kill the process
+    before shutdown() runs.
+    """
+
+    @contextlib.contextmanager
+    def capture_signals(self):
+        yield
+
+def _handle_exit_signals(server):
+    def request_exit(*_):
+        # A second signal skips waiting for open connections, as in uvicorn
+        if server.should_exit:
+            server.force_exit = True
+        server.should_exit = True
+
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, request_exit)
+        except NotImplementedError:
+            # No loop signal handlers on Windows
+            signal.signal(sig, request_exit)
+
+async def _stop_at_replay_end(server):
+    await scheduler.clock.finished.wait()
+    server.should_exit = True
+
+def _report_exit(task: asyncio.Task):
+    if not task.cancelled() and task.exception() is not None:
+        print(f"[main] {task.get_name()} stopped with error: {task.exception()!r}")
+
+async def _cancel(tasks):
+    for t in tasks:
+        t.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+async def shutdown(scanner_tasks, sender_task):
+    """
+    Stop producers first (periodic lanes, webhook scan queue), let the outbox
+    sender record the batch in flight, then close notifiers, fetch pool and DB.
+    """
+    print("[main] Stopping scanner...")
+    await _cancel(scanner_tasks)
+
+    outbox_sender.stop()
+    try:
+        await asyncio.wait_for(sender_task, timeout=config.SHUTDOWN_GRACE_SECONDS)
+    except asyncio.TimeoutError:
+        print("[main] Outbox sender did not finish in time; unsent alerts stay queued")
+    except Exception:
+        pass
+
+    await digest.close()
+    await dispatcher.close()
+    await twilio_whatsapp.channel.close()
+    fetcher.shutdown()
+    close_db()
+    print("[main] Shutdown complete")
+
+async def serve():
+    """
+    Webhook server and scanner tasks on the same loop, so webhook scans share the
+    scanner's semaphore, caches and HTTP sessions. SIGINT/SIGTERM stop the
+    server, then shutdown() runs. A replay also stops once its clock passes
+    REPLAY_END.
+    """
+    if not maybe_init_replay():
+        return
+    scanner_tasks = [
+        asyncio.create_task(periodic_scanner_loop(), name="scanner"),
+        asyncio.create_task(scan_queue.run(), name="scan-queue"),
+    ]
+    sender_task = asyncio.create_task(outbox_sender.run(), name="outbox-sender")
+    for t in scanner_tasks + [sender_task]:
+        t.add_done_callback(_report_exit)
+
+    server = _Server(uvicorn.Config(
+        webhook.app, host=config.WEBHOOK_HOST, port=config.WEBHOOK_PORT, log_level="info"
+    ))
+    _handle_exit_signals(server)
+    if scheduler.clock is not None:
+        scanner_tasks.append(asyncio.create_task(_stop_at_replay_end(server), name="replay-end"))
+    try:
+        await server.serve()
+    finally:
+        await shutdown(scanner_tasks, sender_task)
 
 def main():
     print("[main] Initializing DB...")
     init_db()
     maybe_init_mt5()
-    loop = asyncio.get_event_loop()
     try:
-        loop.create_task(periodic_scanner_loop())
-        loop.run_in_executor(None, start_webhook)
-        loop.run_forever()
+        asyncio.run(serve())
     except KeyboardInterrupt:
         print("Shutdown requested")
-    finally:
-        loop.close()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,123 @@
+# Market calendar helpers: timeframe parsing, symbol -> market class, session hours
+import re
+from datetime import datetime, time
+from typing import Optional, Tuple
+from zoneinfo import ZoneInfo
+from . import config
+
+_TF_RE = re.compile(r"^\s*(\d+)\s*(m|min|h|d|w)\s*$", re.IGNORECASE)
+_TF_UNIT_SECONDS = {"m": 60, "min": 60, "h": 3600, "d": 86400, "w": 604800}
+
+
+def timeframe_seconds(timeframe: str) -> int:
+    """
+    "15m" -> 900, "4h" -> 14400, "1d" -> 86400.
+    """
+    m = _TF_RE.match(timeframe)
+    if not m:
+        raise ValueError(f"Unsupported timeframe: {timeframe}")
+    return int(m.group(1)) * _TF_UNIT_SECONDS[m.group(2).lower()]
+
+
+# ----------------------------
+# Market classes
+# ----------------------------
+FX = "fx"                # Sun evening - Fri evening, ~24h (also spot metals)
+CRYPTO = "crypto"        # 24/7
+FUTURES = "futures"      # CME-style Globex hours, ~23h with a daily break
+US_EQUITY = "us_equity"  # NYSE/Nasdaq regular session (stocks, ETFs, cash indices)
+EU_INDEX = "eu_index"    # Xetra regular session
+
+US_INDEX_SYMBOLS = {"NAS100", "US30", "US500", "SPY", "QQQ", "DIA", "^GSPC", "^DJI", "^IXIC"}
+EU_INDEX_SYMBOLS = {"GER40", "^GDAXI"}
+FUTURES_SYMBOLS = {"USOIL", "UKOIL"}
+CRYPTO_BASES = {"BTC", "ETH", "SOL", "XRP", "LTC", "BCH", "ADA", "DOGE"}
+
+# Regular sessions as (timezone, open, close); markets not listed trade around the clock
+SESSIONS = {
+    US_EQUITY: ("America/New_York", time(9, 30), time(16, 0)),
+    EU_INDEX: ("Europe/Berlin", time(9, 0), time(17, 30)),
+}
+
+
+def market_for_symbol(symbol: str, provider: Optional[str] = None) -> str:
+    s = symbol.strip().upper().replace(" ", "")
+    provider = (provider or config.PROVIDER).lower()
+
+    if s.endswith("-USD") or s.endswith("-USDT") or (len(s) in (6, 7) and s[:3] in CRYPTO_BASES):
+        return CRYPTO
+    # Broker index CFDs trade Globex hours; Yahoo serves the cash index / ETF session
+    if s in US_INDEX_SYMBOLS:
+        return FUTURES if provider == "mt5" else US_EQUITY
+    if s in EU_INDEX_SYMBOLS:
+        return FUTURES if provider == "mt5" else EU_INDEX
+    if s in FUTURES_SYMBOLS or s.endswith("=F"):
+        return FUTURES
+    if s.endswith("=X") or (len(s) == 6 and s.isalpha()):
+        return FX
+    if s.isalpha() and len(s) <= 5:
+        return US_EQUITY
+    return FX
+
+
+def session_for_symbol(symbol: str, provider: Optional[str] = None) -> Optional[Tuple[str, time, time]]:
+    """
+    (timezone, open, close) of the symbol's regular session, or None for
+    markets that trade around the clock.
+    """
+    return SESSIONS.get(market_for_symbol(symbol, provider))
+
+
+# Around-the-clock markets: the timezone whose midnight anchors their bars, as
+# Yahoo indexes them (FX in London time, CME futures in New York time)
+GRID_TZ = {FX: "Europe/London", FUTURES: "America/New_York", CRYPTO: "UTC"}
+
+
+def bar_grid(market: str, provider: Optional[str] = None) -> Tuple[str, time]:
+    """
+    (timezone, local time) bars of `market` are anchored at: each local day
+    the first bar starts at that time and the next ones follow every
+    timeframe, the last one ending at the next day's anchor. Session markets
+    start at the session open, the others at midnight (UTC for MT5, whose
+    bar times are UTC).
+    """
+    if market in SESSIONS:
+        tz_name, open_t, _ = SESSIONS[market]
+        return tz_name, open_t
+    if (provider or config.PROVIDER).lower() == "mt5":
+        return "UTC", time(0)
+    return GRID_TZ.get(market, "UTC"), time(0)
+
+
+# ----------------------------
+# Trading hours
+# ----------------------------
+NY_TZ = ZoneInfo("America/New_York")
+WEEK_ROLL = time(17, 0)       # FX / Globex weekly close (Fri) and FX weekly open (Sun), NY time
+GLOBEX_REOPEN = time(18, 0)   # Globex daily maintenance break is 17:00-18:00 NY
+
+
+def is_open(market: str, when: datetime) -> bool:
+    """
+    Whether `market` is trading at `when` (tz-aware). Exchange holidays are ignored.
+    """
+    if market == CRYPTO:
+        return True
+
+    if market in SESSIONS:
+        tz_name, open_t, close_t = SESSIONS[market]
+        local = when.astimezone(ZoneInfo(tz_name))
+        return local.weekday() < 5 and open_t <= local.time() < close_t
+
+    ny = when.astimezone(NY_TZ)
+    wd, t = ny.weekday(), ny.time()
+    if wd == 5 or (wd == 4 and t >= WEEK_ROLL):
+        return False
+    if market == FUTURES:
+        if wd == 6:
+            return t >= GLOBEX_REOPEN
+        return not (WEEK_ROLL <= t < GLOBEX_REOPEN)
+    # FX
+    if wd == 6:
+        return t >= WEEK_ROLL
+    return True
@@ -0,0 +1,216 @@
+# In-process metrics (counters, gauges, latency histograms) rendered in the Prometheus text format
+#
+# Recording is a dict lookup, a bisect and a few additions under a per-metric
+# lock (fetches run on worker threads), so it is cheap enough for the scan
+# loop. Everything is aggregated in memory and only formatted on scrape.
+# With METRICS_ENABLED off, recording returns immediately.
+import abc
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+from . import config
+
+# Seconds; covers SQLite writes (~50us) up to batch downloads (minutes)
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 180.0)
+
+_registry: List["_Metric"] = []
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", r"\\").replace("\n", r"\n").replace('"', r"\"")
+
+
+def _fmt(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class _Metric(abc.ABC):
+    kind = ""
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def _label_str(self, values: Tuple, extra: str = "") -> str:
+        pairs = [f'{k}="{_escape(v)}"' for k, v in zip(self.labels, values)]
+        if extra:
+            pairs.append(extra)
+        return "{" + ",".join(pairs) + "}" if pairs else ""
+
+    @abc.abstractmethod
+    def _samples(self) -> List[str]:
+        """
+        Sample lines (without HELP/TYPE) in the exposition format.
+        """
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"] + self._samples()
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        super().__init__(name, help, labels)
+        self._values: Dict[Tuple, float] = {}
+
+    def inc(self, *values, amount: float = 1.0):
+        if not config.METRICS_ENABLED:
+            return
+        with self._lock:
+            self._values[values] = self._values.get(values, 0.0) + amount
+
+    def get(self, *values) -> float:
+        with self._lock:
+            return self._values.get(values, 0.0)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{self._label_str(k)} {_fmt(v)}" for k, v in items]
+
+
+class Gauge(_Metric):
+    """
+    Set explicitly, or read from `fn` at scrape time (unlabelled only).
+    """
+
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = (), fn: Optional[Callable[[], float]] = None):
+        super().__init__(name, help, labels)
+        self._values: Dict[Tuple, float] = {}
+        self._fn = fn
+
+    def set(self, value: float, *values):
+        if not config.METRICS_ENABLED:
+            return
+        with self._lock:
+            self._values[values] = float(value)
+
+    def set_function(self, fn: Callable[[], float]):
+        self._fn = fn
+
+    def _samples(self) -> List[str]:
+        if self._fn is not None:
+            try:
+                return [f"{self.name} {_fmt(self._fn())}"]
+            except Exception:
+                return []
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{self._label_str(k)} {_fmt(v)}" for k, v in items]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [per-bucket counts (+Inf last), sum, count]
+        self._series: Dict[Tuple, list] = {}
+
+    def observe(self, value: float, *values):
+        if not config.METRICS_ENABLED:
+            return
+        i = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(values)
+            if series is None:
+                series = self._series[values] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][i] += 1
+            series[1] += value
+            series[2] += 1
+
+    @contextmanager
+    def time(self, *values):
+        """
+        Observe the duration of the block (also when it raises).
+        """
+        if not config.METRICS_ENABLED:
+            yield
+            return
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - t0, *values)
+
+    def count(self, *values) -> int:
+        with self._lock:
+            series = self._series.get(values)
+            return series[2] if series else 0
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = sorted((k, ([*v[0]], v[1], v[2])) for k, v in self._series.items())
+        lines = []
+        for k, (counts, total, n) in items:
+            cumulative = 0
+            for bound, c in zip(self.buckets + (float("inf"),), counts):
+                cumulative += c
+                le = 'le="%s"' % _fmt(bound)
+                lines.append(f"{self.name}_bucket{self._label_str(k, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{self._label_str(k)} {_fmt(total)}")
+            lines.append(f"{self.name}_count{self._label_str(k)} {n}")
+        return lines
+
+
+def render() -> str:
+    """
+    All registered metrics in the Prometheus text exposition format (0.0.4).
+    """
+    lines = []
+    for metric in _registry:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+# ----------------------------
+# Scanner metrics
+# ----------------------------
+stage_seconds = Histogram(
+    "scanner_stage_seconds", "Time spent per pipeline stage (fetch, fetch_batch, detect, panel, db)", ["stage"]
+)
+fetch_seconds = Histogram(
+    "scanner_fetch_seconds", "Provider request latency (mode: single symbol or grouped batch)",
+    ["provider", "mode", "timeframe"]
+)
+fetches_total = Counter(
+    "scanner_fetches_total", "Provider fetches per symbol by result (ok, empty, error)", ["provider", "mode", "result"]
+)
+bar_cache_total = Counter(
+    "scanner_bar_cache_total", "Fetches served incrementally from the bar cache (hit) or in full (miss)", ["result"]
+)
+cycle_seconds = Histogram(
+    "scanner_cycle_seconds", "Duration of one scan cycle", ["lane"]
+)
+cycle_overruns_total = Counter(
+    "scanner_cycle_overruns_total", "Scan cycles that ran past the next scheduled wake", ["lane"]
+)
+symbols_scanned_total = Counter(
+    "scanner_symbols_scanned_total", "Symbols scanned by the periodic lanes", ["lane"]
+)
+alerts_total = Counter(
+    "scanner_alerts_total", "Outbox alert deliveries by result (sent, retry, failed)", ["channel", "result"]
+)
+notify_seconds = Histogram(
+    "scanner_notify_seconds", "Time from claiming an outbox alert to its delivery outcome", ["channel"]
+)
+telegram_requests_total = Counter(
+    "scanner_telegram_requests_total", "Telegram sendMessage calls by HTTP status (or 'error')", ["status"]
+)
+telegram_request_seconds = Histogram(
+    "scanner_telegram_request_seconds", "Telegram sendMessage request latency"
+)
+scan_queue_depth = Gauge(
+    "scanner_scan_queue_depth", "Webhook scan requests waiting in the queue"
+)
@@ -0,0 +1,135 @@
+# Alert coalescing: collect alerts for a short window and pack them into as few Telegram messages as possible
+import asyncio
+import re
+from typing import List, Optional, Tuple
+from .. import config
+from .telegram_dispatcher import TelegramDispatcher, dispatcher as default_dispatcher
+
+# Telegram rejects messages longer than this
+MAX_MESSAGE_CHARS = 4096
+SEPARATOR = "\n\n➖➖➖➖➖\n\n"
+
+# Entry (pullback) alerts always go out before BOS notices
+PRIORITY_ENTRY = 0
+PRIORITY_BOS = 1
+
+
+_TAG = re.compile(r"<(/?)([a-zA-Z][a-zA-Z0-9-]*)[^>]*>")
+
+
+def truncate_html(text: str, limit: int) -> str:
+    """
+    Shorten Telegram HTML to at most `limit` characters without cutting a tag
+    or entity in half; tags left open are closed after the ellipsis.
+    """
+    if len(text) <= limit:
+        return text
+    cut = limit - 1
+    while cut > 0:
+        head = text[:cut]
+        lt, amp = head.rfind("<"), head.rfind("&")
+        if lt > head.rfind(">"):
+            cut = lt
+            continue
+        if amp > head.rfind(";"):
+            cut = amp
+            continue
+        open_tags: List[str] = []
+        for m in _TAG.finditer(head):
+            name = m.group(2).lower()
+            if not m.group(1):
+                open_tags.append(name)
+            elif name in open_tags:
+                del open_tags[len(open_tags) - 1 - open_tags[::-1].index(name)]
+        closing = "".join(f"</{name}>" for name in reversed(open_tags))
+        over = len(head) + 1 + len(closing) - limit
+        if over <= 0:
+            return head + "…" + closing
+        cut -= over
+    return "…"[:limit]
+
+
+def pack(texts: List[str], limit: int = MAX_MESSAGE_CHARS, sep: str = SEPARATOR) -> List[Tuple[str, List[int]]]:
+    """
+    Greedily join `texts` in order into messages of at most `limit` characters.
+    Returns (message, indices of the texts it carries). A single text longer
+    than the limit is truncated (see truncate_html).
+    """
+    out: List[Tuple[str, List[int]]] = []
+    current, members = "", []
+    for i, text in enumerate(texts):
+        text = truncate_html(text, limit)
+        if members and len(current) + len(sep) + len(text) <= limit:
+            current += sep + text
+            members.append(i)
+            continue
+        if members:
+            out.append((current, members))
+        current, members = text, [i]
+    if members:
+        out.append((current, members))
+    return out
+
+
+class AlertDigest:
+    """
+    add() queues an alert and returns a future resolving to whether it was
+    delivered. The first alert of a burst opens a window of `window` seconds;
+    when it closes, everything collected is sorted by priority and packed into
+    digest messages. window <= 0 passes alerts straight to the dispatcher.
+    """
+
+    def __init__(self, window: Optional[float] = None, sender: Optional[TelegramDispatcher] = None):
+        self.window = config.ALERT_DIGEST_WINDOW_SECONDS if window is None else window
+        self.sender = sender or default_dispatcher
+        self._pending: List[Tuple[int, int, str, asyncio.Future]] = []
+        self._timer: Optional[asyncio.Task] = None
+
+    def add(self, text: str, priority: int = PRIORITY_BOS) -> "asyncio.Future[bool]":
+        if self.window <= 0:
+            return self.sender.enqueue(text, priority=priority)
+
+        fut = asyncio.get_running_loop().create_future()
+        self._pending.append((priority, len(self._pending), text, fut))
+        if self._timer is None or self._timer.done():
+            self._timer = asyncio.create_task(self._flush_later())
+        return fut
+
+    async def _flush_later(self):
+        await asyncio.sleep(self.window)
+        self.flush()
+
+    def flush(self):
+        """
+        Send everything collected so far now.
+        """
+        pending, self._pending = sorted(self._pending), []
+        if not pending:
+            return
+        if len(pending) > 1:
+            print(f"[Digest] Coalescing {len(pending)} alerts")
+
+        # Pack each priority separately so entry alerts never wait behind a BOS digest
+        for priority in sorted({p for p, _, _, _ in pending}):
+            group = [(text, fut) for p, _, text, fut in pending if p == priority]
+            for message, members in pack([text for text, _ in group]):
+                sent = self.sender.enqueue(message, priority=priority)
+                sent.add_done_callback(_resolver([group[i][1] for i in members]))
+
+    async def close(self):
+        if self._timer is not None and not self._timer.done():
+            self._timer.cancel()
+        self._timer = None
+        self.flush()
+
+
+def _resolver(futures: List[asyncio.Future]):
+    def _done(sent: asyncio.Future):
+        ok = not sent.cancelled() and sent.exception() is None and bool(sent.result())
+        for fut in futures:
+            if not fut.done():
+                fut.set_result(ok)
+    return _done
+
+
+digest = AlertDigest()
@@ -0,0 +1,103 @@
+# Outbox sender: drains queued alerts from the SQLite outbox to Telegram / WhatsApp
+import asyncio
+import time
+from typing import Dict, List, Optional
+from .. import config, db, metrics
+from . import twilio_whatsapp
+from .digest import digest
+
+
+def backoff_seconds(attempts: int) -> float:
+    return min(config.OUTBOX_MAX_BACKOFF_SECONDS, config.OUTBOX_RETRY_SECONDS * 2 ** max(0, attempts - 1))
+
+
+class OutboxSender:
+    """
+    Claims due outbox rows in batches, delivers them (Telegram rows through
+    the digest, so a burst is packed into few messages) and records the
+    outcome: sent rows get sent_at and set the signal's notified_* flags in
+    the same transaction; failed rows are retried with exponential backoff
+    until OUTBOX_MAX_ATTEMPTS, then parked as 'failed'.
+    """
+
+    def __init__(self, batch_size: int = 0, poll_seconds: Optional[float] = None):
+        self.batch_size = batch_size or config.OUTBOX_BATCH_SIZE
+        self.poll_seconds = config.OUTBOX_POLL_SECONDS if poll_seconds is None else poll_seconds
+        self._wake: Optional[asyncio.Event] = None
+        self._stopping = False
+
+    def wake(self):
+        """
+        New rows were queued: skip the rest of the poll interval.
+        """
+        if self._wake is not None:
+            self._wake.set()
+
+    async def _send(self, row: Dict) -> bool:
+        with metrics.notify_seconds.time(row["channel"]):
+            if row["channel"] == "whatsapp":
+                return await twilio_whatsapp.channel.send(row["body"])
+            return await digest.add(row["body"], row["priority"])
+
+    async def deliver(self, rows: List[Dict]) -> int:
+        results = await asyncio.gather(*[self._send(r) for r in rows], return_exceptions=True)
+        now = time.time()
+        batch = db.SignalBatch()
+        sent = 0
+        for row, ok in zip(rows, results):
+            if ok is True:
+                sent += 1
+                metrics.alerts_total.inc(row["channel"], "sent")
+                batch.outbox_sent(row["id"], now)
+                batch.mark_notified_channel(row["symbol"], row["bos_ts"], row["channel"])
+                # notified_<kind>: delivered on at least one channel (arming and stats
+                # read it, so it must not depend on Telegram being configured)
+                mark = batch.mark_bos_sent if row["kind"] == "bos" else batch.mark_market_sent
+                mark(row["symbol"], row["bos_ts"])
+                print(f"[Outbox] Sent {row['kind'].upper()} alert for {row['symbol']} via {row['channel']}")
+                continue
+
+            error = repr(ok) if isinstance(ok, BaseException) else "delivery failed"
+            if row["attempts"] >= config.OUTBOX_MAX_ATTEMPTS:
+                metrics.alerts_total.inc(row["channel"], "failed")
+                batch.outbox_failed(row["id"], error)
+                print(f"[Outbox] Giving up on {row['kind']} alert for {row['symbol']} via {row['channel']}")
+            else:
+                metrics.alerts_total.inc(row["channel"], "retry")
+                batch.outbox_retry(row["id"], now + backoff_seconds(row["attempts"]), error)
+        with metrics.stage_seconds.time("db"):
+            batch.flush()
+        return sent
+
+    def stop(self):
+        """
+        Ask run() to return once the batch in flight has been recorded.
+        """
+        self._stopping = True
+        self.wake()
+
+    async def run(self):
+        self._stopping = False
+        self._wake = asyncio.Event()
+        released = db.release_outbox_claims()
+        if released:
+            print(f"[Outbox] Re-queued {released} alerts claimed before the last shutdown")
+        while not self._stopping:
+            self._wake.clear()
+            try:
+                rows = db.claim_outbox(self.batch_size, config.OUTBOX_LEASE_SECONDS)
+                if rows:
+                    await self.deliver(rows)
+                    continue
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"[Outbox] Sender error: {e}")
+
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.poll_seconds)
+            except asyncio.TimeoutError:
+                pass
+
+
+sender = OutboxSender()
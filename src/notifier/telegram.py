@@ -1,9 +1,14 @@
 # Telegram notification helper with the exact two-format outputs you requested
+import asyncio
 import requests
 from .. import config
 from datetime import datetime
 
 def send_telegram(text: str) -> bool:
+    """
+    Blocking one-off send for scripts. Inside the event loop use
+    telegram_dispatcher (shared session, rate limiting, retries) instead.
+    """
     token = config.TELEGRAM_BOT_TOKEN
     chat = config.TELEGRAM_CHAT_ID
 
@@ -86,13 +91,16 @@ def format_status_message(stats: dict, symbols_count: int) -> str:
     lines.append("Lower-RR setups are stored for review (RR >= {}).".format(int(config.RR_MIN_STORE)))
     return "\n".join(lines)
 
-def send_signals_staggered(signals: list, delay: float = 60.0):
+async def send_signals_staggered(signals: list, delay: float = 0.0):
     """
-    Send all signals to Telegram with a small delay between each to prevent flooding.
-    delay: seconds to wait between each alert
+    Queue all signals on the async dispatcher, which paces them within Telegram's
+    rate limits. delay: optional extra seconds between alerts (does not block the loop)
     """
+    from .telegram_dispatcher import dispatcher
+
     for sig in signals:
         message = format_market_scan_message(sig) if sig.get("type") == "pullback" else format_bos_message(sig)
-        if send_telegram(message):
+        if await dispatcher.send(message):
             print(f"[Worker] Sent alert for {sig['symbol']}")
-        time.sleep(delay)
\ No newline at end of file
+        if delay > 0:
+            await asyncio.sleep(delay)
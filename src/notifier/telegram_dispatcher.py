@@ -0,0 +1,200 @@
+# Async Telegram delivery: shared keep-alive session, token-bucket rate limits, retry with backoff
+import asyncio
+import itertools
+import time
+from typing import Dict, Optional, Tuple
+import aiohttp
+from .. import config, metrics
+
+
+class TokenBucket:
+    """
+    Allows `rate` acquisitions per second on average with bursts up to `capacity`.
+    """
+
+    def __init__(self, rate: float, capacity: float = 1.0):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1.0:
+                    self.tokens -= 1.0
+                    return
+                await asyncio.sleep((1.0 - self.tokens) / self.rate)
+
+    def penalize(self, seconds: float):
+        """
+        Drain the bucket so nothing is sent for `seconds` (server asked us to back off).
+        """
+        self.tokens = min(self.tokens, 0.0) - seconds * self.rate
+        self.updated = time.monotonic()
+
+
+class TelegramDispatcher:
+    """
+    Queue-backed sender. enqueue() returns immediately with a future that
+    resolves to True/False once the message is delivered or given up on.
+
+    Limits follow Telegram's bot guidance: ~30 messages/s overall, 1/s per
+    private chat and 20/min per group (negative chat ids). Lower `priority`
+    values are sent first; equal priorities go out in enqueue order.
+    """
+
+    def __init__(self, token: Optional[str] = None, chat_id: Optional[str] = None,
+                 senders: int = 0, max_retries: int = 0, queue_size: int = 0):
+        self.token = token
+        self.chat_id = chat_id
+        self.senders = senders or config.TELEGRAM_SENDERS
+        self.max_retries = max_retries or config.TELEGRAM_MAX_RETRIES
+        self.queue_size = queue_size or config.TELEGRAM_QUEUE_SIZE
+        self._queue: Optional[asyncio.PriorityQueue] = None
+        self._seq = itertools.count()
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._workers = []
+        self._global = TokenBucket(config.TELEGRAM_GLOBAL_RATE, capacity=config.TELEGRAM_GLOBAL_RATE)
+        self._chats: Dict[str, TokenBucket] = {}
+
+    def _chat_bucket(self, chat: str) -> TokenBucket:
+        bucket = self._chats.get(chat)
+        if bucket is None:
+            rate = config.TELEGRAM_GROUP_RATE if str(chat).startswith("-") else config.TELEGRAM_CHAT_RATE
+            bucket = self._chats[chat] = TokenBucket(rate, capacity=1.0)
+        return bucket
+
+    def _start(self):
+        if self._queue is None:
+            self._queue = asyncio.PriorityQueue(maxsize=self.queue_size)
+            self._workers = [asyncio.create_task(self._worker()) for _ in range(self.senders)]
+
+    async def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                timeout=aiohttp.ClientTimeout(total=10),
+                connector=aiohttp.TCPConnector(limit=self.senders, keepalive_timeout=60),
+            )
+        return self._session
+
+    def enqueue(self, text: str, chat_id: Optional[str] = None, priority: int = 1) -> "asyncio.Future[bool]":
+        """
+        Queue a message without waiting. Must be called from the event loop.
+        The returned future resolves to False right away if the queue is full
+        or Telegram isn't configured.
+        """
+        loop = asyncio.get_running_loop()
+        fut = loop.create_future()
+        token = self.token or config.TELEGRAM_BOT_TOKEN
+        chat = chat_id or self.chat_id or config.TELEGRAM_CHAT_ID
+        if not token or token.strip() == "":
+            print("Telegram send skipped: TELEGRAM_BOT_TOKEN not set.")
+            fut.set_result(False)
+            return fut
+        if not chat or str(chat).strip() == "":
+            print("Telegram send skipped: TELEGRAM_CHAT_ID not set.")
+            fut.set_result(False)
+            return fut
+
+        self._start()
+        try:
+            self._queue.put_nowait((priority, next(self._seq), token, str(chat), text, fut))
+        except asyncio.QueueFull:
+            print("Telegram send dropped: dispatcher queue full.")
+            fut.set_result(False)
+        return fut
+
+    async def send(self, text: str, chat_id: Optional[str] = None, priority: int = 1) -> bool:
+        return await self.enqueue(text, chat_id, priority)
+
+    async def _worker(self):
+        while True:
+            _, _, token, chat, text, fut = await self._queue.get()
+            try:
+                ok = await self._deliver(token, chat, text)
+            except asyncio.CancelledError:
+                if not fut.done():
+                    fut.set_result(False)
+                raise
+            except Exception as e:
+                print("Telegram send failed with unexpected error:", e)
+                ok = False
+            finally:
+                self._queue.task_done()
+            if not fut.done():
+                fut.set_result(ok)
+
+    async def _post(self, token: str, chat: str, text: str) -> Tuple[int, dict]:
+        session = await self._get_session()
+        url = f"https://api.telegram.org/bot{token}/sendMessage"
+        payload = {"chat_id": chat, "text": text, "parse_mode": "HTML"}
+        async with session.post(url, json=payload) as r:
+            try:
+                body = await r.json(content_type=None)
+            except Exception:
+                body = {}
+            return r.status, body or {}
+
+    async def _deliver(self, token: str, chat: str, text: str) -> bool:
+        chat_bucket = self._chat_bucket(chat)
+        for attempt in range(self.max_retries + 1):
+            await self._global.acquire()
+            await chat_bucket.acquire()
+            t0 = time.perf_counter()
+            try:
+                status, body = await self._post(token, chat, text)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                metrics.telegram_request_seconds.observe(time.perf_counter() - t0)
+                metrics.telegram_requests_total.inc("error")
+                print(f"Telegram send error (attempt {attempt + 1}): {e!r}")
+                await asyncio.sleep(min(30.0, 2 ** attempt))
+                continue
+            metrics.telegram_request_seconds.observe(time.perf_counter() - t0)
+            metrics.telegram_requests_total.inc(str(status))
+
+            if status == 200 and body.get("ok", True):
+                return True
+            if status == 429:
+                retry_after = float((body.get("parameters") or {}).get("retry_after", 2 ** attempt))
+                print(f"Telegram rate limited, retrying after {retry_after:g}s")
+                # A 429 may be the bot-wide limit, so every chat backs off, not just this one
+                self._global.penalize(retry_after)
+                chat_bucket.penalize(retry_after)
+                continue
+            if status >= 500:
+                await asyncio.sleep(min(30.0, 2 ** attempt))
+                continue
+            print(f"Telegram send failed: HTTP {status} - Response: {body}")
+            return False
+        print(f"Telegram send gave up after {self.max_retries + 1} attempts")
+        return False
+
+    async def drain(self):
+        """
+        Wait until everything queued so far has been processed.
+        """
+        if self._queue is not None:
+            await self._queue.join()
+
+    async def close(self):
+        for w in self._workers:
+            w.cancel()
+        if self._workers:
+            await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        self._queue = None
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+
+dispatcher = TelegramDispatcher()
+
+
+async def send_telegram_async(text: str) -> bool:
+    return await dispatcher.send(text)
@@ -1,18 +1,101 @@
-# Twilio WhatsApp notifier
+# Twilio WhatsApp notifier: cached client, blocking sends run on a private thread pool
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
 from twilio.rest import Client
 from .. import config
 
+_client: Optional[Client] = None
+_client_lock = threading.Lock()
+
+
+def get_client() -> Client:
+    """
+    One Twilio client (and its HTTP session) shared by every send.
+    """
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = Client(config.TWILIO_ACCOUNT_SID, config.TWILIO_AUTH_TOKEN)
+        return _client
+
+
+def enabled() -> bool:
+    return bool(
+        config.WHATSAPP_ENABLED
+        and config.TWILIO_ACCOUNT_SID
+        and config.TWILIO_AUTH_TOKEN
+        and config.TWILIO_WHATSAPP_FROM
+        and config.TWILIO_WHATSAPP_TO
+    )
+
+
+def _create(text: str):
+    return get_client().messages.create(
+        body=text,
+        from_=config.TWILIO_WHATSAPP_FROM,
+        to=config.TWILIO_WHATSAPP_TO
+    )
+
+
 def send_whatsapp(text: str) -> bool:
     if not config.TWILIO_ACCOUNT_SID or not config.TWILIO_AUTH_TOKEN:
         return False
-    client = Client(config.TWILIO_ACCOUNT_SID, config.TWILIO_AUTH_TOKEN)
     try:
-        msg = client.messages.create(
-            body=text,
-            from_=config.TWILIO_WHATSAPP_FROM,
-            to=config.TWILIO_WHATSAPP_TO
-        )
+        _create(text)
         return True
     except Exception as e:
         print("Twilio error:", e)
-        return False
\ No newline at end of file
+        return False
+
+
+def _retryable(e: Exception) -> bool:
+    # TwilioRestException carries the HTTP status; anything without one is a transport error
+    status = getattr(e, "status", None)
+    return status is None or status == 429 or status >= 500
+
+
+class WhatsAppChannel:
+    """
+    send() runs the blocking Twilio call on a private thread pool, retrying
+    transient failures with backoff. Delivery is recorded by the outbox sender.
+    """
+
+    def __init__(self, workers: int = 0, max_retries: int = 0):
+        self.workers = workers or config.WHATSAPP_WORKERS
+        self.max_retries = max_retries or config.WHATSAPP_MAX_RETRIES
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="whatsapp")
+        return self._executor
+
+    async def send(self, text: str) -> bool:
+        """
+        Send one message on the pool (with retries) and wait for the outcome.
+        """
+        if not enabled():
+            return False
+        return await self._deliver(asyncio.get_running_loop(), text)
+
+    async def _deliver(self, loop, text: str) -> bool:
+        for attempt in range(self.max_retries + 1):
+            try:
+                await loop.run_in_executor(self._get_executor(), _create, text)
+                return True
+            except Exception as e:
+                if not _retryable(e) or attempt == self.max_retries:
+                    print("Twilio error:", e)
+                    return False
+                await asyncio.sleep(min(30.0, 2 ** attempt))
+        return False
+
+    async def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+
+channel = WhatsAppChannel()
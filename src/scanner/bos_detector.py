@@ -1,24 +1,144 @@
+import math
 import numpy as np
 import pandas as pd
-from typing import List, Tuple, Optional, Dict
+from numpy.lib.stride_tricks import sliding_window_view
+from collections import deque
+from typing import List, Tuple, Optional, Dict, Deque
 
 
-def atr(df: pd.DataFrame, n: int = 14) -> pd.Series:
-    high = df["High"]
-    low = df["Low"]
-    close = df["Close"]
+def true_range(high: np.ndarray, low: np.ndarray, close: np.ndarray) -> np.ndarray:
+    """
+    Per-bar true range; the first bar (no previous close) is just high - low.
+    """
+    high = np.asarray(high, dtype=float).reshape(-1)
+    low = np.asarray(low, dtype=float).reshape(-1)
+    close = np.asarray(close, dtype=float).reshape(-1)
+    prev_close = np.empty_like(close)
+    if len(close):
+        prev_close[0] = np.nan
+        prev_close[1:] = close[:-1]
+    return np.fmax(np.fmax(high - low, np.abs(high - prev_close)), np.abs(low - prev_close))
 
-    tr1 = high - low
-    tr2 = (high - close.shift()).abs()
-    tr3 = (low - close.shift()).abs()
 
-    tr = pd.concat([tr1, tr2, tr3], axis=1).max(axis=1)
-    return tr.rolling(n, min_periods=1).mean()
+def atr_array(high, low, close, n: int = 14, wilder: bool = False) -> np.ndarray:
+    """
+    ATR over plain arrays. Default: simple rolling mean of the true range with
+    min_periods=1 (same values as atr()). wilder=True: Wilder's smoothing,
+    seeded with the running mean of the first n true ranges.
+    NaN true ranges are skipped, like pandas does.
+    """
+    tr = true_range(high, low, close)
+    if len(tr) == 0:
+        return tr
+    if wilder:
+        out = np.empty_like(tr)
+        state = AtrState(n, wilder=True)
+        for i, v in enumerate(tr.tolist()):
+            out[i] = state.update_tr(v)
+        return out
+    padded = np.concatenate([np.full(n - 1, np.nan), tr])
+    windows = sliding_window_view(padded, n)
+    counts = np.sum(~np.isnan(windows), axis=1)
+    sums = np.nansum(windows, axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(counts > 0, sums / np.maximum(counts, 1), np.nan)
+
+
+def atr(df: pd.DataFrame, n: int = 14, wilder: bool = False) -> pd.Series:
+    return pd.Series(atr_array(df["High"].values, df["Low"].values, df["Close"].values, n, wilder), index=df.index)
+
+
+def atr_latest(df: pd.DataFrame, n: int = 14, wilder: bool = False) -> Optional[float]:
+    """
+    ATR at the last bar. The simple mean only needs the last n + 1 bars, so
+    only those are touched; Wilder smoothing depends on the whole history.
+    """
+    if df is None or len(df) == 0:
+        return None
+    tail = df if wilder else df.iloc[-(n + 1):]
+    return float(atr_array(tail["High"].values, tail["Low"].values, tail["Close"].values, n, wilder)[-1])
+
+
+class AtrState:
+    """
+    Incremental ATR: update() with each new bar, O(1) per bar.
+    Same values as atr_array(..., n, wilder) over the bars seen so far.
+    """
+
+    def __init__(self, n: int = 14, wilder: bool = False):
+        self.n = n
+        self.wilder = wilder
+        self.prev_close: Optional[float] = None
+        self.value = float("nan")
+        self._window: Deque[float] = deque()
+        self._sum = 0.0
+        self._count = 0
+        self._seen = 0
+
+    def update(self, high: float, low: float, close: float) -> float:
+        tr = high - low
+        if self.prev_close is not None:
+            tr = float(np.fmax(np.fmax(tr, abs(high - self.prev_close)), abs(low - self.prev_close)))
+        self.prev_close = close
+        return self.update_tr(tr)
+
+    def update_tr(self, tr: float) -> float:
+        valid = tr == tr  # not NaN
+        if self.wilder:
+            if valid:
+                self._seen += 1
+                if self._seen <= self.n:
+                    # seed: running mean of the first n true ranges
+                    self._sum += tr
+                    self.value = self._sum / self._seen
+                else:
+                    self.value = (self.value * (self.n - 1) + tr) / self.n
+            return self.value
+
+        self._window.append(tr)
+        if valid:
+            self._sum += tr
+            self._count += 1
+        if len(self._window) > self.n:
+            old = self._window.popleft()
+            if old == old:
+                self._sum -= old
+                self._count -= 1
+        self.value = self._sum / self._count if self._count else float("nan")
+        return self.value
 
 
 def find_swings(
     df: pd.DataFrame, left: int = 3, right: int = 3
 ) -> Tuple[List[int], List[int]]:
+    """
+    Indices of strict swing highs / lows: bar i is a swing high when its high
+    is the unique maximum of the window [i - left, i + right] (lows likewise).
+    Vectorized over sliding-window views; same result as find_swings_loop.
+    """
+    highs = np.asarray(df["High"].values, dtype=float).reshape(-1)
+    lows = np.asarray(df["Low"].values, dtype=float).reshape(-1)
+    return _swing_indices(highs, left, right, np.max), _swing_indices(lows, left, right, np.min)
+
+
+def _swing_indices(values: np.ndarray, left: int, right: int, extreme) -> List[int]:
+    width = left + right + 1
+    if len(values) < width:
+        return []
+    windows = sliding_window_view(values, width)
+    centers = values[left : len(values) - right]
+    is_extreme = centers == extreme(windows, axis=1)
+    # strict: the extreme must occur exactly once in the window
+    unique = (windows == centers[:, None]).sum(axis=1) == 1
+    return (np.flatnonzero(is_extreme & unique) + left).tolist()
+
+
+def find_swings_loop(
+    df: pd.DataFrame, left: int = 3, right: int = 3
+) -> Tuple[List[int], List[int]]:
+    """
+    Reference per-bar implementation of find_swings.
+    """
     highs = df["High"].values
     lows = df["Low"].values
     n = len(df)
@@ -112,3 +232,110 @@ def detect_bos(
                 }
 
     return None
+
+
+def _ts_str(ts) -> str:
+    return ts.isoformat() if hasattr(ts, "isoformat") else str(ts)
+
+
+class IncrementalBosDetector:
+    """
+    Streaming counterpart of detect_bos for one symbol.
+
+    Feed closed bars in order with update(); after n bars the returned value
+    equals detect_bos(df.iloc[:n], left, right, lookback). Only the last
+    left + right + 1 bars, the latest confirmed swing high/low and the breaks
+    of those swings inside the lookback window are kept, so each bar costs
+    O(left + right) regardless of history length.
+    """
+
+    def __init__(self, left: int = 3, right: int = 3, lookback: int = 15):
+        self.left = left
+        self.right = right
+        self.lookback = lookback
+        self.width = left + right + 1
+        self.n = 0
+        # recent bars as (index, ts, open, high, low, close)
+        self._bars: Deque[Tuple[int, object, float, float, float, float]] = deque(maxlen=max(self.width, 1))
+        self.swing_high: Optional[Tuple[int, float]] = None
+        self.swing_low: Optional[Tuple[int, float]] = None
+        # (index, ts) of closes beyond the current swing, oldest first
+        self._high_breaks: Deque[Tuple[int, object]] = deque()
+        self._low_breaks: Deque[Tuple[int, object]] = deque()
+        self.last: Optional[Dict] = None
+
+    def _check_new_swings(self) -> Tuple[bool, bool]:
+        if self.n < self.width:
+            return False, False
+        bars = list(self._bars)[-self.width:]
+        center = bars[self.left]
+        # Plain lists: for a handful of values, building arrays costs far more than the scan
+        highs = [b[3] for b in bars]
+        lows = [b[4] for b in bars]
+        c_high, c_low = center[3], center[4]
+        # A NaN anywhere in the window rules out a swing, as in find_swings
+        new_high = c_high == max(highs) and highs.count(c_high) == 1 and not math.isnan(sum(highs))
+        new_low = c_low == min(lows) and lows.count(c_low) == 1 and not math.isnan(sum(lows))
+
+        # Bars after the new swing (the `right` confirmation bars) may already break it
+        after = bars[self.left + 1:]
+        if new_high:
+            self.swing_high = (center[0], float(c_high))
+            self._high_breaks = deque((b[0], b[1]) for b in after if b[5] > c_high)
+        if new_low:
+            self.swing_low = (center[0], float(c_low))
+            self._low_breaks = deque((b[0], b[1]) for b in after if b[5] < c_low)
+        return bool(new_high), bool(new_low)
+
+    def update(self, ts, open_: float, high: float, low: float, close: float) -> Optional[Dict]:
+        idx = self.n
+        self.n += 1
+        self._bars.append((idx, ts, open_, high, low, close))
+
+        new_high, new_low = self._check_new_swings()
+        if not new_high and self.swing_high is not None and close > self.swing_high[1]:
+            self._high_breaks.append((idx, ts))
+        if not new_low and self.swing_low is not None and close < self.swing_low[1]:
+            self._low_breaks.append((idx, ts))
+
+        window_start = self.n - self.lookback
+        while self._high_breaks and self._high_breaks[0][0] < window_start:
+            self._high_breaks.popleft()
+        while self._low_breaks and self._low_breaks[0][0] < window_start:
+            self._low_breaks.popleft()
+
+        self.last = self._result(float(open_), float(close))
+        return self.last
+
+    def _result(self, last_open: float, last_close: float) -> Optional[Dict]:
+        if self.n < self.left + self.right + self.lookback:
+            return None
+        if self.swing_high is not None and self._high_breaks:
+            return {
+                "direction": "long",
+                "bos_price": self.swing_high[1],
+                "bos_ts": _ts_str(self._high_breaks[0][1]),
+                "last_close": last_close,
+                "last_open": last_open,
+            }
+        if self.swing_low is not None and self._low_breaks:
+            return {
+                "direction": "short",
+                "bos_price": self.swing_low[1],
+                "bos_ts": _ts_str(self._low_breaks[0][1]),
+                "last_close": last_close,
+                "last_open": last_open,
+            }
+        return None
+
+    def update_frame(self, df: pd.DataFrame) -> Optional[Dict]:
+        """
+        Feed every row of an OHLC frame; returns the state after the last row.
+        """
+        opens = np.asarray(df["Open"].values, dtype=float).reshape(-1)
+        highs = np.asarray(df["High"].values, dtype=float).reshape(-1)
+        lows = np.asarray(df["Low"].values, dtype=float).reshape(-1)
+        closes = np.asarray(df["Close"].values, dtype=float).reshape(-1)
+        for ts, o, h, l, c in zip(df.index, opens, highs, lows, closes):
+            self.update(ts, o, h, l, c)
+        return self.last
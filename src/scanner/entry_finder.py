@@ -1,9 +1,20 @@
 # Compute retracement-based entry, SL, TPs and RR metrics
-from typing import Dict
+from typing import Dict, Optional
 from .bos_detector import atr
 from .. import config
 
-def compute_levels(bos: Dict, htf_df, atr_value: float) -> Dict:
+def compute_levels(
+    bos: Dict,
+    htf_df,
+    atr_value: float,
+    r_low: Optional[float] = None,
+    r_high: Optional[float] = None,
+    stop_buffer: Optional[float] = None,
+) -> Dict:
+    """
+    r_low / r_high / stop_buffer default to RETRACEMENT_LOW / RETRACEMENT_HIGH /
+    ATR_STOP_BUFFER from config (backtests pass their own).
+    """
     dir = bos["direction"]
     bos_price = bos["bos_price"]
     last_close = bos["last_close"]
@@ -11,13 +22,14 @@ def compute_levels(bos: Dict, htf_df, atr_value: float) -> Dict:
     if impulse == 0:
         impulse = float(htf_df['Close'].pct_change().abs().dropna().iloc[-1])
     # Define retracement zone using configured fibs
-    r_low = config.RETRACEMENT_LOW
-    r_high = config.RETRACEMENT_HIGH
+    r_low = config.RETRACEMENT_LOW if r_low is None else r_low
+    r_high = config.RETRACEMENT_HIGH if r_high is None else r_high
+    stop_buffer = config.ATR_STOP_BUFFER if stop_buffer is None else stop_buffer
     if dir == "long":
         zone_high = last_close - impulse * r_low
         zone_low = last_close - impulse * r_high
         entry = zone_high  # conservative entry
-        stop = bos_price - atr_value * config.ATR_STOP_BUFFER
+        stop = bos_price - atr_value * stop_buffer
         risk = max(entry - stop, 1e-6)
         tp1 = entry + risk * 1.0
         tp2 = entry + risk * 2.0
@@ -26,7 +38,7 @@ def compute_levels(bos: Dict, htf_df, atr_value: float) -> Dict:
         zone_high = last_close + impulse * r_high
         zone_low = last_close + impulse * r_low
         entry = zone_high
-        stop = bos_price + atr_value * config.ATR_STOP_BUFFER
+        stop = bos_price + atr_value * stop_buffer
         risk = max(stop - entry, 1e-6)
         tp1 = entry - risk * 1.0
         tp2 = entry - risk * 2.0
@@ -0,0 +1,205 @@
+# Cross-symbol panel engine: BOS, ATR and entry/SL/TP levels for many symbols in one vectorized pass
+from typing import Dict, List, Tuple
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+from .bos_detector import _ts_str, atr_array
+from .entry_finder import compute_levels
+from .. import config
+
+RESULT_COLUMNS = [
+    "direction", "bos_price", "bos_ts", "last_close", "last_open", "atr",
+    "entry", "zone_high", "zone_low", "stop", "tp1", "tp2", "tp3", "rr_tp2",
+]
+
+
+class Panel:
+    """
+    OHLC history of many symbols aligned into (symbols x bars) float arrays.
+    Rows are right-aligned on their latest bar and NaN-padded on the left, so
+    column -1 is every symbol's last bar.
+    """
+
+    def __init__(self, frames: Dict[str, pd.DataFrame], max_bars: int = 0):
+        self.symbols: List[str] = []
+        self.indexes: List[pd.Index] = []
+        kept = []
+        for sym, df in frames.items():
+            if df is None or df.empty:
+                continue
+            if max_bars and max_bars > 0:
+                df = df.iloc[-max_bars:]
+            self.symbols.append(sym)
+            self.indexes.append(df.index)
+            kept.append(df)
+
+        self.lengths = np.array([len(df) for df in kept], dtype=np.int64)
+        width = int(self.lengths.max()) if len(kept) else 0
+        self.pad = width - self.lengths
+        shape = (len(kept), width)
+        self.open = np.full(shape, np.nan)
+        self.high = np.full(shape, np.nan)
+        self.low = np.full(shape, np.nan)
+        self.close = np.full(shape, np.nan)
+        for row, df in enumerate(kept):
+            start = self.pad[row]
+            self.open[row, start:] = np.asarray(df["Open"].values, dtype=float).reshape(-1)
+            self.high[row, start:] = np.asarray(df["High"].values, dtype=float).reshape(-1)
+            self.low[row, start:] = np.asarray(df["Low"].values, dtype=float).reshape(-1)
+            self.close[row, start:] = np.asarray(df["Close"].values, dtype=float).reshape(-1)
+
+    def __len__(self) -> int:
+        return len(self.symbols)
+
+    @property
+    def width(self) -> int:
+        return self.close.shape[1]
+
+
+def swing_mask(values: np.ndarray, left: int, right: int, highs: bool) -> np.ndarray:
+    """
+    (symbols x bars) boolean mask of strict swing highs (or lows), same rule as
+    bos_detector.find_swings applied to every row.
+    """
+    rows, width = values.shape
+    mask = np.zeros((rows, width), dtype=bool)
+    w = left + right + 1
+    if width < w:
+        return mask
+    windows = sliding_window_view(values, w, axis=1)
+    centers = values[:, left : width - right]
+    extreme = windows.max(axis=2) if highs else windows.min(axis=2)
+    unique = (windows == centers[:, :, None]).sum(axis=2) == 1
+    mask[:, left : width - right] = (centers == extreme) & unique
+    return mask
+
+
+def _last_true(mask: np.ndarray):
+    """
+    Column of the last True per row and whether any exists.
+    """
+    has = mask.any(axis=1)
+    last = mask.shape[1] - 1 - np.argmax(mask[:, ::-1], axis=1)
+    return last, has
+
+
+def atr_last(panel: Panel, n: int = 14, wilder: bool = False) -> np.ndarray:
+    """
+    Latest ATR per symbol, equal to bos_detector.atr(df, n, wilder).iloc[-1].
+    """
+    if wilder:
+        # recursive smoothing: one array pass per symbol over its own bars
+        return np.array([
+            atr_array(panel.high[r, p:], panel.low[r, p:], panel.close[r, p:], n, wilder=True)[-1]
+            for r, p in enumerate(panel.pad)
+        ])
+    prev_close = np.roll(panel.close, 1, axis=1)
+    prev_close[:, 0] = np.nan
+    tr = np.fmax(np.fmax(panel.high - panel.low, np.abs(panel.high - prev_close)), np.abs(panel.low - prev_close))
+    tail = tr[:, -n:]
+    counts = np.sum(~np.isnan(tail), axis=1)
+    sums = np.nansum(tail, axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(counts > 0, sums / np.maximum(counts, 1), np.nan)
+
+
+def _breaks(panel: Panel, swing_col: np.ndarray, has_swing: np.ndarray, price: np.ndarray, lookback: int, above: bool):
+    cols = np.arange(panel.width)
+    start = np.maximum(swing_col + 1, panel.width - lookback)
+    with np.errstate(invalid="ignore"):
+        beyond = panel.close > price[:, None] if above else panel.close < price[:, None]
+    hits = beyond & (cols[None, :] >= start[:, None]) & has_swing[:, None]
+    return np.argmax(hits, axis=1), hits.any(axis=1)
+
+
+def scan_panel(
+    frames: Dict[str, pd.DataFrame],
+    left: int = 3,
+    right: int = 3,
+    lookback: int = 15,
+    atr_period: int = 14,
+    max_bars: int = 0,
+    atr_wilder: bool = False,
+) -> pd.DataFrame:
+    """
+    Run detect_bos + atr + compute_levels for every symbol at once.
+    Returns one row per symbol with a BOS (indexed by symbol, RESULT_COLUMNS);
+    symbols without a BOS are not included.
+    """
+    panel = Panel(frames, max_bars=max_bars)
+    if len(panel) == 0:
+        return pd.DataFrame(columns=RESULT_COLUMNS)
+    rows = np.arange(len(panel))
+
+    high_col, has_high = _last_true(swing_mask(panel.high, left, right, highs=True))
+    low_col, has_low = _last_true(swing_mask(panel.low, left, right, highs=False))
+    high_price = panel.high[rows, high_col]
+    low_price = panel.low[rows, low_col]
+
+    long_at, long_hit = _breaks(panel, high_col, has_high, high_price, lookback, above=True)
+    short_at, short_hit = _breaks(panel, low_col, has_low, low_price, lookback, above=False)
+
+    enough = panel.lengths >= left + right + lookback
+    is_long = enough & long_hit
+    is_short = enough & ~long_hit & short_hit
+    fired = np.flatnonzero(is_long | is_short)
+    if len(fired) == 0:
+        return pd.DataFrame(columns=RESULT_COLUMNS)
+
+    atr_values = atr_last(panel, atr_period, wilder=atr_wilder)
+    last_close = panel.close[:, -1]
+    last_open = panel.open[:, -1]
+    bos_price = np.where(is_long, high_price, low_price)
+    break_col = np.where(is_long, long_at, short_at)
+
+    # Levels, vectorized (mirrors entry_finder.compute_levels)
+    r_low, r_high = config.RETRACEMENT_LOW, config.RETRACEMENT_HIGH
+    impulse = np.abs(last_close - bos_price)
+    sign = np.where(is_long, 1.0, -1.0)
+    zone_high = np.where(is_long, last_close - impulse * r_low, last_close + impulse * r_high)
+    zone_low = np.where(is_long, last_close - impulse * r_high, last_close + impulse * r_low)
+    entry = zone_high
+    stop = bos_price - sign * atr_values * config.ATR_STOP_BUFFER
+    risk = np.maximum(sign * (entry - stop), 1e-6)
+
+    records = []
+    for row in fired:
+        sym = panel.symbols[row]
+        bos = {
+            "direction": "long" if is_long[row] else "short",
+            "bos_price": float(bos_price[row]),
+            "bos_ts": _ts_str(panel.indexes[row][break_col[row] - panel.pad[row]]),
+            "last_close": float(last_close[row]),
+            "last_open": float(last_open[row]),
+        }
+        if impulse[row] == 0:
+            # Degenerate impulse: fall back to the scalar path (uses pct_change)
+            levels = compute_levels(bos, frames[sym], float(atr_values[row]))
+        else:
+            r, e, d = risk[row], entry[row], sign[row]
+            tp2 = e + d * r * 2.0
+            levels = {
+                "entry": float(e),
+                "zone_high": float(zone_high[row]),
+                "zone_low": float(zone_low[row]),
+                "stop": float(stop[row]),
+                "tp1": float(e + d * r * 1.0),
+                "tp2": float(tp2),
+                "tp3": float(e + d * r * 3.0),
+                "rr_tp2": float(d * (tp2 - e) / r),
+                "direction": bos["direction"],
+            }
+        records.append({"symbol": sym, **bos, "atr": float(atr_values[row]), **{k: v for k, v in levels.items() if k != "direction"}})
+
+    return pd.DataFrame.from_records(records, index="symbol", columns=["symbol"] + RESULT_COLUMNS)
+
+
+def split_row(row: pd.Series) -> Tuple[Dict, Dict, float]:
+    """
+    Turn a scan_panel result row back into the (bos, levels, atr) triple the
+    per-symbol path produces.
+    """
+    bos = {k: row[k] for k in ("direction", "bos_price", "bos_ts", "last_close", "last_open")}
+    levels = {k: float(row[k]) for k in ("entry", "zone_high", "zone_low", "stop", "tp1", "tp2", "tp3", "rr_tp2")}
+    levels["direction"] = row["direction"]
+    return bos, levels, float(row["atr"])
@@ -1,14 +1,14 @@
-import time
-from .. import config
-from .telegram import send_telegram, format_market_scan_message
+import asyncio
+from ..notifier.telegram import format_market_scan_message
+from ..notifier.telegram_dispatcher import dispatcher
 
-def send_signals_with_dynamic_sr(signals: list, candles_data: dict, delay: float = 60.0):
+async def send_signals_with_dynamic_sr(signals: list, candles_data: dict, delay: float = 0.0):
     """
     Send market signals to Telegram with dynamic support/resistance filtering.
 
     signals: list of dicts with signal info (must have 'symbol', 'entry_low', 'entry_high', etc.)
     candles_data: dict with recent candles per symbol, each candle = {'high', 'low', 'close'}
-    delay: seconds to wait between sending each alert
+    delay: optional extra seconds between alerts; the dispatcher already paces sends
     """
     def calculate_dynamic_sr(candles, lookback=50):
         recent = candles[-lookback:] if len(candles) >= lookback else candles
@@ -35,6 +35,6 @@ def send_signals_with_dynamic_sr(signals: list, candles_data: dict, delay: float
         # Only send alert if entry is near a dynamic S/R level
         if is_near_sr(entry_mid, support, resistance):
             text = format_market_scan_message(sig)
-            print("Sending Telegram payload:", {"chat_id": config.TELEGRAM_CHAT_ID, "text": text, "parse_mode": "HTML"})
-            send_telegram(text)
-            time.sleep(delay)  # wait before sending the next alert
+            dispatcher.enqueue(text)
+            if delay > 0:
+                await asyncio.sleep(delay)  # wait before queueing the next alert
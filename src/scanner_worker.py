@@ -1,40 +1,40 @@
 import asyncio
-from datetime import datetime
-
-from . import config
-from .db import (
-    insert_signal,
-    mark_bos_sent,
-    mark_market_sent,
-    get_signal,
-    update_pulled_back,
-    mark_notified_channel,
-)
-from .scanner.bos_detector import detect_bos, atr as calc_atr
+import functools
+import threading
+import time
+from typing import List, Optional, Set
+
+from . import config, metrics, scheduler
+from .db import SignalBatch, upsert_signal, list_armed_symbols
+from .scanner.bos_detector import detect_bos, atr_latest
 from .scanner.entry_finder import compute_levels
-from .notifier import telegram
+from .scanner.panel import scan_panel, split_row
+from .notifier import telegram, twilio_whatsapp
+from .notifier.digest import PRIORITY_BOS, PRIORITY_ENTRY
+from .notifier.outbox import sender as outbox_sender
+from .data_providers import fetcher
 
 
-async def scan_symbol_and_notify(symbol: str):
-    provider = config.PROVIDER
+async def scan_symbol_and_notify(symbol: str, batch: Optional[SignalBatch] = None):
     htf_df, ltf_df = None, None
 
     # -------------------------------------------------
-    # 1. Fetch Data
+    # 1. Fetch Data (HTF + LTF concurrently, off the event loop)
     # -------------------------------------------------
     try:
-        if provider == "mt5":
-            from .data_providers import mt5_provider
-            htf_df = mt5_provider.fetch_ohlcv(symbol, config.HTF)
-            ltf_df = mt5_provider.fetch_ohlcv(symbol, config.LTF, count=500)
-        else:
-            from .data_providers import yf_provider
-            htf_df = yf_provider.fetch_ohlcv(symbol, config.HTF)
-            ltf_df = yf_provider.fetch_ohlcv(symbol, config.LTF)
+        with metrics.stage_seconds.time("fetch"):
+            htf_df, ltf_df = await fetcher.fetch_htf_ltf_async(symbol)
+    except asyncio.TimeoutError:
+        print(f"[Worker] Timed out fetching {symbol} after {config.FETCH_TIMEOUT_SECONDS}s")
+        return
     except Exception as e:
         print(f"[Worker] Error fetching {symbol}: {e}")
         return
 
+    await evaluate_and_notify(symbol, htf_df, ltf_df, batch)
+
+
+async def evaluate_and_notify(symbol: str, htf_df, ltf_df, batch: Optional[SignalBatch] = None):
     if (
         htf_df is None
         or ltf_df is None
@@ -46,24 +46,39 @@ async def scan_symbol_and_notify(symbol: str):
     # -------------------------------------------------
     # 2. Strategy Logic: Detect BOS
     # -------------------------------------------------
-    bos = detect_bos(
-        htf_df,
-        left=config.SWING_LEFT,
-        right=config.SWING_RIGHT,
-    )
-    if not bos:
-        return
+    with metrics.stage_seconds.time("detect"):
+        bos = detect_bos(
+            htf_df,
+            left=config.SWING_LEFT,
+            right=config.SWING_RIGHT,
+        )
+        if not bos:
+            return
 
-    # -------------------------------------------------
-    # 3. Calculate Fibonacci / FVG Levels
-    # -------------------------------------------------
-    atr_series = calc_atr(htf_df, n=config.ATR_PERIOD)
-    try:
-        atr_value = atr_series.iloc[-1].item()
-    except (IndexError, ValueError):
-        return
+        # -------------------------------------------------
+        # 3. Calculate Fibonacci / FVG Levels
+        # -------------------------------------------------
+        atr_value = atr_latest(htf_df, n=config.ATR_PERIOD, wilder=config.ATR_SMOOTHING == "wilder")
+        if atr_value is None:
+            return
 
-    levels = compute_levels(bos, htf_df, atr_value)
+        levels = compute_levels(bos, htf_df, atr_value)
+
+    await process_setup(symbol, bos, levels, atr_value, ltf_df, batch)
+
+
+async def process_setup(
+    symbol: str, bos: dict, levels: dict, atr_value: float, ltf_df, batch: Optional[SignalBatch] = None
+):
+    """
+    Steps 4-6 for a symbol with a live BOS: pullback check, DB sync, alerts.
+    Shared by the per-symbol path and the panel engine. Alerts are not sent
+    here: they are queued in the outbox together with the signal and
+    delivered by the background outbox sender. With `batch` the upsert is
+    queued there (one transaction per scan cycle) instead of written now.
+    """
+    if ltf_df is None or ltf_df.empty:
+        return
 
     # -------------------------------------------------
     # 4. Check for Pullback (Current LTF Candle)
@@ -100,44 +115,26 @@ async def scan_symbol_and_notify(symbol: str):
         "rr_tp2": levels.get("rr_tp2", 0.0),
     }
 
-    # -------------------------------------------------
-    # 6. Database Synchronization
-    # -------------------------------------------------
-    insert_signal(sig)
-    db_record = get_signal(symbol, sig["bos_ts"])
-    if not db_record:
-        return
-
     # -------------------------------------------------
     # ALERT 1: BOS DETECTED (Only Once)
     # -------------------------------------------------
-    if not db_record.get("notified_bos", 0):
-        bos_payload = {
-            "symbol": symbol,
-            "direction": sig["direction"],
-            "bos_tf": config.HTF,
-            "entry_low": sig["entry_low"],
-            "entry_high": sig["entry_high"],
-            "stop": sig["stop"],
-            "tp1": sig["tp1"],
-            "tp2": sig["tp2"],
-            "status": "HTF BOS - Waiting for Pullback",
-        }
-
-        text = telegram.format_bos_message(bos_payload)
-        if telegram.send_telegram(text):
-            mark_bos_sent(symbol, sig["bos_ts"])
-            print(f"[Worker] Sent BOS alert for {symbol}")
+    bos_payload = {
+        "symbol": symbol,
+        "direction": sig["direction"],
+        "bos_tf": config.HTF,
+        "entry_low": sig["entry_low"],
+        "entry_high": sig["entry_high"],
+        "stop": sig["stop"],
+        "tp1": sig["tp1"],
+        "tp2": sig["tp2"],
+        "status": "HTF BOS - Waiting for Pullback",
+    }
+    alerts = [("bos", telegram.format_bos_message(bos_payload), PRIORITY_BOS)]
 
     # -------------------------------------------------
     # ALERT 2: PULLBACK OBSERVED (Only Once)
     # -------------------------------------------------
-    already_market = bool(db_record.get("notified_market", 0))
-
     if pulled:
-        update_pulled_back(symbol, sig["bos_ts"], 1)
-
-    if pulled and not already_market:
         market_payload = {
             "symbol": symbol,
             "direction": sig["direction"],
@@ -154,33 +151,297 @@ async def scan_symbol_and_notify(symbol: str):
             ],
             "status": "ENTRY TRIGGERED",
         }
+        alerts.append(("market", telegram.format_market_scan_message(market_payload), PRIORITY_ENTRY))
+
+    # -------------------------------------------------
+    # 6. Database Synchronization
+    # -------------------------------------------------
+    # One transaction: insert or raise pulled_back, and queue the alerts not yet
+    # sent (the outbox keeps each alert once per channel)
+    channels = alert_channels()
+    rows = [
+        {"kind": kind, "channel": ch, "body": body, "priority": priority}
+        for kind, body, priority in alerts
+        for ch in channels
+    ]
+    if batch is not None:
+        batch.upsert_signal(sig, alerts=rows)
+        return
+    with metrics.stage_seconds.time("db"):
+        upsert_signal(sig, alerts=rows)
+    outbox_sender.wake()
 
-        text2 = telegram.format_market_scan_message(market_payload)
-        if telegram.send_telegram(text2):
-            mark_market_sent(symbol, sig["bos_ts"])
-            print(f"[Worker] Sent PULLBACK alert for {symbol}")
+
+def alert_channels() -> List[str]:
+    """
+    Channels alerts are queued for: those with credentials configured.
+    """
+    channels = []
+    if config.TELEGRAM_BOT_TOKEN and config.TELEGRAM_CHAT_ID:
+        channels.append("telegram")
+    if twilio_whatsapp.enabled():
+        channels.append("whatsapp")
+    return channels
 
 
 # -------------------------------------------------
 # Concurrency & Loop
 # -------------------------------------------------
 sem = asyncio.Semaphore(config.SCAN_CONCURRENCY)
+# Separate budget for the fast lane (symbols with an armed setup)
+fast_sem = asyncio.Semaphore(config.FAST_LANE_CONCURRENCY)
 
 
-async def scan_with_limit(symbol: str):
-    async with sem:
-        return await scan_symbol_and_notify(symbol)
+async def scan_with_limit(symbol: str, limiter: asyncio.Semaphore = None, batch: Optional[SignalBatch] = None):
+    async with (limiter or sem):
+        return await scan_symbol_and_notify(symbol, batch)
 
 
-async def periodic_scanner_loop():
+async def evaluate_with_limit(
+    symbol: str, htf_df, ltf_df, limiter: asyncio.Semaphore = None, batch: Optional[SignalBatch] = None
+):
+    async with (limiter or sem):
+        return await evaluate_and_notify(symbol, htf_df, ltf_df, batch)
+
+
+async def scan_symbols(symbols, limiter: asyncio.Semaphore = None):
+    """
+    Scan a list of symbols. With BATCH_FETCH, each timeframe is fetched for
+    the whole list in grouped downloads first, then evaluated per symbol.
+    limiter: concurrency budget to scan under (the shared `sem` by default).
+    Signal writes of the whole cycle are committed in one transaction at the end.
+    """
+    symbols = [s.strip() for s in symbols if s and s.strip()]
+    if not symbols:
+        return
+
+    batch = SignalBatch()
+    try:
+        await _scan_symbols(symbols, limiter, batch)
+    finally:
+        if len(batch):
+            with metrics.stage_seconds.time("db"):
+                batch.flush()
+            outbox_sender.wake()
+
+
+async def _scan_symbols(symbols, limiter: Optional[asyncio.Semaphore], batch: SignalBatch):
+    if not config.BATCH_FETCH:
+        await asyncio.gather(*[scan_with_limit(s, limiter, batch) for s in symbols])
+        return
+
+    try:
+        with metrics.stage_seconds.time("fetch_batch"):
+            htf_map, ltf_map = await fetcher.fetch_htf_ltf_batch_async(symbols)
+    except asyncio.TimeoutError:
+        print(f"[Worker] Timed out batch-fetching {len(symbols)} symbols after {config.FETCH_BATCH_TIMEOUT_SECONDS}s")
+        return
+    except Exception as e:
+        print(f"[Worker] Error batch-fetching {len(symbols)} symbols: {e}")
+        return
+
+    if config.SCAN_MODE == "panel":
+        await scan_panel_and_notify(symbols, htf_map, ltf_map, limiter, batch)
+        return
+
+    await asyncio.gather(
+        *[evaluate_with_limit(s, htf_map.get(s), ltf_map.get(s), limiter, batch) for s in symbols]
+    )
+
+
+async def scan_panel_and_notify(
+    symbols, htf_map, ltf_map, limiter: asyncio.Semaphore = None, batch: Optional[SignalBatch] = None
+):
+    """
+    Evaluate all HTF frames in one vectorized panel pass (off the event loop),
+    then run the per-symbol pullback/DB/alert step only for symbols that fired.
+    """
+    frames = {
+        s: htf_map.get(s) for s in symbols
+        if htf_map.get(s) is not None and ltf_map.get(s) is not None
+    }
+    loop = asyncio.get_running_loop()
+    with metrics.stage_seconds.time("panel"):
+        fired = await loop.run_in_executor(
+            None,
+            functools.partial(
+                scan_panel,
+                frames,
+                left=config.SWING_LEFT,
+                right=config.SWING_RIGHT,
+                atr_period=config.ATR_PERIOD,
+                atr_wilder=config.ATR_SMOOTHING == "wilder",
+            ),
+        )
+
+    async def _process(symbol, row):
+        bos, levels, atr_value = split_row(row)
+        async with (limiter or sem):
+            await process_setup(symbol, bos, levels, atr_value, ltf_map.get(symbol), batch)
+
+    await asyncio.gather(*[_process(sym, row) for sym, row in fired.iterrows()])
+
+
+async def scan_symbol_once(symbol: str):
+    """
+    One-off scan of a single symbol (webhook requests), under the shared limit.
+    """
+    await scan_with_limit(symbol.strip())
+
+
+# -------------------------------------------------
+# Webhook scan requests
+# -------------------------------------------------
+class ScanQueue:
+    """
+    Bounded queue of on-demand scan requests served by a few worker tasks that
+    scan under the shared `sem`. A symbol already queued or being scanned is
+    not queued again. submit() may be called from any thread or event loop.
+    """
+
+    QUEUED, DUPLICATE, FULL, UNAVAILABLE = "queued", "duplicate", "full", "unavailable"
+
+    def __init__(self, maxsize: int = 0, workers: int = 0):
+        self.maxsize = maxsize or config.SCAN_QUEUE_SIZE
+        self.workers = workers or config.SCAN_QUEUE_WORKERS
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._queued: Set[str] = set()
+        self._running: Set[str] = set()
+        self._lock = threading.Lock()
+
+    def submit(self, symbol: str) -> str:
+        symbol = symbol.strip().upper()
+        with self._lock:
+            if self._loop is None or self._loop.is_closed():
+                return self.UNAVAILABLE
+            if symbol in self._queued or symbol in self._running:
+                return self.DUPLICATE
+            if len(self._queued) >= self.maxsize:
+                return self.FULL
+            self._queued.add(symbol)
+        self._loop.call_soon_threadsafe(self._queue.put_nowait, symbol)
+        return self.QUEUED
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._queued)
+
+    async def _worker(self):
+        while True:
+            symbol = await self._queue.get()
+            with self._lock:
+                self._queued.discard(symbol)
+                self._running.add(symbol)
+            try:
+                with scheduler.busy():
+                    await scan_symbol_once(symbol)
+            except Exception as e:
+                print(f"[Worker] Webhook scan of {symbol} failed: {e}")
+            finally:
+                with self._lock:
+                    self._running.discard(symbol)
+                self._queue.task_done()
+
+    async def run(self):
+        # Unbounded asyncio queue: the bound is enforced in submit() via _queued
+        self._queue = asyncio.Queue()
+        with self._lock:
+            self._loop = asyncio.get_running_loop()
+        try:
+            await asyncio.gather(*[self._worker() for _ in range(self.workers)])
+        finally:
+            with self._lock:
+                self._loop = None
+                self._queued.clear()
+
+
+scan_queue = ScanQueue()
+metrics.scan_queue_depth.set_function(scan_queue.__len__)
+
+
+def armed_symbols() -> Set[str]:
+    """
+    Symbols with a recent BOS still waiting for its pullback alert.
+    """
+    try:
+        armed = list_armed_symbols(config.ARMED_MAX_AGE_HOURS)
+    except Exception as e:
+        print(f"[Worker] Could not load armed symbols: {e}")
+        return set()
+    return set(armed) & set(config.SYMBOLS)
+
+
+async def lane_loop(name: str, timeframes, interval: float, pick, limiter: asyncio.Semaphore):
+    """
+    Scan loop for one lane. pick(symbols) selects the lane's symbols at each wake.
+
+    SCAN_SCHEDULE=bar_close: scan once at startup, then sleep until the next
+    close of one of `timeframes` (plus SCAN_SETTLE_SECONDS for the provider to
+    publish the bar) and scan only symbols whose market produced a closed bar.
+    SCAN_SCHEDULE=interval: scan every `interval` seconds.
+
+    A cycle overruns when it takes longer than `interval`, or (bar_close) when
+    a further bar close passed while it was running.
+    """
+    due = pick(list(config.SYMBOLS))
     while True:
-        print(f"--- [Worker] Scan Start: {datetime.now().strftime('%H:%M:%S')} ---")
+        if due:
+            started = scheduler.now_utc()
+            print(f"--- [Worker] {name} Scan Start: {started.strftime('%H:%M:%S')} ({len(due)} symbols) ---")
+            t0 = time.perf_counter()
+            with scheduler.busy():
+                await scan_symbols(due, limiter)
+            elapsed = time.perf_counter() - t0
+            metrics.cycle_seconds.observe(elapsed, name)
+            metrics.symbols_scanned_total.inc(name, amount=len(due))
+            if config.SCAN_SCHEDULE == "interval":
+                overran = elapsed > interval
+            else:
+                missed, _ = scheduler.next_wake(due, timeframes, started)
+                overran = missed is not None and missed < scheduler.now_utc()
+            if overran:
+                metrics.cycle_overruns_total.inc(name)
+
+        if config.SCAN_SCHEDULE == "interval":
+            print(f"--- [Worker] {name} Scan Complete. Sleeping {interval:.0f}s ---")
+            await scheduler.sleep(interval)
+            due = pick(list(config.SYMBOLS))
+            continue
 
-        if config.SYMBOLS:
-            tasks = [scan_with_limit(s.strip()) for s in config.SYMBOLS]
-            await asyncio.gather(*tasks)
+        now = scheduler.now_utc()
+        wake, closed = scheduler.next_wake(config.SYMBOLS, timeframes, now)
+        if wake is None:
+            print(f"--- [Worker] {name}: no bar closes ahead. Sleeping {interval:.0f}s ---")
+            await scheduler.sleep(interval)
+            due = []
+            continue
 
+        delay = (wake - now).total_seconds() + config.SCAN_SETTLE_SECONDS
         print(
-            f"--- [Worker] Scan Complete. Sleeping {config.SCAN_INTERVAL_SECONDS}s ---"
+            f"--- [Worker] {name} Scan Complete. Next bar close {wake.strftime('%Y-%m-%d %H:%M')} UTC, "
+            f"sleeping {delay:.0f}s ---"
         )
-        await asyncio.sleep(config.SCAN_INTERVAL_SECONDS)
+        await scheduler.sleep(max(0.0, delay))
+        due = pick(closed)
+
+
+async def periodic_scanner_loop():
+    if not config.PRIORITY_LANES:
+        await lane_loop("Full", [config.LTF, config.HTF], config.SCAN_INTERVAL_SECONDS, list, sem)
+        return
+
+    # Fast lane: armed symbols at LTF cadence. Slow lane: everything else at HTF
+    # cadence, since a new BOS can only appear when an HTF bar closes.
+    def pick_armed(symbols):
+        armed = armed_symbols()
+        return [s for s in symbols if s in armed]
+
+    def pick_idle(symbols):
+        armed = armed_symbols()
+        return [s for s in symbols if s not in armed]
+
+    await asyncio.gather(
+        lane_loop("Fast lane", [config.LTF], config.FAST_LANE_INTERVAL_SECONDS, pick_armed, fast_sem),
+        lane_loop("Slow lane", [config.HTF], config.SCAN_INTERVAL_SECONDS, pick_idle, sem),
+    )
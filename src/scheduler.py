@@ -0,0 +1,209 @@
+# Bar-close-aware scan scheduling: wake at the next bar close of any scanned timeframe
+import asyncio
+import heapq
+import itertools
+from contextlib import contextmanager, nullcontext
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+from zoneinfo import ZoneInfo
+from . import markets
+
+# How far ahead to search for the next bar close (covers long weekends)
+MAX_LOOKAHEAD = timedelta(days=8)
+
+
+class SimClock:
+    """
+    Simulated clock for replays. Time only moves when a sleeper is due: the
+    clock waits (wake time - now) / speed real seconds, then jumps to exactly
+    that wake time. It never moves while work entered through busy() is
+    running, so every scan sees the same bar closes whatever the host load
+    (speed is an upper bound). Sleepers with equal wake times are released
+    together. `finished` is set once the clock passes `end`.
+    """
+
+    def __init__(self, start: datetime, speed: float = 1.0, end: Optional[datetime] = None):
+        if speed <= 0:
+            raise ValueError("Replay speed must be positive")
+        self._now = start
+        self.speed = speed
+        self.end = end
+        self.finished = asyncio.Event()
+        self._sleepers: List[Tuple[datetime, int, asyncio.Future]] = []
+        self._seq = itertools.count()
+        self._changed = asyncio.Event()
+        self._driver: Optional[asyncio.Task] = None
+        self._busy = 0
+
+    def now(self) -> datetime:
+        return self._now
+
+    @contextmanager
+    def busy(self):
+        self._busy += 1
+        try:
+            yield
+        finally:
+            self._busy -= 1
+            self._changed.set()
+
+    async def sleep(self, seconds: float):
+        fut = asyncio.get_running_loop().create_future()
+        at = self._now + timedelta(seconds=max(0.0, seconds))
+        heapq.heappush(self._sleepers, (at, next(self._seq), fut))
+        if self._driver is None or self._driver.done():
+            self._driver = asyncio.create_task(self._drive(), name="sim-clock")
+        self._changed.set()
+        await fut
+
+    async def _wait_for_head(self):
+        loop = asyncio.get_running_loop()
+        head = self._sleepers[0]
+        deadline = loop.time() + (head[0] - self._now).total_seconds() / self.speed
+        while True:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                return
+            self._changed.clear()
+            try:
+                await asyncio.wait_for(self._changed.wait(), remaining)
+            except asyncio.TimeoutError:
+                return
+            # An earlier sleeper arrived: wait for it instead
+            if self._sleepers[0] is not head:
+                head = self._sleepers[0]
+                deadline = loop.time() + (head[0] - self._now).total_seconds() / self.speed
+
+    async def _drive(self):
+        while True:
+            while not self._sleepers:
+                self._changed.clear()
+                await self._changed.wait()
+            await self._wait_for_head()
+            while self._busy:
+                self._changed.clear()
+                await self._changed.wait()
+            self._now = max(self._now, self._sleepers[0][0])
+            while self._sleepers and self._sleepers[0][0] <= self._now:
+                _, _, fut = heapq.heappop(self._sleepers)
+                if not fut.done():
+                    fut.set_result(None)
+            if self.end is not None and self._now >= self.end and not self.finished.is_set():
+                print(f"[Replay] Reached {self.end.strftime('%Y-%m-%d %H:%M')} UTC")
+                self.finished.set()
+            # let the released sleepers run before moving on
+            await asyncio.sleep(0)
+
+
+# Set to a SimClock by the replay provider; None means wall-clock time
+clock: Optional[SimClock] = None
+
+
+def now_utc() -> datetime:
+    if clock is not None:
+        return clock.now()
+    return datetime.now(timezone.utc)
+
+
+async def sleep(seconds: float):
+    """
+    asyncio.sleep on the wall clock, or on the simulated clock during a replay.
+    """
+    if clock is not None:
+        await clock.sleep(seconds)
+    else:
+        await asyncio.sleep(seconds)
+
+
+def busy():
+    """
+    Context for a scan: a replay clock does not advance until it exits.
+    """
+    return clock.busy() if clock is not None else nullcontext()
+
+
+def _next_grid_close(market: str, step: int, after: datetime) -> Optional[datetime]:
+    """
+    Around-the-clock markets: bars sit on markets.bar_grid, the grid
+    resample_ohlcv builds them on (from midnight in the market's timezone,
+    the last bar of the local day ending at the next midnight). The next
+    close whose bar overlaps trading hours.
+    """
+    tz_name, anchor = markets.bar_grid(market)
+    tz = ZoneInfo(tz_name)
+    # UTC arithmetic throughout: aware datetimes in one zone add and compare by wall time
+    day = after.astimezone(tz).date() - timedelta(days=1)
+    limit = after + MAX_LOOKAHEAD
+    delta = timedelta(seconds=step)
+    while True:
+        start = datetime.combine(day, anchor, tzinfo=tz).astimezone(timezone.utc)
+        if start > limit:
+            return None
+        day += timedelta(days=1)
+        day_end = datetime.combine(day, anchor, tzinfo=tz).astimezone(timezone.utc)
+        t = start
+        while t < day_end:
+            close = min(t + delta, day_end)
+            if close > after and (markets.is_open(market, t) or markets.is_open(market, close - timedelta(seconds=1))):
+                return close
+            t = close
+
+
+def _next_session_close(market: str, step: int, after: datetime) -> Optional[datetime]:
+    """
+    Session markets: bars start at the session open; the last bar of the day
+    closes at the session close.
+    """
+    tz_name, open_t, close_t = markets.SESSIONS[market]
+    tz = ZoneInfo(tz_name)
+    day = after.astimezone(tz).date()
+    delta = timedelta(seconds=step)
+    for offset in range(MAX_LOOKAHEAD.days + 1):
+        d = day + timedelta(days=offset)
+        if d.weekday() >= 5:
+            continue
+        session_open = datetime.combine(d, open_t, tzinfo=tz)
+        session_close = datetime.combine(d, close_t, tzinfo=tz)
+        t = session_open + delta
+        while True:
+            close = min(t, session_close)
+            if close > after:
+                return close.astimezone(timezone.utc)
+            if close >= session_close:
+                break
+            t += delta
+    return None
+
+
+def next_bar_close(market: str, timeframe: str, after: datetime) -> Optional[datetime]:
+    """
+    First close of a `timeframe` bar for `market` strictly after `after`.
+    """
+    step = markets.timeframe_seconds(timeframe)
+    if market in markets.SESSIONS:
+        return _next_session_close(market, step, after)
+    return _next_grid_close(market, step, after)
+
+
+def next_wake(symbols: Iterable[str], timeframes: List[str], after: datetime) -> Tuple[Optional[datetime], List[str]]:
+    """
+    Earliest bar close across `timeframes` for the markets of `symbols`, and
+    the symbols that get a newly closed bar at that moment. Markets that are
+    closed (e.g. stocks on weekends) produce no closes, so their symbols are
+    not returned until their next session.
+    """
+    by_market: Dict[str, List[str]] = {}
+    for sym in symbols:
+        by_market.setdefault(markets.market_for_symbol(sym), []).append(sym)
+
+    closes: Dict[str, datetime] = {}
+    for market in by_market:
+        times = [t for t in (next_bar_close(market, tf, after) for tf in timeframes) if t is not None]
+        if times:
+            closes[market] = min(times)
+
+    if not closes:
+        return None, []
+    wake = min(closes.values())
+    due = [sym for market, t in closes.items() if t == wake for sym in by_market[market]]
+    return wake, due
@@ -1,7 +1,7 @@
-# Simple TradingView webhook receiver (keeps system headless; no admin endpoints)
-from fastapi import FastAPI, Header, HTTPException, Request
-from .. import config
-import asyncio
+# Simple TradingView webhook receiver and Prometheus scrape endpoint (keeps system headless; no admin endpoints)
+from fastapi import FastAPI, Header, HTTPException, Request, Response
+from .. import config, metrics
+from ..scanner_worker import scan_queue
 
 app = FastAPI()
 
@@ -11,20 +11,25 @@ def _verify_secret(x_secret: str):
     if x_secret != config.WEBHOOK_SECRET:
         raise HTTPException(status_code=401, detail="Invalid secret")
 
-# 1. REMOVE the import from the top of the file:
-# from ..scanner_worker import scan_symbol_once  <-- DELETE THIS
-
 @app.post("/webhook")
 async def tradingview_webhook(request: Request, x_secret: str = Header(None)):
     _verify_secret(x_secret)
-    
-    # 2. ADD the import HERE inside the function
-    from ..scanner_worker import scan_symbol_once
-    
+
     payload = await request.json()
     symbol = payload.get("symbol")
     if not symbol:
         return {"status": "ignored", "reason": "no symbol"}
-    
-    asyncio.create_task(scan_symbol_once(symbol.strip()))
-    return {"status": "queued", "symbol": symbol}
\ No newline at end of file
+    symbol = symbol.strip()
+
+    result = scan_queue.submit(symbol)
+    if result == scan_queue.FULL:
+        raise HTTPException(status_code=429, detail="Scan queue full", headers={"Retry-After": "30"})
+    if result == scan_queue.UNAVAILABLE:
+        raise HTTPException(status_code=503, detail="Scanner not running")
+    return {"status": result, "symbol": symbol}
+
+@app.get("/metrics")
+async def prometheus_metrics():
+    if not config.METRICS_ENABLED:
+        raise HTTPException(status_code=404, detail="Metrics disabled")
+    return Response(content=metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
@@ -0,0 +1,35 @@
+import os
+import sys
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+
+def tied_ohlcv(bars: int, seed: int = 0, tick: float = 0.5) -> pd.DataFrame:
+    """
+    Random walk rounded to a coarse tick, so equal highs/lows (ties) are common.
+    """
+    rng = np.random.default_rng(seed)
+    close = np.round((100 + np.cumsum(rng.normal(0, 1, bars))) / tick) * tick
+    open_ = np.concatenate([close[:1], close[:-1]])
+    high = np.maximum(open_, close) + np.round(rng.random(bars) * 2 / tick) * tick
+    low = np.minimum(open_, close) - np.round(rng.random(bars) * 2 / tick) * tick
+    index = pd.date_range("2024-01-01", periods=bars, freq="15min")
+    return pd.DataFrame({"Open": open_, "High": high, "Low": low, "Close": close, "Volume": 1.0}, index=index)
+
+
+@pytest.fixture
+def ohlcv_factory():
+    return tied_ohlcv
+
+
+@pytest.fixture
+def temp_db(tmp_path, monkeypatch):
+    from src import db
+    db.close_db()
+    monkeypatch.setattr(db, "DB", str(tmp_path / "signals.db"))
+    db.init_db()
+    yield db
+    db.close_db()
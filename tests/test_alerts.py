@@ -0,0 +1,37 @@
+import asyncio
+from src import config, scanner_worker
+from src.notifier import twilio_whatsapp
+from src.notifier.outbox import OutboxSender
+
+BOS = {"bos_ts": "2024-01-01T10:00:00", "direction": "long"}
+LEVELS = {
+    "direction": "long", "zone_low": 1.0, "zone_high": 1.1, "stop": 0.9,
+    "tp1": 1.2, "tp2": 1.3, "tp3": 1.4, "rr_tp2": 2.0,
+}
+
+
+def test_whatsapp_only_alert_is_sent_once(temp_db, monkeypatch, ohlcv_factory):
+    db = temp_db
+    monkeypatch.setattr(config, "TELEGRAM_BOT_TOKEN", None)
+    monkeypatch.setattr(config, "TELEGRAM_CHAT_ID", None)
+    monkeypatch.setattr(twilio_whatsapp, "enabled", lambda: True)
+    sent = []
+
+    async def fake_send(text):
+        sent.append(text)
+        return True
+
+    monkeypatch.setattr(twilio_whatsapp.channel, "send", fake_send)
+    # Last LTF bar away from the zone: a BOS alert only
+    ltf = ohlcv_factory(50) + 10
+
+    async def cycle():
+        await scanner_worker.process_setup("EURUSD", BOS, LEVELS, 0.01, ltf)
+        return await OutboxSender().deliver(db.claim_outbox(10, 60))
+
+    assert asyncio.run(cycle()) == 1
+    assert asyncio.run(cycle()) == 0
+    assert len(sent) == 1
+    assert db.outbox_counts() == {"sent": 1}
+    row = db.get_signal("EURUSD", BOS["bos_ts"])
+    assert row["notified_whatsapp"] == 1 and row["notified_bos"] == 1
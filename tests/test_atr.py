@@ -0,0 +1,70 @@
+import numpy as np
+import pandas as pd
+import pytest
+from src.scanner.bos_detector import AtrState, atr, atr_array, atr_latest
+
+
+def reference_true_range(df: pd.DataFrame) -> pd.Series:
+    high_low = df["High"] - df["Low"]
+    high_close = (df["High"] - df["Close"].shift()).abs()
+    low_close = (df["Low"] - df["Close"].shift()).abs()
+    return pd.concat([high_low, high_close, low_close], axis=1).max(axis=1)
+
+
+def reference_atr(df: pd.DataFrame, n: int) -> pd.Series:
+    return reference_true_range(df).rolling(n, min_periods=1).mean()
+
+
+def reference_wilder(df: pd.DataFrame, n: int) -> np.ndarray:
+    tr = reference_true_range(df).to_numpy()
+    out, value, seen, total = [], float("nan"), 0, 0.0
+    for v in tr:
+        if not np.isnan(v):
+            seen += 1
+            if seen <= n:
+                total += v
+                value = total / seen
+            else:
+                value = (value * (n - 1) + v) / n
+        out.append(value)
+    return np.array(out)
+
+
+@pytest.mark.parametrize("seed", range(5))
+@pytest.mark.parametrize("n", [1, 5, 14])
+def test_atr_matches_pandas_reference(ohlcv_factory, seed, n):
+    df = ohlcv_factory(300, seed=seed)
+    np.testing.assert_allclose(atr(df, n).to_numpy(), reference_atr(df, n).to_numpy(), rtol=1e-12)
+    assert atr_latest(df, n) == pytest.approx(reference_atr(df, n).iloc[-1], rel=1e-12)
+
+
+@pytest.mark.parametrize("seed", range(5))
+@pytest.mark.parametrize("n", [1, 5, 14])
+def test_wilder_matches_reference(ohlcv_factory, seed, n):
+    df = ohlcv_factory(300, seed=seed)
+    got = atr_array(df["High"].values, df["Low"].values, df["Close"].values, n, wilder=True)
+    np.testing.assert_allclose(got, reference_wilder(df, n), rtol=1e-12)
+    assert atr_latest(df, n, wilder=True) == pytest.approx(got[-1], rel=1e-12)
+
+
+@pytest.mark.parametrize("wilder", [False, True])
+def test_nan_bars_are_skipped(ohlcv_factory, wilder):
+    df = ohlcv_factory(100, seed=7)
+    df.iloc[[10, 11, 40], df.columns.get_loc("High")] = np.nan
+    got = atr_array(df["High"].values, df["Low"].values, df["Close"].values, 14, wilder)
+    want = reference_wilder(df, 14) if wilder else reference_atr(df, 14).to_numpy()
+    np.testing.assert_allclose(got, want, rtol=1e-12)
+
+
+@pytest.mark.parametrize("wilder", [False, True])
+def test_atr_state_matches_array(ohlcv_factory, wilder):
+    df = ohlcv_factory(300, seed=3)
+    state = AtrState(14, wilder)
+    streamed = [state.update(h, l, c) for h, l, c in zip(df["High"], df["Low"], df["Close"])]
+    want = atr_array(df["High"].values, df["Low"].values, df["Close"].values, 14, wilder)
+    np.testing.assert_allclose(streamed, want, rtol=1e-9)
+
+
+def test_empty_input():
+    assert len(atr_array([], [], [], 14)) == 0
+    assert atr_latest(pd.DataFrame(columns=["High", "Low", "Close"]), 14) is None
@@ -0,0 +1,56 @@
+def _signal(symbol="EURUSD", bos_ts="2024-01-01T10:00:00", pulled_back=0):
+    return {
+        "symbol": symbol, "bos_ts": bos_ts, "direction": "long", "entry": 1.1, "stop": 1.09,
+        "tp1": 1.11, "tp2": 1.12, "tp3": 1.13, "atr": 0.002, "pulled_back": pulled_back,
+    }
+
+
+def _alert(kind="bos", channel="telegram"):
+    return {"kind": kind, "channel": channel, "body": f"{kind} alert", "priority": 1}
+
+
+def _outbox(db):
+    with db._cursor() as cur:
+        cur.execute("SELECT symbol, kind, channel, status FROM outbox ORDER BY id")
+        return [tuple(r) for r in cur.fetchall()]
+
+
+def test_batch_upserts_are_written_on_flush(temp_db):
+    db = temp_db
+    batch = db.SignalBatch()
+    batch.upsert_signal(_signal("EURUSD"), alerts=[_alert()])
+    batch.upsert_signal(_signal("GBPUSD"), alerts=[_alert()])
+    batch.upsert_signal(_signal("EURUSD", pulled_back=1), alerts=[_alert(), _alert("market")])
+    assert len(batch) == 3
+    assert db.get_signal("EURUSD", "2024-01-01T10:00:00") is None
+
+    assert batch.flush() == 3
+    assert len(batch) == 0
+    assert db.get_signal("EURUSD", "2024-01-01T10:00:00")["pulled_back"] == 1
+    assert db.get_signal("GBPUSD", "2024-01-01T10:00:00") is not None
+    assert _outbox(db) == [
+        ("EURUSD", "bos", "telegram", "pending"),
+        ("GBPUSD", "bos", "telegram", "pending"),
+        ("EURUSD", "market", "telegram", "pending"),
+    ]
+
+
+def test_flags_and_upserts_flush_in_one_transaction(temp_db):
+    db = temp_db
+    db.upsert_signal(_signal(), alerts=[_alert()])
+    batch = db.SignalBatch()
+    batch.mark_bos_sent("EURUSD", "2024-01-01T10:00:00")
+    batch.upsert_signal(_signal(bos_ts="2024-01-02T10:00:00"))
+    batch.flush()
+    assert db.get_signal("EURUSD", "2024-01-01T10:00:00")["notified_bos"] == 1
+    assert db.get_signal("EURUSD", "2024-01-02T10:00:00") is not None
+
+
+def test_upsert_does_not_requeue_sent_alerts(temp_db):
+    db = temp_db
+    db.upsert_signal(_signal(), alerts=[_alert()])
+    db.mark_bos_sent("EURUSD", "2024-01-01T10:00:00")
+    with db._cursor(commit=True) as cur:
+        cur.execute("DELETE FROM outbox")
+    db.upsert_signal(_signal(), alerts=[_alert()])
+    assert _outbox(db) == []
@@ -0,0 +1,43 @@
+import re
+from src.notifier.digest import SEPARATOR, pack, truncate_html
+
+TAG = re.compile(r"<(/?)(\w+)[^<>]*>")
+ENTITY = re.compile(r"&#?\w+;")
+
+
+def _is_well_formed(html: str) -> bool:
+    """
+    No partial tags or entities, and every tag closed in order.
+    """
+    bare = ENTITY.sub("", TAG.sub("", html))
+    if any(c in bare for c in "<>&"):
+        return False
+    stack = []
+    for m in TAG.finditer(html):
+        if not m.group(1):
+            stack.append(m.group(2))
+        elif not stack or stack.pop() != m.group(2):
+            return False
+    return not stack
+
+
+TEXT = "<b>EURUSD</b> long &amp; strong\n" + (
+    '<i>zone &lt;1.0812&gt;</i> <a href="https://x.y/?a=1&amp;b=2">chart</a>\n'
+) * 5
+
+
+def test_truncate_never_splits_tags_or_entities():
+    for limit in range(2, len(TEXT) + 2):
+        out = truncate_html(TEXT, limit)
+        assert len(out) <= limit, limit
+        assert _is_well_formed(out), out
+    assert truncate_html(TEXT, len(TEXT)) == TEXT
+
+
+def test_pack_truncates_long_texts_safely():
+    texts = ["<b>" + "a" * 200 + "</b>", "b" * 30]
+    messages = pack(texts, limit=100)
+    assert [members for _, members in messages] == [[0], [1]]
+    assert all(len(msg) <= 100 and _is_well_formed(msg) for msg, _ in messages)
+    assert messages[0][0].endswith("…</b>")
+    assert pack(["x", "y"], limit=100) == [("x" + SEPARATOR + "y", [0, 1])]
@@ -0,0 +1,69 @@
+from datetime import datetime, timezone
+import pandas as pd
+import pytest
+from src import config, scheduler
+from src.data_providers import bar_cache, bar_store, fetcher, yf_provider
+
+INDEX = pd.date_range("2024-01-02", periods=20, freq="15min", tz="UTC")
+
+
+def _bars(base: float) -> pd.DataFrame:
+    close = [base + i for i in range(len(INDEX))]
+    return pd.DataFrame({"Open": close, "High": close, "Low": close, "Close": close, "Volume": 1.0}, index=INDEX)
+
+
+@pytest.fixture
+def yf(temp_db, tmp_path, monkeypatch):
+    """
+    Fake yf.download serving NAS100's two candidates (QQQ, ^IXIC) as very
+    different price series. Returns (served frames by ticker, downloaded tickers).
+    """
+    monkeypatch.setattr(config, "PROVIDER", "yf")
+    monkeypatch.setattr(config, "BAR_CACHE_ENABLED", True)
+    monkeypatch.setattr(config, "BAR_STORE_DIR", str(tmp_path / "bars"))
+    monkeypatch.setattr(bar_cache, "cache", bar_cache.BarCache())
+    monkeypatch.setattr(yf_provider, "_resolution", {})
+    monkeypatch.setattr(yf_provider, "_resolution_loaded", False)
+    monkeypatch.setattr(yf_provider, "_failures", {})
+    monkeypatch.setattr(yf_provider.time, "sleep", lambda s: None)
+    monkeypatch.setattr(scheduler, "now_utc", lambda: datetime(2024, 1, 2, 6, tzinfo=timezone.utc))
+    served = {"QQQ": _bars(450.0), "^IXIC": _bars(15000.0)}
+    calls = []
+
+    def download(tickers, **kwargs):
+        calls.append(tickers)
+        if isinstance(tickers, list):
+            frames = {t: served[t] for t in tickers if t in served and not served[t].empty}
+            return pd.concat(frames, axis=1) if frames else pd.DataFrame()
+        return served.get(tickers, pd.DataFrame())
+
+    monkeypatch.setattr(yf_provider.yf, "download", download)
+    return served, calls
+
+
+def test_empty_incremental_fetch_keeps_the_cached_ticker(yf):
+    served, calls = yf
+    first = fetcher.fetch_ohlcv("NAS100", "15m")
+    assert first["Close"].iloc[0] == 450.0
+    assert bar_cache.cache.ticker("NAS100", "15m") == "QQQ"
+    assert bar_store.ticker("NAS100", "15m") == "QQQ"
+
+    # No new QQQ bars: ^IXIC must not be spliced onto the QQQ history
+    served["QQQ"] = pd.DataFrame()
+    calls.clear()
+    pd.testing.assert_frame_equal(fetcher.fetch_ohlcv("NAS100", "15m"), first)
+    pd.testing.assert_frame_equal(fetcher.fetch_batch(["NAS100"], "15m")["NAS100"], first)
+    assert calls and all(c in ("QQQ", ["QQQ"]) for c in calls)
+    assert bar_store.read("NAS100", "15m")["Close"].max() < 1000
+
+
+def test_changed_ticker_refetches_in_full(yf):
+    fetcher.fetch_ohlcv("NAS100", "15m")
+    yf_provider._record_resolution("NAS100", "QQQ", False)
+
+    df = fetcher.fetch_ohlcv("NAS100", "15m")
+    assert df["Close"].min() == 15000.0 and len(df) == len(INDEX)
+    assert bar_cache.cache.ticker("NAS100", "15m") == "^IXIC"
+    stored = bar_store.read("NAS100", "15m")
+    assert bar_store.ticker("NAS100", "15m") == "^IXIC"
+    assert len(stored) == len(INDEX) and stored["Close"].min() == 15000.0
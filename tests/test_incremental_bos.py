@@ -0,0 +1,17 @@
+import pytest
+from src.scanner.bos_detector import IncrementalBosDetector, detect_bos
+
+
+@pytest.mark.parametrize("seed", range(10))
+@pytest.mark.parametrize("left,right,lookback", [(3, 3, 15), (2, 1, 5), (1, 4, 30)])
+def test_incremental_matches_detect_bos_on_every_prefix(ohlcv_factory, seed, left, right, lookback):
+    df = ohlcv_factory(250, seed=seed)
+    det = IncrementalBosDetector(left, right, lookback)
+    for n, (ts, row) in enumerate(df.iterrows(), start=1):
+        got = det.update(ts, row["Open"], row["High"], row["Low"], row["Close"])
+        assert got == detect_bos(df.iloc[:n], left, right, lookback), f"prefix {n}"
+
+
+def test_update_frame_returns_final_state(ohlcv_factory):
+    df = ohlcv_factory(200, seed=42)
+    assert IncrementalBosDetector(3, 3, 15).update_frame(df) == detect_bos(df, 3, 3, 15)
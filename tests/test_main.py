@@ -0,0 +1,60 @@
+import os
+import signal
+import socket
+import subprocess
+import sys
+import threading
+import pandas as pd
+import pytest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="POSIX signals")
+@pytest.mark.parametrize("sig", [signal.SIGTERM, signal.SIGINT])
+def test_signal_runs_orderly_shutdown(tmp_path, sig):
+    # A slow replay keeps the scanner, webhook and outbox sender running until signalled
+    index = pd.date_range("2024-01-01", periods=200, freq="15min")
+    pd.DataFrame(
+        {"Open": 1.0, "High": 1.0, "Low": 1.0, "Close": 1.0, "Volume": 1.0}, index=index
+    ).to_csv(tmp_path / "EURUSD_15m.csv")
+    (tmp_path / "symbols.txt").write_text("EURUSD\n")
+    env = dict(
+        os.environ,
+        PYTHONPATH=ROOT,
+        PYTHONUNBUFFERED="1",
+        PROVIDER="replay",
+        REPLAY_DIR=str(tmp_path),
+        REPLAY_START="2024-01-01T12:00",
+        REPLAY_SPEED="1",
+        SYMBOLS_FILE=str(tmp_path / "symbols.txt"),
+        DB_PATH=str(tmp_path / "signals.db"),
+        BAR_STORE_DIR=str(tmp_path / "bars"),
+        WEBHOOK_HOST="127.0.0.1",
+        WEBHOOK_PORT=str(_free_port()),
+    )
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "src.main"], cwd=tmp_path, env=env,
+        stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True,
+    )
+    watchdog = threading.Timer(60, proc.kill)
+    watchdog.start()
+    try:
+        output = []
+        for line in proc.stdout:
+            output.append(line)
+            if "Application startup complete" in line:
+                proc.send_signal(sig)
+        proc.wait()
+    finally:
+        watchdog.cancel()
+        proc.kill()
+    text = "".join(output)
+    assert proc.returncode == 0, text
+    assert "[main] Shutdown complete" in text
@@ -0,0 +1,64 @@
+import re
+import pytest
+from src import config, metrics
+
+SAMPLE = re.compile(r'^[a-zA-Z_:][a-zA-Z0-9_:]*(\{([a-zA-Z_][a-zA-Z0-9_]*="([^"\\\n]|\\["\\n])*",?)*\})? \S+$')
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    monkeypatch.setattr(metrics, "_registry", [])
+    monkeypatch.setattr(config, "METRICS_ENABLED", True)
+
+
+def test_exposition_format(registry):
+    c = metrics.Counter("test_requests_total", "Requests", ["path", "code"])
+    c.inc('/a"b\\c\n', "200")
+    c.inc("/x", "500", amount=2)
+    metrics.Gauge("test_depth", "Queue depth", fn=lambda: 3)
+    h = metrics.Histogram("test_seconds", "Latency", ["stage"], buckets=(0.1, 1.0))
+    for v in (0.05, 0.1, 0.5, 5.0):
+        h.observe(v, "fetch")
+
+    text = metrics.render()
+    assert text.endswith("\n")
+    lines = text.splitlines()
+    assert lines[:2] == ["# HELP test_requests_total Requests", "# TYPE test_requests_total counter"]
+    assert 'test_requests_total{path="/a\\"b\\\\c\\n",code="200"} 1' in lines
+    assert 'test_requests_total{path="/x",code="500"} 2' in lines
+    assert "# TYPE test_depth gauge" in lines and "test_depth 3" in lines
+    assert "# TYPE test_seconds histogram" in lines
+    # Buckets are cumulative and le is inclusive; +Inf equals the count
+    assert [l for l in lines if l.startswith("test_seconds")] == [
+        'test_seconds_bucket{stage="fetch",le="0.1"} 2',
+        'test_seconds_bucket{stage="fetch",le="1"} 3',
+        'test_seconds_bucket{stage="fetch",le="+Inf"} 4',
+        'test_seconds_sum{stage="fetch"} 5.65',
+        'test_seconds_count{stage="fetch"} 4',
+    ]
+    for line in lines:
+        assert line.startswith("# ") or SAMPLE.match(line), line
+
+
+def test_module_metrics_render(monkeypatch):
+    monkeypatch.setattr(config, "METRICS_ENABLED", True)
+    metrics.stage_seconds.observe(0.01, "detect")
+    metrics.fetches_total.inc("yf", "batch", "ok")
+    for line in metrics.render().splitlines():
+        assert line.startswith("# ") or SAMPLE.match(line), line
+
+
+def test_recording_is_a_noop_when_disabled(registry, monkeypatch):
+    monkeypatch.setattr(config, "METRICS_ENABLED", False)
+    c = metrics.Counter("test_total", "Count", ["k"])
+    h = metrics.Histogram("test_latency_seconds", "Latency")
+    c.inc("a")
+    h.observe(1.0)
+    with h.time():
+        pass
+    assert c.get("a") == 0 and h.count() == 0
+
+
+def test_metric_subclasses_must_render_samples():
+    with pytest.raises(TypeError):
+        metrics._Metric("test_abstract", "Abstract")
@@ -0,0 +1,30 @@
+import pytest
+from src.scanner.bos_detector import atr_latest, detect_bos
+from src.scanner.entry_finder import compute_levels
+from src.scanner.panel import scan_panel, split_row
+
+LEFT, RIGHT, LOOKBACK, PERIOD = 3, 3, 15, 14
+
+
+@pytest.mark.parametrize("wilder", [False, True])
+def test_panel_rows_match_the_per_symbol_path(ohlcv_factory, wilder):
+    # Mixed lengths (right-aligned in the panel), one symbol shorter than the
+    # swing window, one too short for a BOS and one empty
+    lengths = [300, 120, 60, 25, 22, 5, 0] + [80 + 7 * i for i in range(30)]
+    frames = {f"S{i}": ohlcv_factory(n, seed=i) for i, n in enumerate(lengths)}
+    fired = scan_panel(frames, left=LEFT, right=RIGHT, lookback=LOOKBACK, atr_period=PERIOD, atr_wilder=wilder)
+
+    expected = {}
+    for sym, df in frames.items():
+        bos = detect_bos(df, LEFT, RIGHT, LOOKBACK) if len(df) else None
+        if bos is not None:
+            expected[sym] = bos
+    assert set(fired.index) == set(expected)
+    assert len(expected) >= 10
+
+    for sym, bos in expected.items():
+        got_bos, got_levels, got_atr = split_row(fired.loc[sym])
+        atr_value = atr_latest(frames[sym], n=PERIOD, wilder=wilder)
+        assert got_bos == bos, sym
+        assert got_atr == pytest.approx(atr_value), sym
+        assert got_levels == pytest.approx(compute_levels(bos, frames[sym], atr_value)), sym
@@ -0,0 +1,106 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+import pandas as pd
+from src import config, scheduler
+from src.data_providers import replay_provider
+
+START = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+def _run(coro):
+    return asyncio.run(asyncio.wait_for(coro, 10))
+
+
+def test_sleepers_wake_in_order_at_their_exact_time():
+    async def run():
+        clock = scheduler.SimClock(START, speed=1e6)
+        woke = []
+
+        async def sleeper(name, seconds):
+            await clock.sleep(seconds)
+            woke.append((name, clock.now()))
+
+        await asyncio.gather(sleeper("c", 900), sleeper("a", 60), sleeper("b", 300))
+        return woke
+
+    woke = _run(run())
+    assert woke == [
+        ("a", START + timedelta(seconds=60)),
+        ("b", START + timedelta(seconds=300)),
+        ("c", START + timedelta(seconds=900)),
+    ]
+
+
+def test_equal_wake_times_are_released_together():
+    async def run():
+        clock = scheduler.SimClock(START, speed=1e6)
+        seen = []
+
+        async def sleeper(seconds):
+            await clock.sleep(seconds)
+            seen.append(clock.now())
+            # Both equal-time sleepers run before the clock moves on
+            await asyncio.sleep(0)
+            seen.append(clock.now())
+
+        await asyncio.gather(sleeper(60), sleeper(60), sleeper(120))
+        return seen
+
+    t1, t2 = START + timedelta(seconds=60), START + timedelta(seconds=120)
+    assert _run(run()) == [t1, t1, t1, t1, t2, t2]
+
+
+def test_clock_holds_while_busy():
+    async def run():
+        clock = scheduler.SimClock(START, speed=1e6)
+        log = []
+
+        async def scan():
+            with clock.busy():
+                await asyncio.sleep(0.05)  # real time passes; simulated time must not
+                log.append(("scan done", clock.now()))
+
+        async def waiter():
+            await clock.sleep(1)
+            log.append(("woke", clock.now()))
+
+        task = asyncio.create_task(scan())
+        await asyncio.sleep(0)
+        await asyncio.gather(task, waiter())
+        return log
+
+    assert _run(run()) == [("scan done", START), ("woke", START + timedelta(seconds=1))]
+
+
+def test_end_sets_finished():
+    async def run():
+        clock = scheduler.SimClock(START, speed=1e6, end=START + timedelta(minutes=30))
+        while not clock.finished.is_set():
+            await clock.sleep(900)
+        return clock.now()
+
+    assert _run(run()) == START + timedelta(minutes=30)
+
+
+def test_replay_serves_only_closed_bars(tmp_path, monkeypatch):
+    index = pd.date_range("2024-01-01", periods=20, freq="15min")
+    pd.DataFrame(
+        {"Open": range(20), "High": range(20), "Low": range(20), "Close": range(20), "Volume": 1.0}, index=index
+    ).to_csv(tmp_path / "EURUSD_15m.csv")
+    monkeypatch.setattr(config, "REPLAY_DIR", str(tmp_path))
+    monkeypatch.setattr(replay_provider, "_frames", {})
+    clock = scheduler.SimClock(START + timedelta(hours=1, minutes=5))
+    monkeypatch.setattr(scheduler, "clock", clock)
+
+    # 01:05: the 00:45 bar closed at 01:00, the 01:00 bar is still forming
+    df = replay_provider.fetch_ohlcv("EURUSD", "15m", count=3)
+    assert list(df.index) == list(index[1:4])
+    since = replay_provider.fetch_ohlcv("EURUSD", "15m", since=pd.Timestamp(index[2]))
+    assert list(since.index) == list(index[2:4])
+
+    # Exactly at a close, that bar is served
+    clock._now = START + timedelta(hours=1, minutes=15)
+    assert replay_provider.fetch_ohlcv("EURUSD", "15m").index[-1] == index[4]
+
+    clock._now = START + timedelta(minutes=10)
+    assert replay_provider.fetch_ohlcv("EURUSD", "15m") is None
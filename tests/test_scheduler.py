@@ -0,0 +1,42 @@
+from datetime import datetime, timezone
+import pandas as pd
+import pytest
+from src import config, markets, scheduler
+from src.data_providers import resample
+
+
+def _fx_bars(start: str, end: str) -> pd.DataFrame:
+    """
+    15m EURUSD bars during FX trading hours, indexed in London time like Yahoo's.
+    """
+    index = pd.date_range(start, end, freq="15min", tz="UTC", inclusive="left")
+    index = index[[markets.is_open(markets.FX, t) for t in index]].tz_convert("Europe/London")
+    return pd.DataFrame({"Open": 1.0, "High": 1.0, "Low": 1.0, "Close": 1.0, "Volume": 1.0}, index=index)
+
+
+# A BST week, and one spanning the switch to BST on 2024-03-31
+@pytest.mark.parametrize("start,end", [("2024-06-02", "2024-06-09"), ("2024-03-24", "2024-04-07")])
+def test_fx_wakes_match_resampled_bar_closes(monkeypatch, start, end):
+    monkeypatch.setattr(config, "PROVIDER", "yf")
+    ltf = _fx_bars(start, end)
+    htf = resample.resample_ohlcv(ltf, "4h", "EURUSD")
+    starts = htf.index.tz_convert("UTC")
+    # A bar closes 4h after it starts, or at the next local midnight (on 23h DST days)
+    nexts = list(starts[1:]) + [starts[-1] + pd.Timedelta(days=1)]
+    expected = [min(s + pd.Timedelta(hours=4), nxt) for s, nxt in zip(starts, nexts)]
+
+    closes = []
+    t = ltf.index[0].to_pydatetime().astimezone(timezone.utc)
+    stop = expected[-1].to_pydatetime()
+    while t < stop:
+        t = scheduler.next_bar_close(markets.FX, "4h", t)
+        closes.append(pd.Timestamp(t))
+    assert closes == expected
+    # Bars anchor at London midnight: in BST the 4h closes fall on 03/07/11/15/19/23 UTC
+    assert {c.hour for c in expected if c >= pd.Timestamp("2024-04-01", tz="UTC")} == {3, 7, 11, 15, 19, 23}
+
+
+def test_crypto_grid_is_utc(monkeypatch):
+    monkeypatch.setattr(config, "PROVIDER", "yf")
+    after = datetime(2024, 6, 3, 1, 30, tzinfo=timezone.utc)
+    assert scheduler.next_bar_close(markets.CRYPTO, "4h", after) == datetime(2024, 6, 3, 4, tzinfo=timezone.utc)
@@ -0,0 +1,20 @@
+from src.backtest.sweep import grid, random_combos, valid_combo
+
+SPACE = {"left": [2, 3, 4], "r_low": [0.382, 0.5, 0.618, 0.786], "r_high": [0.5, 0.618, 0.786]}
+
+
+def test_random_combos_returns_n_valid_distinct():
+    valid = [c for c in grid(SPACE) if valid_combo(c)]
+    for seed in range(20):
+        combos = random_combos(SPACE, 10, seed)
+        assert len(combos) == 10
+        assert all(valid_combo(c) for c in combos)
+        assert len({tuple(c.items()) for c in combos}) == 10
+        assert all(c in valid for c in combos)
+
+
+def test_random_combos_stops_at_the_valid_grid():
+    valid = [c for c in grid(SPACE) if valid_combo(c)]
+    combos = random_combos(SPACE, 1000, seed=1)
+    assert sorted(map(str, combos)) == sorted(map(str, valid))
+    assert random_combos(SPACE, 5, seed=3) == random_combos(SPACE, 5, seed=3)
@@ -0,0 +1,22 @@
+import pytest
+from src.scanner.bos_detector import find_swings, find_swings_loop
+
+
+@pytest.mark.parametrize("seed", range(20))
+@pytest.mark.parametrize("left,right", [(1, 1), (2, 3), (3, 3), (5, 2)])
+def test_find_swings_matches_loop(ohlcv_factory, seed, left, right):
+    df = ohlcv_factory(300, seed=seed)
+    assert find_swings(df, left, right) == find_swings_loop(df, left, right)
+
+
+@pytest.mark.parametrize("bars", [0, 1, 6, 7, 8])
+def test_find_swings_short_frames(ohlcv_factory, bars):
+    df = ohlcv_factory(bars, seed=bars)
+    assert find_swings(df, 3, 3) == find_swings_loop(df, 3, 3)
+
+
+def test_ties_are_not_swings(ohlcv_factory):
+    df = ohlcv_factory(7)
+    df["High"] = [1.0, 2.0, 3.0, 5.0, 5.0, 2.0, 1.0]
+    df["Low"] = [0.5, 0.4, 0.3, 0.1, 0.1, 0.4, 0.5]
+    assert find_swings(df, 2, 2) == ([], [])
@@ -0,0 +1,26 @@
+import asyncio
+from src.notifier.telegram_dispatcher import TelegramDispatcher
+
+
+def test_429_drains_the_global_bucket():
+    responses = iter([(429, {"ok": False, "parameters": {"retry_after": 5}}), (200, {"ok": True})])
+
+    async def fake_post(token, chat, text):
+        return next(responses)
+
+    async def no_wait():
+        return None
+
+    async def run():
+        d = TelegramDispatcher(token="t", chat_id="1", max_retries=1)
+        d._post = fake_post
+        # Skip the pacing so the retry goes straight through; only the bucket state is checked
+        d._global.acquire = no_wait
+        d._chat_bucket("1").acquire = no_wait
+        assert await d._deliver("t", "1", "hello")
+        return d
+
+    d = asyncio.run(run())
+    # Every send takes a global token first, so other chats wait out retry_after too
+    assert d._global.tokens <= -5 * d._global.rate
+    assert d._chat_bucket("1").tokens < 0